@@ -142,3 +142,73 @@ def proxy(table):
             return out
 
     return schema(table)(_ArrayDict(table))
+
+def toarrow(value):
+    import pyarrow
+    import oamap.proxy
+
+    if not isinstance(value, oamap.proxy.ListProxy):
+        raise TypeError("toarrow can only be applied to a ListProxy, not {0}".format(type(value)))
+
+    arrays, cache = value._arrays, value._cache
+
+    def recurse(generator, index, checkmasked=True):
+        if isinstance(generator, oamap.generator.ExtendedGenerator):
+            masked = generator.generic
+        else:
+            masked = generator
+
+        if checkmasked and isinstance(masked, oamap.generator.Masked):
+            # build the non-null values only, then spread them out with nulls where the mask says so
+            mask = masked._getmask(arrays, cache)[index]
+            valid = (mask != masked.maskedvalue)
+            out = recurse(generator, mask[valid], checkmasked=False)
+            if numpy.all(valid):
+                return out
+            else:
+                return out.take(pyarrow.array(numpy.cumsum(valid) - 1, mask=~valid))
+
+        if isinstance(generator, oamap.generator.ExtendedGenerator) and generator.schema.name in ("ByteString", "UTF8String"):
+            starts, stops = generator.generic._getstartsstops(arrays, cache)
+            offsets, contentindex = oamap.proxy._contentindex(starts[index], stops[index])
+            data = generator.generic.content._getdata(arrays, cache)[contentindex]
+            cls = pyarrow.StringArray if generator.schema.name == "UTF8String" else pyarrow.BinaryArray
+            return cls.from_buffers(len(offsets) - 1, pyarrow.py_buffer(offsets.astype(numpy.int32)), pyarrow.py_buffer(numpy.ascontiguousarray(data)))
+
+        elif isinstance(generator, oamap.generator.PrimitiveGenerator):
+            if generator.dtype.shape != ():
+                raise NotImplementedError("toarrow of multidimensional Primitive {0}".format(generator.dtype))
+            return pyarrow.array(generator._getdata(arrays, cache)[index])
+
+        elif isinstance(generator, oamap.generator.ListGenerator):
+            starts, stops = generator._getstartsstops(arrays, cache)
+            offsets, contentindex = oamap.proxy._contentindex(starts[index], stops[index])
+            return pyarrow.ListArray.from_arrays(pyarrow.array(offsets.astype(numpy.int32)), recurse(generator.content, contentindex))
+
+        elif isinstance(generator, oamap.generator.UnionGenerator):
+            tags, offsets = generator._gettagsoffsets(arrays, cache)
+            tags, offsets = tags[index], offsets[index]
+            valueoffsets = numpy.empty(len(tags), dtype=numpy.int32)
+            children = []
+            for tag, possibility in enumerate(generator.possibilities):
+                selected = (tags == tag)
+                valueoffsets[selected] = numpy.arange(numpy.count_nonzero(selected), dtype=numpy.int32)
+                children.append(recurse(possibility, offsets[selected]))
+            return pyarrow.UnionArray.from_dense(pyarrow.array(tags.astype(numpy.int8)), pyarrow.array(valueoffsets), children)
+
+        elif isinstance(generator, oamap.generator.RecordGenerator):
+            return pyarrow.StructArray.from_arrays([recurse(x, index) for x in generator.fields.values()], list(generator.fields))
+
+        elif isinstance(generator, oamap.generator.TupleGenerator):
+            return pyarrow.StructArray.from_arrays([recurse(x, index) for x in generator.types], [str(i) for i in range(len(generator.types))])
+
+        elif isinstance(generator, oamap.generator.PointerGenerator):
+            return recurse(generator.target, generator._getpositions(arrays, cache)[index])
+
+        elif isinstance(generator, oamap.generator.ExtendedGenerator):
+            return recurse(generator.generic, index, checkmasked=False)
+
+        else:
+            raise AssertionError("unrecognized generator type: {0} ({1})".format(generator.__class__, repr(generator)))
+
+    return recurse(value._generator.content, oamap.proxy._listindex(value._whence, value._stride, value._length))
@@ -0,0 +1,284 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2017, DIANA-HEP
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import re
+from collections import OrderedDict
+
+import numpy
+
+import oamap.schema
+import oamap.generator
+import oamap.util
+
+# Builders append new OAMap data to geometrically growing arrays, one class per schema node. With numba,
+# they are jitclasses and can be passed into (and filled by) nopython functions; without numba, the same
+# classes work in Python.
+#
+#     Primitive:       b.append(value)
+#     List:            b.begin(); ...fill b.content...; b.end()
+#     Record:          ...fill b.fieldname for each field...
+#     nullable:        b.masked() for None; b.valid() before filling a non-None Record
+#     all:             b.count() is the number of values appended so far
+
+_identifier = re.compile(r"^[a-zA-Z_][a-zA-Z_0-9]*$")
+_reserved = set(["append", "begin", "end", "valid", "masked", "count", "content", "data", "length", "starts", "stops", "mask", "masklength"])
+
+_grow = """
+        if {length} == {array}.shape[0]:
+            {array} = numpy.concatenate(({array}, numpy.empty_like({array})))"""
+
+def _jitclass():
+    try:
+        from numba.experimental import jitclass
+    except ImportError:
+        from numba import jitclass
+    return jitclass
+
+def _arraytype(dtype):
+    import numba as nb
+    return nb.types.Array(nb.from_dtype(numpy.dtype(dtype)), 1, "C")
+
+def _intp():
+    import numba as nb
+    return nb.intp
+
+def _makemask(out, spec):
+    out.append("""
+    def count(self):
+        return self.masklength
+
+    def masked(self):{grow}
+        self.mask[self.masklength] = {maskedvalue}
+        self.masklength += 1
+""".format(grow=_grow.format(length="self.masklength", array="self.mask"), maskedvalue=oamap.generator.Masked.maskedvalue))
+    if spec is not None:
+        spec["mask"] = _arraytype(oamap.generator.Masked.maskdtype)
+        spec["masklength"] = _intp()
+
+def _setmask(count):
+    return _grow.format(length="self.masklength", array="self.mask") + """
+        self.mask[self.masklength] = {0}
+        self.masklength += 1""".format(count)
+
+def _makeclass(node, capacity, jit, classes):
+    # returns a function of no arguments that makes a new, empty builder for this schema node
+    spec = OrderedDict() if jit else None
+    env = {"numpy": numpy}
+    args = []
+    makeargs = []
+    body = []
+    methods = []
+
+    if isinstance(node, oamap.schema.Primitive):
+        if node.dtype.shape != ():
+            raise NotImplementedError("builder for multidimensional Primitive:\n\n    {0}".format(node.__repr__(indent="    ")))
+        dtype = node.dtype
+        args.append("data")
+        makeargs.append(lambda: numpy.empty(capacity, dtype=dtype))
+        body.append("self.data = data")
+        body.append("self.length = 0")
+        if jit:
+            spec["data"] = _arraytype(dtype)
+            spec["length"] = _intp()
+
+        methods.append("""
+    def append(self, value):{setmask}{grow}
+        self.data[self.length] = value
+        self.length += 1
+""".format(setmask=_setmask("self.length") if node.nullable else "", grow=_grow.format(length="self.length", array="self.data")))
+
+        if not node.nullable:
+            methods.append("""
+    def count(self):
+        return self.length
+""")
+
+    elif isinstance(node, oamap.schema.List):
+        makecontent, contenttype = _makeclass(node.content, capacity, jit, classes)
+        posdtype = oamap.generator.ListGenerator.posdtype
+        args.extend(["starts", "stops", "content"])
+        makeargs.append(lambda: numpy.empty(capacity, dtype=posdtype))
+        makeargs.append(lambda: numpy.empty(capacity, dtype=posdtype))
+        makeargs.append(makecontent)
+        body.append("self.starts = starts")
+        body.append("self.stops = stops")
+        body.append("self.length = 0")
+        body.append("self.content = content")
+        if jit:
+            spec["starts"] = _arraytype(posdtype)
+            spec["stops"] = _arraytype(posdtype)
+            spec["length"] = _intp()
+            spec["content"] = contenttype
+
+        methods.append("""
+    def begin(self):{setmask}{grow1}{grow2}
+        self.starts[self.length] = self.content.count()
+
+    def end(self):
+        self.stops[self.length] = self.content.count()
+        self.length += 1
+""".format(setmask=_setmask("self.length") if node.nullable else "", grow1=_grow.format(length="self.length", array="self.starts"), grow2=_grow.format(length="self.length", array="self.stops")))
+
+        if not node.nullable:
+            methods.append("""
+    def count(self):
+        return self.length
+""")
+
+    elif isinstance(node, oamap.schema.Record):
+        if len(node.fields) == 0:
+            raise TypeError("builder for a Record with no fields")
+        for n in node.fields:
+            if _identifier.match(n) is None or n in _reserved:
+                raise ValueError("field name {0} cannot be used as a builder attribute".format(repr(n)))
+
+        for n, x in node.fields.items():
+            makefield, fieldtype = _makeclass(x, capacity, jit, classes)
+            args.append(n)
+            makeargs.append(makefield)
+            body.append("self.{0} = {0}".format(n))
+            if jit:
+                spec[n] = fieldtype
+
+        first = list(node.fields)[0]
+        if node.nullable:
+            methods.append("""
+    def valid(self):{setmask}
+""".format(setmask=_setmask("self.{0}.count()".format(first))))
+        else:
+            methods.append("""
+    def count(self):
+        return self.{0}.count()
+""".format(first))
+
+    else:
+        raise NotImplementedError("builder for schema:\n\n    {0}".format(node.__repr__(indent="    ")))
+
+    if node.nullable:
+        args.append("mask")
+        makeargs.append(lambda: numpy.empty(capacity, dtype=oamap.generator.Masked.maskdtype))
+        body.append("self.mask = mask")
+        body.append("self.masklength = 0")
+        _makemask(methods, spec)
+
+    classname = "{0}Builder{1}".format(type(node).__name__, len(classes))
+    oamap.util.doexec("""
+class {classname}(object):
+    def __init__(self, {args}):
+        {body}
+{methods}""".format(classname=classname, args=", ".join(args), body="\n        ".join(body), methods="".join(methods)), env)
+    cls = env[classname]
+
+    if jit:
+        cls = _jitclass()(list(spec.items()))(cls)
+        instancetype = cls.class_type.instance_type
+    else:
+        instancetype = None
+    classes.append(cls)
+
+    return lambda: cls(*[x() for x in makeargs]), instancetype
+
+def _collect(node, builder, out):
+    # (schema node, arrays) pairs in the order expected by _DualSource.put
+    if isinstance(node, oamap.schema.Primitive):
+        arrays = (builder.data[:builder.length],)
+    elif isinstance(node, oamap.schema.List):
+        arrays = (builder.starts[:builder.length], builder.stops[:builder.length])
+    else:
+        arrays = ()
+    if node.nullable:
+        arrays = arrays + (builder.mask[:builder.masklength],)
+    out.append((node, arrays))
+
+    if isinstance(node, oamap.schema.List):
+        _collect(node.content, builder.content, out)
+    elif isinstance(node, oamap.schema.Record):
+        for n, x in node.fields.items():
+            _collect(x, getattr(builder, n), out)
+
+    return out
+
+class Builder(object):
+    """Builds new OAMap data of a given schema by appending in compiled or Python code.
+
+    Pass ``builder.root`` to the function that fills it and call ``builder.proxy()`` when done. For a top-level
+    List schema, ``root`` builds the list's content (one item per entry); otherwise, it builds one value.
+    """
+
+    def __init__(self, schema, capacity=1024, numba=True):
+        if not isinstance(schema, oamap.schema.Schema):
+            raise TypeError("schema must be a Schema, not {0}".format(repr(schema)))
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+
+        jit = numba is not None and numba is not False
+        if jit:
+            try:
+                import numba as nb
+            except ImportError:
+                jit = False
+
+        self.schema = schema.deepcopy()
+        self.schema.nullable = False
+        if isinstance(self.schema, oamap.schema.List):
+            self._node = self.schema.content
+        else:
+            self._node = self.schema
+
+        make, self.numbatype = _makeclass(self._node, capacity, jit, [])
+        self.root = make()
+
+    def __len__(self):
+        return self.root.count()
+
+    def arrays(self):
+        return _collect(self._node, self.root, [])
+
+    def proxy(self):
+        schema = self.schema.deepcopy()
+        node = schema.content if isinstance(schema, oamap.schema.List) else schema
+        if not isinstance(schema, oamap.schema.List) and self.root.count() != 1:
+            raise ValueError("non-List builder must have exactly one value to make a proxy, not {0}".format(self.root.count()))
+
+        arrays = {}
+        for i, (n, x) in enumerate(_collect(node, self.root, [])):
+            names = ["builder-{0}-{1}".format(i, j) for j in range(len(x))]
+            arrays.update(zip(names, x))
+            if isinstance(n, oamap.schema.Primitive):
+                n.data = names[0]
+            elif isinstance(n, oamap.schema.List):
+                n.starts, n.stops = names[:2]
+            if n.nullable:
+                n.mask = names[-1]
+
+        if isinstance(schema, oamap.schema.List):
+            return schema(arrays, numentries=self.root.count())
+        else:
+            return schema(arrays)
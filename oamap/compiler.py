@@ -36,10 +36,33 @@ import numpy
 import oamap.schema
 import oamap.generator
 import oamap.proxy
+from oamap.util import OrderedDict
 
 if sys.version_info[0] > 2:
     basestring = str
 
+# set to False before compiling to skip index and array-length checks in compiled list access; proxy types record
+# the setting when they are created (it is part of their names), so checked and unchecked compilations are cached apart
+boundscheck = True
+
+# generators for proxies returned from compiled code: unpickled once per fingerprint, rather than once per boxing,
+# and kept for the most recently boxed fingerprints only
+_boxgenerators = OrderedDict()
+_boxgeneratorssize = 100
+
+def _boxgenerator(fingerprint_pickled):
+    fingerprint, pickled = fingerprint_pickled
+    if fingerprint in _boxgenerators:
+        # move to the end: most recently used
+        generator = _boxgenerators.pop(fingerprint)
+    else:
+        generator = pickle.loads(pickled)
+        generator._new()
+    _boxgenerators[fingerprint] = generator
+    while len(_boxgenerators) > _boxgeneratorssize:
+        del _boxgenerators[list(_boxgenerators.keys())[0]]
+    return generator
+
 try:
     import numba
     import llvmlite.llvmpy.core
@@ -56,7 +79,7 @@ else:
                 self.generator = self.schema.generator()
             else:
                 self.generator = generator
-            super(SchemaType, self).__init__(name="OAMap-Schema{0} {1}".format("" if self.matchable else " (unmatchable)", self.schema.tojsonstring()))
+            super(SchemaType, self).__init__(name="OAMap-Schema{0} {1}".format("" if self.matchable else " (unmatchable)", self.schema.fingerprint))
 
         def unmatchable(self):
             return SchemaType(self.schema, generator=self.generator, matchable=False)
@@ -374,12 +397,13 @@ else:
         return baggage._getvalue(), ptrs, lens
 
     def box_baggage(context, builder, pyapi, generator, baggage_val):
-        generator_obj = pyapi.unserialize(pyapi.serialize_object(generator))
-        new_fcn = pyapi.object_getattr_string(generator_obj, "_new")
-        results_obj = pyapi.call_function_objargs(new_fcn, ())
+        boxgenerator_fcn = pyapi.unserialize(pyapi.serialize_object(_boxgenerator))
+        fingerprint_pickled_obj = pyapi.unserialize(pyapi.serialize_object((generator.fingerprint, pickle.dumps(generator))))
+        generator_obj = pyapi.call_function_objargs(boxgenerator_fcn, (fingerprint_pickled_obj,))
         with builder.if_then(numba.cgutils.is_not_null(builder, pyapi.err_occurred()), likely=False):
             builder.ret(llvmlite.llvmpy.core.Constant.null(pyapi.pyobj))
-        pyapi.decref(results_obj)
+        pyapi.decref(boxgenerator_fcn)
+        pyapi.decref(fingerprint_pickled_obj)
 
         baggage = numba.cgutils.create_struct_proxy(baggagetype)(context, builder, value=baggage_val)
 
@@ -387,12 +411,78 @@ else:
 
     ################################################################ general routines for all proxies
 
+    def _requiredfingerprints(generator, memo):
+        # fingerprints of the arrays that compiled code reads, which must survive numba's on-disk cache
+        if id(generator) in memo:
+            return
+        memo[id(generator)] = generator.fingerprint if generator._isrequired() else None
+
+        if isinstance(generator, oamap.generator.ListGenerator):
+            _requiredfingerprints(generator.content, memo)
+        elif isinstance(generator, oamap.generator.UnionGenerator):
+            for x in generator.possibilities:
+                _requiredfingerprints(x, memo)
+        elif isinstance(generator, oamap.generator.RecordGenerator):
+            for x in generator.fields.values():
+                _requiredfingerprints(x, memo)
+        elif isinstance(generator, oamap.generator.TupleGenerator):
+            for x in generator.types:
+                _requiredfingerprints(x, memo)
+        elif isinstance(generator, oamap.generator.PointerGenerator):
+            _requiredfingerprints(generator.target, memo)
+        elif isinstance(generator, oamap.generator.ExtendedGenerator):
+            _requiredfingerprints(generator.generic, memo)
+
+    def _reconstruct_proxytype(required, reconstructor, args):
+        # a type loaded from numba's cache was compiled in another process: restore what its lowering required
+        out = reconstructor(*args)
+        memo = {}
+        for x in (out.generator.possibilities if isinstance(out, SyntheticUnion) else [out.generator]):
+            _requiredgenerators(x, required, memo)
+        return out
+
+    def _requiredgenerators(generator, required, memo):
+        # attach the restored requirements to the type's own generators, so that they live as long as it does
+        if id(generator) in memo:
+            return
+        memo[id(generator)] = None
+        if generator.fingerprint in required:
+            oamap.generator.Generator._requirecompiled(generator)
+
+        if isinstance(generator, oamap.generator.ListGenerator):
+            _requiredgenerators(generator.content, required, memo)
+        elif isinstance(generator, oamap.generator.UnionGenerator):
+            for x in generator.possibilities:
+                _requiredgenerators(x, required, memo)
+        elif isinstance(generator, oamap.generator.RecordGenerator):
+            for x in generator.fields.values():
+                _requiredgenerators(x, required, memo)
+        elif isinstance(generator, oamap.generator.TupleGenerator):
+            for x in generator.types:
+                _requiredgenerators(x, required, memo)
+        elif isinstance(generator, oamap.generator.PointerGenerator):
+            _requiredgenerators(generator.target, required, memo)
+        elif isinstance(generator, oamap.generator.ExtendedGenerator):
+            _requiredgenerators(generator.generic, required, memo)
+
     class ProxyNumbaType(numba.types.Type):
+        def __init__(self, kind):
+            self.boundscheck = boundscheck
+            super(ProxyNumbaType, self).__init__(name="OAMap-{0}-{1}{2}".format(kind, self.generator.fingerprint, "" if self.boundscheck else "-unchecked"))
+
         def __repr__(self):
             return "\n    " + self.generator.schema.__repr__(indent="    ") + "\n"
 
+        def __reduce__(self):
+            reconstructor, args = super(ProxyNumbaType, self).__reduce__()[:2]
+            memo = {}
+            for x in (self.generator.possibilities if isinstance(self, SyntheticUnion) else [self.generator]):
+                _requiredfingerprints(x, memo)
+            required = sorted(x for x in memo.values() if x is not None)
+            return (_reconstruct_proxytype, (required, reconstructor, args))
+
         def unify(self, context, other):
-            if isinstance(other, ProxyNumbaType) and self.generator is other.generator:
+            if isinstance(other, ProxyNumbaType) and self.generator.fingerprint == other.generator.fingerprint:
                 return self
 
     @numba.extending.typeof_impl.register(oamap.proxy.Proxy)
@@ -478,7 +568,7 @@ else:
             first, rest = predicates[0], predicates[1:]
             return builder.or_(first, any_(builder, rest, *args, **kwds), *args, **kwds)
 
-    def arrayitem(context, builder, idx, ptrs, lens, at, dtype):
+    def arrayitem(context, builder, idx, ptrs, lens, at, dtype, checked=True):
         offset = builder.mul(idx, literal_int64(numba.types.intp.bitwidth // 8))
 
         ptrposition = builder.inttoptr(
@@ -492,7 +582,8 @@ else:
         ptr = numba.targets.arrayobj.load_item(context, builder, numba.types.intp[:], ptrposition)
         len = numba.targets.arrayobj.load_item(context, builder, numba.types.intp[:], lenposition)
 
-        raise_exception(context, builder, builder.icmp_unsigned(">=", at, len), RuntimeError("array index out of range"))
+        if checked and boundscheck:
+            raise_exception(context, builder, builder.icmp_unsigned(">=", at, len), RuntimeError("array index out of range"))
 
         finalptr = builder.inttoptr(
             builder.add(ptr, builder.mul(at, literal_int64(dtype.itemsize))),
@@ -571,12 +662,14 @@ else:
         else:
             raise AssertionError("unrecognized generator type: {0} ({1})".format(generator.__class__, repr(generator)))
 
-    def generate(context, builder, generator, baggage, ptrs, lens, at, checkmasked=True):
+    def generate(context, builder, generator, baggage, ptrs, lens, at, checkmasked=True, checked=True):
+        # checked=False when the caller has proven that "at" is in range (e.g. iteration); data-dependent indexes are still checked
         generator._required = True
+        oamap.generator.Generator._requirecompiled(generator)
 
         if checkmasked and isinstance(generator, oamap.generator.Masked):
             maskidx = literal_int64(generator.maskidx)
-            maskvalue = arrayitem(context, builder, maskidx, ptrs, lens, at, generator.maskdtype)
+            maskvalue = arrayitem(context, builder, maskidx, ptrs, lens, at, generator.maskdtype, checked)
 
             comparison = builder.icmp_unsigned("==", maskvalue, literal_int(generator.maskedvalue, generator.maskdtype.itemsize))
 
@@ -610,13 +703,13 @@ else:
 
         if isinstance(generator, oamap.generator.PrimitiveGenerator):
             dataidx = literal_int64(generator.dataidx)
-            return arrayitem(context, builder, dataidx, ptrs, lens, at, generator.dtype)
+            return arrayitem(context, builder, dataidx, ptrs, lens, at, generator.dtype, checked)
 
         elif isinstance(generator, oamap.generator.ListGenerator):
             startsidx = literal_int64(generator.startsidx)
             stopsidx  = literal_int64(generator.stopsidx)
-            start = cast_int64(builder, arrayitem(context, builder, startsidx, ptrs, lens, at, generator.posdtype))
-            stop  = cast_int64(builder, arrayitem(context, builder, stopsidx,  ptrs, lens, at, generator.posdtype))
+            start = cast_int64(builder, arrayitem(context, builder, startsidx, ptrs, lens, at, generator.posdtype, checked))
+            stop  = cast_int64(builder, arrayitem(context, builder, stopsidx,  ptrs, lens, at, generator.posdtype, checked))
             listproxy = numba.cgutils.create_struct_proxy(typ)(context, builder)
             listproxy.baggage = baggage
             listproxy.ptrs = ptrs
@@ -629,8 +722,8 @@ else:
         elif isinstance(generator, oamap.generator.UnionGenerator):
             tagsidx    = literal_int64(generator.tagsidx)
             offsetsidx = literal_int64(generator.offsetsidx)
-            tag    = cast_int64(builder, arrayitem(context, builder, tagsidx,    ptrs, lens, at, generator.tagdtype))
-            offset = cast_int64(builder, arrayitem(context, builder, offsetsidx, ptrs, lens, at, generator.offsetdtype))
+            tag    = cast_int64(builder, arrayitem(context, builder, tagsidx,    ptrs, lens, at, generator.tagdtype, checked))
+            offset = cast_int64(builder, arrayitem(context, builder, offsetsidx, ptrs, lens, at, generator.offsetdtype, checked))
             raise_exception(context,
                             builder,
                             builder.or_(builder.icmp_signed("<", tag, literal_int64(0)),
@@ -662,11 +755,11 @@ else:
 
         elif isinstance(generator, oamap.generator.PointerGenerator):
             positionsidx = literal_int64(generator.positionsidx)
-            index = cast_int64(builder, arrayitem(context, builder, positionsidx, ptrs, lens, at, generator.posdtype))
+            index = cast_int64(builder, arrayitem(context, builder, positionsidx, ptrs, lens, at, generator.posdtype, checked))
             return generate(context, builder, generator.target, baggage, ptrs, lens, index)
 
         elif isinstance(generator, oamap.generator.ExtendedGenerator):
-            return generate(context, builder, generator.generic, baggage, ptrs, lens, at)
+            return generate(context, builder, generator.generic, baggage, ptrs, lens, at, checked=checked)
 
         else:
             raise AssertionError("unrecognized generator type: {0} ({1})".format(generator.__class__, repr(generator)))
@@ -722,7 +815,7 @@ else:
     class ListProxyNumbaType(ProxyNumbaType):
         def __init__(self, generator):
             self.generator = generator
-            super(ListProxyNumbaType, self).__init__(name="OAMap-ListProxy-" + self.generator.id)
+            super(ListProxyNumbaType, self).__init__("ListProxy")
 
     @numba.extending.register_model(ListProxyNumbaType)
     class ListProxyModel(numba.datamodel.models.StructModel):
@@ -784,11 +877,12 @@ else:
             builder.store(builder.add(indexval, listproxy.length), normindex_ptr)
         normindex = builder.load(normindex_ptr)
 
-        raise_exception(context,
-                        builder,
-                        builder.or_(builder.icmp_signed("<", normindex, literal_int64(0)),
-                                    builder.icmp_signed(">=", normindex, listproxy.length)),
-                        IndexError("index out of bounds"))
+        if listtpe.boundscheck:
+            raise_exception(context,
+                            builder,
+                            builder.or_(builder.icmp_signed("<", normindex, literal_int64(0)),
+                                        builder.icmp_signed(">=", normindex, listproxy.length)),
+                            IndexError("index out of bounds"))
 
         at = builder.add(listproxy.whence, builder.mul(listproxy.stride, normindex))
         return generate(context, builder, listtpe.generator.content, listproxy.baggage, listproxy.ptrs, listproxy.lens, at)
@@ -823,7 +917,7 @@ else:
     def listproxytype_is(context, builder, sig, args):
         ltype, rtype = sig.args
         lval, rval = args
-        if ltype.generator.id == rtype.generator.id:
+        if ltype.generator.fingerprint == rtype.generator.fingerprint:
             lproxy = numba.cgutils.create_struct_proxy(ltype)(context, builder, value=lval)
             lbaggage = numba.cgutils.create_struct_proxy(baggagetype)(context, builder, value=lproxy.baggage)
             rproxy = numba.cgutils.create_struct_proxy(rtype)(context, builder, value=rval)
@@ -991,7 +1085,8 @@ else:
 
         with builder.if_then(is_valid, likely=True):
             at = builder.add(listproxy.whence, builder.mul(listproxy.stride, index))
-            result.yield_(generate(context, builder, itertpe.listproxy.generator.content, listproxy.baggage, listproxy.ptrs, listproxy.lens, at))
+            # 0 <= index < length, so the content's own arrays need no range check
+            result.yield_(generate(context, builder, itertpe.listproxy.generator.content, listproxy.baggage, listproxy.ptrs, listproxy.lens, at, checked=False))
             nextindex = numba.cgutils.increment_index(builder, index)
             builder.store(nextindex, iterproxy.index)
 
@@ -1000,13 +1095,14 @@ else:
     class UnionProxyNumbaType(ProxyNumbaType):
         def __init__(self, generator):
             self.generator = generator
-            super(UnionProxyNumbaType, self).__init__(name="OAMap-UnionProxy-" + self.generator.id)
+            super(UnionProxyNumbaType, self).__init__("UnionProxy")
+
+    class SyntheticGenerator(object): pass
 
     class SyntheticUnion(UnionProxyNumbaType):
-        class SyntheticGenerator(object): pass
         def __init__(self, generators):
-            generator = SyntheticUnion.SyntheticGenerator()
-            generator.id = " ".join(x.id for x in generators)
+            generator = SyntheticGenerator()
+            generator.fingerprint = " ".join(x.fingerprint for x in generators)
             generator.possibilities = generators
             generator.schema = oamap.schema.Union([x.schema for x in generators])
             super(SyntheticUnion, self).__init__(generator)
@@ -1086,7 +1182,7 @@ else:
     def unionproxytype_is(context, builder, sig, args):
         ltype, rtype = sig.args
         lval, rval = args
-        if ltype.generator.id == rtype.generator.id:
+        if ltype.generator.fingerprint == rtype.generator.fingerprint:
             lproxy = numba.cgutils.create_struct_proxy(ltype)(context, builder, value=lval)
             lbaggage = numba.cgutils.create_struct_proxy(baggagetype)(context, builder, value=lproxy.baggage)
             rproxy = numba.cgutils.create_struct_proxy(rtype)(context, builder, value=rval)
@@ -1105,7 +1201,7 @@ else:
         ltype, rtype = sig.args
         lval, rval = args
         for datatag, datatype in ltype.generator.possibilities:
-            if datatype.generator.id == rtype.generator.id:
+            if datatype.generator.fingerprint == rtype.generator.fingerprint:
                 lproxy = numba.cgutils.create_struct_proxy(ltype)(context, builder, value=lval)
                 lbaggage = numba.cgutils.create_struct_proxy(baggagetype)(context, builder, value=lproxy.baggage)
                 rproxy = numba.cgutils.create_struct_proxy(rtype)(context, builder, value=rval)
@@ -1256,7 +1352,7 @@ else:
     class RecordProxyNumbaType(ProxyNumbaType):
         def __init__(self, generator):
             self.generator = generator
-            super(RecordProxyNumbaType, self).__init__(name="OAMap-RecordProxy-" + self.generator.id)
+            super(RecordProxyNumbaType, self).__init__("RecordProxy")
 
     @numba.extending.register_model(RecordProxyNumbaType)
     class RecordProxyModel(numba.datamodel.models.StructModel):
@@ -1293,7 +1389,7 @@ else:
     def recordproxytype_is(context, builder, sig, args):
         ltype, rtype = sig.args
         lval, rval = args
-        if ltype.generator.id == rtype.generator.id:
+        if ltype.generator.fingerprint == rtype.generator.fingerprint:
             lproxy = numba.cgutils.create_struct_proxy(ltype)(context, builder, value=lval)
             lbaggage = numba.cgutils.create_struct_proxy(baggagetype)(context, builder, value=lproxy.baggage)
             rproxy = numba.cgutils.create_struct_proxy(rtype)(context, builder, value=rval)
@@ -1374,7 +1470,7 @@ else:
     class TupleProxyNumbaType(ProxyNumbaType):
         def __init__(self, generator):
             self.generator = generator
-            super(TupleProxyNumbaType, self).__init__(name="OAMap-TupleProxy-" + self.generator.id)
+            super(TupleProxyNumbaType, self).__init__("TupleProxy")
 
     @numba.extending.register_model(TupleProxyNumbaType)
     class TupleProxyModel(numba.datamodel.models.StructModel):
@@ -1436,7 +1532,7 @@ else:
     def tupleproxytype_is(context, builder, sig, args):
         ltype, rtype = sig.args
         lval, rval = args
-        if ltype.generator.id == rtype.generator.id:
+        if ltype.generator.fingerprint == rtype.generator.fingerprint:
             lproxy = numba.cgutils.create_struct_proxy(ltype)(context, builder, value=lval)
             lbaggage = numba.cgutils.create_struct_proxy(baggagetype)(context, builder, value=lproxy.baggage)
             rproxy = numba.cgutils.create_struct_proxy(rtype)(context, builder, value=rval)
@@ -39,6 +39,7 @@ import time
 
 import oamap.dataset
 import oamap.extension.common
+import oamap.fill
 import oamap.operations
 import oamap.proxy
 import oamap.schema
@@ -207,6 +208,8 @@ class Database(object):
         def __delattr__(self, name):
             self.__dict__["_database"].delete(name)
 
+    partitionbytes = 67108864          # default partition size limit for fromiterdata
+
     @classmethod
     def writable(cls, backend, namespace="", *args, **kwargs):
         out = cls(*args, **kwargs)
@@ -336,6 +339,10 @@ class Database(object):
             pointer_fromequal = opts.pop("pointer_fromequal", False)
         except KeyError:
             pass
+        try:
+            processes = opts.pop("processes", None)
+        except KeyError:
+            pass
         try:
             namespace = opts.pop("namespace", self._namespace)
         except KeyError:
@@ -389,28 +396,16 @@ class Database(object):
 
         elif isinstance(schema, oamap.schema.List):
             offsets = [0]
-            for partitionid, partition in enumerate(partitions):
-                data = generator.fromdata(partition)
-                roles2arrays = dict((x, data._arrays[str(x)]) for x in roles)
-                startsrole = oamap.generator.StartsRole(generator.starts, generator.namespace, None)
-                stopsrole = oamap.generator.StopsRole(generator.stops, generator.namespace, None)
-                startsrole.stops = stopsrole
-                stopsrole.starts = startsrole
-                if schema.nullable:
-                    maskrole = oamap.generator.MaskRole(generator.mask, generator.namespace, {startsrole: roles2arrays[startsrole], stopsrole: roles2arrays[stopsrole]})
-                del roles2arrays[startsrole]
-                del roles2arrays[stopsrole]
-                if schema.nullable:
-                    del roles2arrays[maskrole]
-
-                active = backend.instantiate(partitionid)
-                if hasattr(active, "putall"):
-                    active.putall(roles2arrays)
-                else:
-                    for n, x in roles2arrays.items():
-                        active[str(n)] = x
-
-                offsets.append(offsets[-1] + len(data))
+            if processes is None:
+                for partitionid, partition in enumerate(partitions):
+                    data = generator.fromdata(partition)
+                    self._putpartition(backend, generator, roles, partitionid, data._arrays)
+                    offsets.append(offsets[-1] + len(data))
+            else:
+                # partitions are filled in worker processes and written here
+                for partitionid, (numentries, arrays) in enumerate(oamap.fill.fromdataparallel(partitions, generator, processes=processes, pointer_fromequal=pointer_fromequal)):
+                    self._putpartition(backend, generator, roles, partitionid, arrays)
+                    offsets.append(offsets[-1] + numentries)
 
             out = oamap.dataset.Dataset(name, generator.namedschema(), self._backends, self._executor, offsets, extension=extension, packing=packing, doc=doc, metadata=metadata)
 
@@ -419,6 +414,90 @@ class Database(object):
 
         self.put(name, out, namespace=namespace)
 
+    def fromiterdata(self, name, schema, values, **opts):
+        try:
+            limit = opts.pop("limit", lambda entries, arrayitems, arraybytes: sum(arraybytes.values()) <= self.partitionbytes)
+        except KeyError:
+            pass
+        try:
+            pointer_fromequal = opts.pop("pointer_fromequal", False)
+        except KeyError:
+            pass
+        try:
+            namespace = opts.pop("namespace", self._namespace)
+        except KeyError:
+            pass
+        try:
+            extension = opts.pop("extension", None)
+        except KeyError:
+            pass
+        try:
+            packing = opts.pop("packing", None)
+        except KeyError:
+            pass
+        try:
+            doc = opts.pop("doc", None)
+        except KeyError:
+            pass
+        try:
+            metadata = opts.pop("metadata", None)
+        except KeyError:
+            pass
+        if len(opts) > 0:
+            raise TypeError("unrecognized options: {0}".format(" ".join(opts)))
+
+        if not isinstance(schema, oamap.schema.List):
+            raise TypeError("only lists can be filled iteratively")
+
+        if namespace not in self._backends:
+            self[namespace] = DictBackend()
+        backend = self[namespace]
+
+        def setnamespace(node):
+            node.namespace = namespace
+            return node
+        schema = schema.replace(setnamespace)
+
+        generator = schema.generator(prefix=backend.prefix(name), delimiter=backend.delimiter(), packing=packing)
+        generator._requireall()
+        roles = generator._togetall({}, generator._newcache(), True, set())
+
+        # each partition is written as soon as it is cut, so that only one partition is ever in memory;
+        # the dataset is published once, when all of its partitions exist
+        offsets = [0]
+        for numentries, arrays in oamap.fill.fromiterdata(values, generator=generator, limit=limit, pointer_fromequal=pointer_fromequal):
+            if numentries > 0:
+                self._putpartition(backend, generator, roles, len(offsets) - 1, arrays)
+                offsets.append(offsets[-1] + numentries)
+            else:
+                empty = arrays
+        if len(offsets) == 1:
+            # a dataset has at least one partition, even if empty
+            self._putpartition(backend, generator, roles, 0, empty)
+            offsets.append(0)
+
+        self.put(name, oamap.dataset.Dataset(name, generator.namedschema(), self._backends, self._executor, offsets, extension=extension, packing=packing, doc=doc, metadata=metadata), namespace=namespace)
+
+    def _putpartition(self, backend, generator, roles, partitionid, arrays):
+        roles2arrays = dict((x, arrays[str(x)]) for x in roles)
+        startsrole = oamap.generator.StartsRole(generator.starts, generator.namespace, None)
+        stopsrole = oamap.generator.StopsRole(generator.stops, generator.namespace, None)
+        startsrole.stops = stopsrole
+        stopsrole.starts = startsrole
+        if isinstance(generator, oamap.generator.Masked):
+            maskrole = oamap.generator.MaskRole(generator.mask, generator.namespace, {startsrole: roles2arrays[startsrole], stopsrole: roles2arrays[stopsrole]})
+        del roles2arrays[startsrole]
+        del roles2arrays[stopsrole]
+        if isinstance(generator, oamap.generator.Masked):
+            del roles2arrays[maskrole]
+
+        active = backend.instantiate(partitionid)
+        if hasattr(active, "putall"):
+            active.putall(roles2arrays)
+        else:
+            for n, x in roles2arrays.items():
+                active[str(n)] = x
+
 ################################################################ InMemoryDatabase (concrete)
 
 class InMemoryDatabase(Database):
@@ -364,6 +364,34 @@ class Dataset(_Data):
             for i in range(self._offsets[partitionid], self._offsets[partitionid + 1]):
                 yield self[i]
 
+    def _applied(self, partitionid):
+        result = self.partition(partitionid)
+        for operation in self._operations:
+            result = operation.apply(result)
+        if not isinstance(result, oamap.proxy.ListProxy):
+            raise TypeError("operations on Dataset {0} do not produce a list".format(repr(self._name)))
+        return result
+
+    def batches(self, size):
+        # batches do not cross partition boundaries
+        for partitionid in range(self.numpartitions):
+            for batch in self._applied(partitionid).batches(size):
+                yield batch
+
+    def toarrow(self, partitionid=None):
+        if partitionid is None:
+            import pyarrow
+            return pyarrow.chunked_array([self._applied(i).toarrow() for i in range(self.numpartitions)])
+        else:
+            return self._applied(partitionid).toarrow()
+
+    def topandas(self, partitionid=None):
+        if partitionid is None:
+            import pandas
+            return pandas.concat([self._applied(i).topandas() for i in range(self.numpartitions)], ignore_index=True)
+        else:
+            return self._applied(partitionid).topandas()
+
     def __getitem__(self, index):
         if isinstance(index, slice):
             start, stop, step = oamap.util.slice2sss(index, self.numentries)
@@ -373,14 +401,12 @@ class Dataset(_Data):
             if localstop < -1 or localstop > (self._offsets[partitionid + 1] - self._offsets[partitionid]):
                 raise IndexError("slice spans multiple partitions")
 
-            out = self.partition(partitionid)
-            out._whence = localstart
-            out._stride = step
+            # a new view on the cached partition's arrays: narrowing the cached object itself would leak into batches and exports
+            cached = self.partition(partitionid)
 
-            # out._length = int(math.ceil(float(abs(localstop - localstart)) / abs(step)))
+            # length = int(math.ceil(float(abs(localstop - localstart)) / abs(step)))
             d, m = divmod(abs(localstart - localstop), abs(step))
-            out._length = d + (1 if m != 0 else 0)
-            return out
+            return cached.__class__(cached._generator, cached._arrays, cached._cache, localstart, step, d + (1 if m != 0 else 0))
 
         else:
             normindex = index if index >= 0 else index + self.numentries
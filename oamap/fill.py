@@ -28,12 +28,20 @@
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+import codecs
+import itertools
+import json
+import math
 import re
 from functools import reduce
 
+import numpy
+
+import oamap.schema
 import oamap.generator
 import oamap.inference
 import oamap.fillable
+import oamap.util
 
 def toarrays(fillables):
     return dict((n, x[:]) for n, x in fillables.items())
@@ -225,7 +233,47 @@ def _fromdata_fill(obj, gen, fillables, targetids, pointerobjs, at, pointerat):
     elif isinstance(gen, oamap.generator.ExtendedGenerator):
         _fromdata_fill(gen.degenerate(obj), gen.generic, fillables, targetids, pointerobjs, at, pointerat)
 
+class _TargetIds(dict):
+    # {id(obj): (position, obj)} for one pointer target, remembering the order in which objects were first added
+    def __init__(self):
+        dict.__init__(self)
+        self.order = []
+
+    def __setitem__(self, key, value):
+        if key not in self:
+            self.order.append(key)
+        dict.__setitem__(self, key, value)
+
+def _fromdata_hashable(obj, active):
+    # equal objects (by ==) have equal keys; the same object may appear many times, but not inside itself
+    if isinstance(obj, (dict, list, tuple)):
+        if id(obj) in active:
+            raise TypeError("object contains itself")
+        active.add(id(obj))
+        try:
+            if isinstance(obj, dict):
+                return (dict, frozenset((n, _fromdata_hashable(x, active)) for n, x in obj.items()))
+            else:
+                return (tuple if isinstance(obj, tuple) else list, tuple(_fromdata_hashable(x, active) for x in obj))
+        finally:
+            active.discard(id(obj))
+    else:
+        hash(obj)
+        return obj
+
+def _fromdata_key(obj, pointer_fromequal):
+    # pointer_fromequal may be a user-supplied key function; otherwise use the structure of the object, if it is hashable
+    if callable(pointer_fromequal):
+        return pointer_fromequal(obj)
+    try:
+        return _fromdata_hashable(obj, set())
+    except TypeError:
+        return None
+
 def _fromdata_finish(fillables, pointers, pointerobjs, targetids, pointerat, pointer_fromequal, fillables_leaf_to_root):
+    # hash indexes of pointer targets for pointer_fromequal: {id(target): ({key: position}, number of target objects indexed)}
+    targetindex = {}
+
     # do the pointers after everything else
     for pointer in pointers:
         while len(pointerobjs[id(pointer)]) > 0:
@@ -238,11 +286,26 @@ def _fromdata_finish(fillables, pointers, pointerobjs, targetids, pointerat, poi
                 else:
                     position = None
                     if pointer_fromequal:
-                        # fallback to quadratic complexity search
-                        for key, (pos, obj2) in targetids[id(pointer.target)].items():
-                            if obj == obj2:
-                                position = pos
-                                break
+                        # index the target objects added since the last lookup, including any added by filling other pointers
+                        ids = targetids[id(pointer.target)]
+                        index, numindexed = targetindex.get(id(pointer.target), ({}, 0))
+                        for i in ids.order[numindexed:]:
+                            pos, obj2 = ids[i]
+                            key2 = _fromdata_key(obj2, pointer_fromequal)
+                            if key2 is not None and key2 not in index:
+                                index[key2] = pos
+                        targetindex[id(pointer.target)] = (index, len(ids.order))
+
+                        key = _fromdata_key(obj, pointer_fromequal)
+                        if key is not None:
+                            position = index.get(key, None)
+                        else:
+                            # no hashable key: fallback to quadratic complexity search
+                            for i in ids.order:
+                                pos, obj2 = ids[i]
+                                if obj == obj2:
+                                    position = pos
+                                    break
 
                     if position is not None:
                         # case 2: an object in the target *is equal to* the object in the pointer (only check if pointer_fromequal)
@@ -284,7 +347,7 @@ def fromdatamore(value, fillables, generator=None, pointer_fromequal=False):
     _fromdata_initialize(generator, generator, fillables, pointers, pointerobjs_keys, targetids_keys, fillables_leaf_to_root, positions_to_pointerobjs)
 
     pointerat = {}
-    targetids = dict((x, {}) for x in targetids_keys)
+    targetids = dict((x, _TargetIds()) for x in targetids_keys)
     pointerobjs = dict((x, []) for x in pointerobjs_keys)
 
     if _fromdata_forefront(generator, fillables, pointerobjs) != 0 and not isinstance(generator, oamap.generator.ListGenerator):
@@ -316,7 +379,7 @@ def fromiterdata(values, generator=None, limit=lambda entries, arrayitems, array
     _fromdata_initialize(generator, generator, fillables, pointers, pointerobjs_keys, targetids_keys, fillables_leaf_to_root, positions_to_pointerobjs)
 
     pointerat = {}
-    targetids = dict((x, {}) for x in targetids_keys)
+    targetids = dict((x, _TargetIds()) for x in targetids_keys)
     pointerobjs = dict((x, []) for x in pointerobjs_keys)
 
     start = stop = _fromdata_forefront(generator.content, fillables, pointerobjs)
@@ -343,8 +406,8 @@ def fromiterdata(values, generator=None, limit=lambda entries, arrayitems, array
             # yield a new limit of arrays
             yield stop - start, toarrays(fillables)
 
-            # and make a new set of fillables (along with everything that depends on it)
-            fillables = oamap.fillable.arrays(generator)
+            # and make a new set of fillables (along with everything that depends on it), presized like the last partition
+            fillables = oamap.fillable.arrays(generator, capacity=dict((n, len(x)) for n, x in fillables.items()))
 
             pointers = []
             pointerobjs_keys = []
@@ -355,7 +418,7 @@ def fromiterdata(values, generator=None, limit=lambda entries, arrayitems, array
             _fromdata_initialize(generator, generator, fillables, pointers, pointerobjs_keys, targetids_keys, fillables_leaf_to_root, positions_to_pointerobjs)
 
             pointerat = {}
-            targetids = dict((x, {}) for x in targetids_keys)
+            targetids = dict((x, _TargetIds()) for x in targetids_keys)
             pointerobjs = dict((x, []) for x in pointerobjs_keys)
 
             start = stop = _fromdata_forefront(generator.content, fillables, pointerobjs)
@@ -377,3 +440,460 @@ def fromiterdata(values, generator=None, limit=lambda entries, arrayitems, array
     fillables[generator.stops].append(stop)
     _fromdata_finish(fillables, pointers, pointerobjs, targetids, pointerat, pointer_fromequal, fillables_leaf_to_root)
     yield (stop - start), toarrays(fillables)
+
+_misfit = object()
+
+def _fitted(value, schema):
+    # "value in schema" in one walk, but also rejecting dict keys that are not Record fields (they would be lost in
+    # filling) and making missing keys of nullable fields explicit Nones (adaptive filling only); _misfit if it does not fit
+    if value is None:
+        return value if value in schema else _misfit
+
+    elif isinstance(schema, oamap.schema.Record):
+        if isinstance(value, dict):
+            if any(n not in schema.fields for n in value):
+                return _misfit
+            out = value
+            for n, x in schema.fields.items():
+                item = value.get(n, None)
+                fitted = _fitted(item, x)
+                if fitted is _misfit:
+                    return _misfit
+                if fitted is not item or n not in value:
+                    if out is value:
+                        out = dict(value)
+                    out[n] = fitted
+            return out
+        elif isinstance(value, tuple) and hasattr(value, "_fields"):
+            if any(n not in schema.fields for n in value._fields) or any(n not in value._fields for n in schema.fields):
+                return _misfit
+            replacements = {}
+            for n, x in schema.fields.items():
+                item = getattr(value, n)
+                fitted = _fitted(item, x)
+                if fitted is _misfit:
+                    return _misfit
+                if fitted is not item:
+                    replacements[n] = fitted
+            return value._replace(**replacements) if len(replacements) > 0 else value
+
+    elif isinstance(schema, oamap.schema.List) and not isinstance(schema.content, oamap.schema.Primitive):
+        try:
+            items = list(value)
+        except TypeError:
+            return _misfit
+        out = [_fitted(x, schema.content) for x in items]
+        if any(x is _misfit for x in out):
+            return _misfit
+        return value if all(x is y for x, y in zip(out, items)) else out
+
+    elif isinstance(schema, oamap.schema.Tuple):
+        if not isinstance(value, tuple) or len(value) != len(schema.types):
+            return _misfit
+        out = tuple(_fitted(x, t) for x, t in zip(value, schema.types))
+        if any(x is _misfit for x in out):
+            return _misfit
+        return value if all(x is y for x, y in zip(out, value)) else out
+
+    elif isinstance(schema, oamap.schema.Union):
+        for x in schema.possibilities:
+            fitted = _fitted(value, x)
+            if fitted is not _misfit:
+                return fitted
+        return _misfit
+
+    return value if value in schema else _misfit
+
+def _fitting(stream, schema, misfits):
+    for value in stream:
+        fitted = _fitted(value, schema.content)
+        if fitted is _misfit:
+            misfits.append(value)
+            return
+        yield fitted
+
+# placeholder for types that have not been seen yet (only None values or empty lists); any real value widens it
+_unknown = oamap.schema.Primitive(numpy.uint8)
+
+def fromiterdataadaptive(values, prefix=1000, limit=lambda entries, arrayitems, arraybytes: False, pointer_fromequal=False):
+    # infer a schema from the first values, then widen it whenever a value does not fit, starting a new partition;
+    # records that gain or lose fields are widened to one record with nullable fields, rather than a union of records
+    values = iter(values)
+    head = list(itertools.islice(values, prefix))
+    content = oamap.inference._unify([oamap.inference._buildintermediate(x, None, set()) for x in head], mergerecords=True)
+    schema = oamap.schema.List(content.resolve(_unknown))
+
+    stream = itertools.chain(head, values)
+    while True:
+        misfits = []
+        generator = schema.generator()
+        for numentries, arrays in fromiterdata(_fitting(stream, schema, misfits), generator=generator, limit=limit, pointer_fromequal=pointer_fromequal):
+            if numentries > 0:
+                yield generator, numentries, arrays
+
+        if len(misfits) == 0:
+            break
+
+        value = misfits[0]
+        content = oamap.inference._unify2(content, oamap.inference._buildintermediate(value, None, set()), mergerecords=True)
+        schema = oamap.schema.List(content.resolve(_unknown))
+        if _fitted(value, schema.content) is _misfit:
+            raise TypeError("could not widen schema to include {0}".format(repr(value)))
+
+        stream = itertools.chain([value], stream)
+
+################################################################ shards filled in parallel processes
+
+def _fromdata_shard(args):
+    generator, values, pointer_fromequal = args
+    return len(values), fromdata(values, generator, pointer_fromequal=pointer_fromequal)
+
+def fromdataparallel(partitions, generator, processes=None, pointer_fromequal=False):
+    import multiprocessing
+
+    if not isinstance(generator, oamap.generator.Generator):
+        generator = generator.generator()
+    if not isinstance(generator, oamap.generator.ListGenerator):
+        raise TypeError("non-Lists cannot be filled in parallel")
+
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+
+    # each partition is filled independently, so objects referenced by Pointers from more than one partition are copied into each partition's target
+    tasks = [(generator, x, pointer_fromequal) for x in partitions]
+    if processes == 1 or len(tasks) <= 1:
+        return [_fromdata_shard(x) for x in tasks]
+    else:
+        pool = multiprocessing.Pool(processes)
+        try:
+            return pool.map(_fromdata_shard, tasks)
+        finally:
+            pool.close()
+            pool.join()
+
+def fromdatasharded(values, generator, numshards=None, processes=None, merge=False, pointer_fromequal=False):
+    import multiprocessing
+
+    if not isinstance(generator, oamap.generator.Generator):
+        generator = generator.generator()
+    if numshards is None:
+        numshards = multiprocessing.cpu_count() if processes is None else processes
+
+    shardsize = max(1, int(math.ceil(float(len(values)) / numshards)))
+    shards = fromdataparallel([values[i : i + shardsize] for i in range(0, max(1, len(values)), shardsize)], generator, processes=processes, pointer_fromequal=pointer_fromequal)
+
+    if merge:
+        return mergeshards(generator, shards)
+    else:
+        return shards
+
+def _mergeshards_length(gen, arrays, secondary=False):
+    if not secondary and isinstance(gen, oamap.generator.Masked):
+        return len(arrays[gen.mask])
+
+    elif isinstance(gen, oamap.generator.PrimitiveGenerator):
+        return len(arrays[gen.data])
+
+    elif isinstance(gen, oamap.generator.ListGenerator):
+        return len(arrays[gen.starts])
+
+    elif isinstance(gen, oamap.generator.UnionGenerator):
+        return len(arrays[gen.tags])
+
+    elif isinstance(gen, oamap.generator.RecordGenerator):
+        for x in gen.fields.values():
+            return _mergeshards_length(x, arrays)
+
+    elif isinstance(gen, oamap.generator.TupleGenerator):
+        for x in gen.types:
+            return _mergeshards_length(x, arrays)
+
+    elif isinstance(gen, oamap.generator.PointerGenerator):
+        return len(arrays[gen.positions])
+
+    elif isinstance(gen, oamap.generator.ExtendedGenerator):
+        return _mergeshards_length(gen.generic, arrays)
+
+def _mergeshards_rebase(gen, shards, out, memo):
+    if id(gen) in memo:
+        return
+    memo.add(id(gen))
+
+    def rebased(name, target, select=None):
+        pieces = []
+        base = 0
+        for numentries, arrays in shards:
+            array = numpy.array(arrays[name])
+            if select is None:
+                selected = numpy.ones(len(array), dtype=numpy.bool_)
+            else:
+                selected = select(arrays)
+            array[selected] += base
+            base += target(arrays)
+            pieces.append(array)
+        return numpy.concatenate(pieces)
+
+    if isinstance(gen, oamap.generator.Masked):
+        out[gen.mask] = rebased(gen.mask, lambda arrays: _mergeshards_length(gen, arrays, secondary=True), lambda arrays: numpy.asarray(arrays[gen.mask]) != gen.maskedvalue)
+
+    if isinstance(gen, oamap.generator.PrimitiveGenerator):
+        out[gen.data] = numpy.concatenate([arrays[gen.data] for numentries, arrays in shards])
+
+    elif isinstance(gen, oamap.generator.ListGenerator):
+        out[gen.starts] = rebased(gen.starts, lambda arrays: _mergeshards_length(gen.content, arrays))
+        out[gen.stops] = rebased(gen.stops, lambda arrays: _mergeshards_length(gen.content, arrays))
+        _mergeshards_rebase(gen.content, shards, out, memo)
+
+    elif isinstance(gen, oamap.generator.UnionGenerator):
+        out[gen.tags] = numpy.concatenate([arrays[gen.tags] for numentries, arrays in shards])
+        offsets = [numpy.array(arrays[gen.offsets]) for numentries, arrays in shards]
+        for tag, possibility in enumerate(gen.possibilities):
+            base = 0
+            for (numentries, arrays), array in zip(shards, offsets):
+                array[numpy.asarray(arrays[gen.tags]) == tag] += base
+                base += _mergeshards_length(possibility, arrays)
+            _mergeshards_rebase(possibility, shards, out, memo)
+        out[gen.offsets] = numpy.concatenate(offsets)
+
+    elif isinstance(gen, oamap.generator.RecordGenerator):
+        for x in gen.fields.values():
+            _mergeshards_rebase(x, shards, out, memo)
+
+    elif isinstance(gen, oamap.generator.TupleGenerator):
+        for x in gen.types:
+            _mergeshards_rebase(x, shards, out, memo)
+
+    elif isinstance(gen, oamap.generator.PointerGenerator):
+        out[gen.positions] = rebased(gen.positions, lambda arrays: _mergeshards_length(gen.target, arrays))
+        _mergeshards_rebase(gen.target, shards, out, memo)
+
+    elif isinstance(gen, oamap.generator.ExtendedGenerator):
+        _mergeshards_rebase(gen.generic, shards, out, memo)
+
+def mergeshards(generator, shards):
+    if not isinstance(generator, oamap.generator.Generator):
+        generator = generator.generator()
+    if not isinstance(generator, oamap.generator.ListGenerator) or isinstance(generator, oamap.generator.Masked):
+        raise TypeError("only non-nullable Lists can be merged")
+
+    out = {}
+    _mergeshards_rebase(generator.content, shards, out, set())
+    out[generator.starts] = numpy.array([0], dtype=generator.posdtype)
+    out[generator.stops] = numpy.array([sum(numentries for numentries, arrays in shards)], dtype=generator.posdtype)
+    return out
+
+################################################################ columnar data: Numpy structured arrays or {path: content or (content, [counts per list level])}
+
+def _fromcolumns_columns(columns):
+    out = {}
+    if isinstance(columns, numpy.ndarray):
+        def recurse(array, path):
+            if array.dtype.names is None:
+                out["/".join(path)] = (array, [])
+            else:
+                for n in array.dtype.names:
+                    recurse(array[n], path + [n])
+        recurse(columns, [])
+
+    else:
+        for n, x in columns.items():
+            if isinstance(x, tuple):
+                content, counts = x
+            else:
+                content, counts = x, []
+            out["/".join(y for y in n.split("/") if y != "")] = (content, [numpy.asarray(y) for y in counts])
+
+    return out
+
+def _fromcolumns_fill(gen, columns, path, depth, numentries, fillables):
+    if isinstance(gen, oamap.generator.ExtendedGenerator):
+        gen = gen.generic
+
+    name = "/".join(path)
+    if isinstance(gen, oamap.generator.Masked) and not isinstance(gen, oamap.generator.PrimitiveGenerator):
+        # only Primitives can be masked in columnar input (through numpy.ma); everything else is present
+        start = _fromdata_forefront(gen, fillables, {}, secondary=True)
+        fillables[gen.mask].extend(numpy.arange(start, start + numentries, dtype=gen.maskdtype))
+
+    if isinstance(gen, oamap.generator.PrimitiveGenerator):
+        if name not in columns:
+            raise ValueError("no column for {0}".format(repr(name)))
+        content, counts = columns[name]
+        if len(counts) != depth or len(content) != numentries:
+            raise ValueError("column {0} has {1} items in {2} list levels, but the schema expects {3} items in {4} list levels".format(repr(name), len(content), len(counts), numentries, depth))
+
+        if isinstance(gen, oamap.generator.Masked):
+            valid = ~numpy.ma.getmaskarray(content)
+            start = _fromdata_forefront(gen, fillables, {}, secondary=True)
+            mask = numpy.cumsum(valid, dtype=gen.maskdtype)
+            mask += start - 1
+            mask[~valid] = gen.maskedvalue
+            fillables[gen.mask].extend(mask)
+            fillables[gen.data].extend(numpy.ma.getdata(content)[valid])
+
+        elif isinstance(content, numpy.ma.MaskedArray) and numpy.ma.getmaskarray(content).any():
+            raise TypeError("cannot fill masked values of column {0} where expecting type {1}".format(repr(name), gen.schema))
+
+        else:
+            fillables[gen.data].extend(numpy.ma.getdata(content))
+
+    elif isinstance(gen, oamap.generator.ListGenerator):
+        counts = None
+        for n in sorted(columns):
+            content, x = columns[n]
+            if (path == [] or n == name or n.startswith(name + "/")) and len(x) > depth:
+                if counts is None:
+                    counts, first = x[depth], n
+                elif not numpy.array_equal(counts, x[depth]):
+                    raise ValueError("columns {0} and {1} disagree on the counts for the list at {2}".format(repr(first), repr(n), repr(name)))
+        if counts is None:
+            raise ValueError("no counts for the list at {0}".format(repr(name)))
+        if len(counts) != numentries:
+            raise ValueError("counts for the list at {0} have {1} items, but the schema expects {2}".format(repr(name), len(counts), numentries))
+
+        start = _fromdata_forefront(gen.content, fillables, {})
+        offsets = numpy.empty(len(counts) + 1, dtype=numpy.int64)
+        offsets[0] = start
+        numpy.cumsum(counts, out=offsets[1:])
+        offsets[1:] += start
+
+        fillables[gen.starts].extend(offsets[:-1])
+        fillables[gen.stops].extend(offsets[1:])
+        _fromcolumns_fill(gen.content, columns, path, depth + 1, offsets[-1] - start, fillables)
+
+    elif isinstance(gen, oamap.generator.RecordGenerator):
+        for n, x in gen.fields.items():
+            _fromcolumns_fill(x, columns, path + [n], depth, numentries, fillables)
+
+    elif isinstance(gen, oamap.generator.TupleGenerator):
+        for i, x in enumerate(gen.types):
+            _fromcolumns_fill(x, columns, path + [str(i)], depth, numentries, fillables)
+
+    else:
+        raise TypeError("cannot fill {0} from columns".format(gen.schema))
+
+def fromcolumns(columns, generator):
+    if not isinstance(generator, oamap.generator.Generator):
+        generator = generator.generator()
+
+    return toarrays(fromcolumnsmore(columns, oamap.fillable.arrays(generator), generator))
+
+def fromcolumnsmore(columns, fillables, generator):
+    if not isinstance(generator, oamap.generator.Generator):
+        generator = generator.generator()
+    if not isinstance(generator, oamap.generator.ListGenerator) or isinstance(generator, oamap.generator.Masked):
+        raise TypeError("only non-nullable Lists can be filled from columns")
+
+    for node in generator.schema.nodes():
+        if isinstance(node, (oamap.schema.Pointer, oamap.schema.Union)):
+            raise TypeError("cannot fill {0} from columns".format(node))
+
+    columns = _fromcolumns_columns(columns)
+    if len(columns) == 0:
+        raise ValueError("no columns")
+    content, counts = columns[sorted(columns)[0]]
+    if len(counts) == 0:
+        numentries = len(content)
+    else:
+        numentries = len(counts[0])
+
+    for fillable in fillables.values():
+        fillable.revert()
+
+    start = _fromdata_forefront(generator.content, fillables, {})
+    _fromcolumns_fill(generator.content, columns, [], 0, numentries, fillables)
+    fillables[generator.starts].append(start)
+    fillables[generator.stops].append(start + numentries)
+
+    for fillable in fillables.values():
+        fillable.update()
+
+    return fillables
+
+################################################################ JSON files, parsed one entry at a time
+
+# the rest of the buffer is one unfinished token (a number, literal, or escape cut at the block boundary)
+_iterjson_partial = re.compile(r"[^\s,:\[\]{}\"]*\Z")
+
+def _iterjson(file, lines, blocksize=1048576):
+    # yields the items of a top-level JSON array (lines=False) or a sequence of JSON values (lines=True, e.g. JSON-lines) without holding the whole file
+    decoder = json.JSONDecoder()
+    textdecoder = codecs.getincrementaldecoder("utf-8")()
+    state = {"buffer": "", "index": 0, "eof": False}
+
+    def readmore():
+        # read at least as much as is pending, so that entries larger than a block are not reparsed quadratically
+        chunk = file.read(max(blocksize, len(state["buffer"]) - state["index"]))
+        if isinstance(chunk, bytes) and not isinstance(chunk, str):
+            chunk = textdecoder.decode(chunk, final=(len(chunk) == 0))
+        if len(chunk) == 0:
+            state["eof"] = True
+        state["buffer"] = state["buffer"][state["index"]:] + chunk
+        state["index"] = 0
+
+    # array mode: "open" -> "first" -> ("value" <-> "separator") -> "end"; lines mode stays in "lines"
+    expect = "lines" if lines else "open"
+    while True:
+        buffer, index = state["buffer"], state["index"]
+        while index < len(buffer) and buffer[index] in " \t\n\r":
+            index += 1
+        state["index"] = index
+
+        if index == len(buffer):
+            if state["eof"]:
+                if expect in ("first", "value", "separator"):
+                    raise ValueError("JSON array is not terminated")
+                return
+            readmore()
+
+        elif expect == "open":
+            if buffer[index] != "[":
+                raise ValueError("JSON file does not begin with a top-level array; use lines=True for a sequence of JSON values")
+            expect = "first"
+            state["index"] = index + 1
+
+        elif expect == "end":
+            raise ValueError("unexpected {0} after the top-level JSON array".format(repr(buffer[index:index + 20])))
+
+        elif expect == "separator":
+            if buffer[index] == ",":
+                expect = "value"
+            elif buffer[index] == "]":
+                expect = "end"
+            else:
+                raise ValueError("expected ',' or ']' between JSON array items, not {0}".format(repr(buffer[index:index + 20])))
+            state["index"] = index + 1
+
+        elif expect == "first" and buffer[index] == "]":
+            expect = "end"
+            state["index"] = index + 1
+
+        else:
+            try:
+                obj, end = decoder.raw_decode(buffer, index)
+            except ValueError as err:
+                # only an error that the next block could resolve is retried; anything else fails without reading the rest of the file
+                pos = getattr(err, "pos", None)
+                if state["eof"] or pos is None or not (err.args[0].startswith("Unterminated string") or _iterjson_partial.match(buffer, pos) is not None):
+                    raise
+                readmore()
+            else:
+                if not state["eof"] and _iterjson_partial.match(buffer, end) is not None:
+                    # a number (or anything else) might continue in the next block
+                    readmore()
+                else:
+                    state["index"] = end
+                    expect = "lines" if lines else "separator"
+                    yield obj
+
+def fromjsonfile(file, generator, lines=False, limit=lambda entries, arrayitems, arraybytes: False, pointer_fromequal=False, blocksize=1048576):
+    if not isinstance(generator, oamap.generator.Generator):
+        generator = generator.generator()
+
+    if hasattr(file, "read"):
+        for out in fromiterdata(_iterjson(file, lines, blocksize), generator=generator, limit=limit, pointer_fromequal=pointer_fromequal):
+            yield out
+    else:
+        with open(file, "rb") as f:
+            for out in fromiterdata(_iterjson(f, lines, blocksize), generator=generator, limit=limit, pointer_fromequal=pointer_fromequal):
+                yield out
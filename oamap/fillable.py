@@ -120,11 +120,17 @@ def _makefillables(generator, fillables, makefillable):
     else:
         raise AssertionError("unrecognized generator type: {0}".format(generator))
 
-def arrays(generator, chunksize=8192):
+def arrays(generator, chunksize=None, capacity=8192):
     if not isinstance(generator, oamap.generator.Generator):
         generator = generator.generator()
     fillables = {}
-    _makefillables(generator, fillables, lambda name, dtype: FillableArray(dtype, chunksize=chunksize))
+    if chunksize is not None:
+        _makefillables(generator, fillables, lambda name, dtype: FillableArray(dtype, chunksize=chunksize))
+    elif isinstance(capacity, dict):
+        # capacity hints per array name, such as the lengths of a previous partition
+        _makefillables(generator, fillables, lambda name, dtype: FillableBuffer(dtype, capacity=capacity.get(name, 8192)))
+    else:
+        _makefillables(generator, fillables, lambda name, dtype: FillableBuffer(dtype, capacity=capacity))
     return fillables
 
 def files(generator, directory, chunksize=8192, lendigits=16):
@@ -136,6 +142,24 @@ def files(generator, directory, chunksize=8192, lendigits=16):
     _makefillables(generator, fillables, lambda name, dtype: FillableFile(os.path.join(directory, name), dtype, chunksize=chunksize, lendigits=lendigits))
     return fillables
 
+def memmaps(generator, directory, capacity=8192, lendigits=16):
+    if not isinstance(generator, oamap.generator.Generator):
+        generator = generator.generator()
+    if not os.path.exists(directory):
+        os.mkdir(directory)
+    fillables = {}
+    _makefillables(generator, fillables, lambda name, dtype: FillableMemmap(os.path.join(directory, name), dtype, capacity=capacity, lendigits=lendigits))
+    return fillables
+
+def numpymemmaps(generator, directory, capacity=8192, lendigits=16):
+    if not isinstance(generator, oamap.generator.Generator):
+        generator = generator.generator()
+    if not os.path.exists(directory):
+        os.mkdir(directory)
+    fillables = {}
+    _makefillables(generator, fillables, lambda name, dtype: FillableNumpyMemmap(os.path.join(directory, name), dtype, capacity=capacity, lendigits=lendigits))
+    return fillables
+
 def numpyfiles(generator, directory, chunksize=8192, lendigits=16):
     if not isinstance(generator, oamap.generator.Generator):
         generator = generator.generator()
@@ -285,6 +309,57 @@ class FillableArray(Fillable):
             chunkindex, indexinchunk = divmod(index, self.chunksize)
             return self._data[chunkindex][indexinchunk]
 
+################################################################ FillableBuffer
+
+class FillableBuffer(Fillable):
+    # one contiguous array that grows geometrically, so that appending is amortized O(1) and reading is a view, not a copy
+    def __init__(self, dtype, capacity=8192, growth=2.0):
+        if not isinstance(dtype, numpy.dtype):
+            dtype = numpy.dtype(dtype)
+        if growth <= 1:
+            raise ValueError("growth factor must be greater than 1")
+        self._data = numpy.empty(max(1, capacity), dtype=dtype)
+        self._len = 0
+        self._forefront = 0
+        self._growth = growth
+
+    @property
+    def dtype(self):
+        return self._data.dtype
+
+    @property
+    def capacity(self):
+        return self._data.shape[0]
+
+    def forefront(self):
+        return self._forefront
+
+    def update(self):
+        self._len = self._forefront
+
+    def revert(self):
+        self._forefront = self._len
+
+    def _reserve(self, size):
+        if size > len(self._data):
+            data = numpy.empty(max(size, int(math.ceil(len(self._data) * self._growth))), dtype=self.dtype)
+            data[:self._forefront] = self._data[:self._forefront]
+            self._data = data
+
+    def append(self, value):
+        if self._forefront >= len(self._data):
+            self._reserve(self._forefront + 1)
+        self._data[self._forefront] = value
+        self._forefront += 1
+
+    def extend(self, values):
+        self._reserve(self._forefront + len(values))
+        self._data[self._forefront : self._forefront + len(values)] = values
+        self._forefront += len(values)
+
+    def __getitem__(self, index):
+        return self._data[:self._len][index]
+
 ################################################################ FillableFile
 
 class FillableFile(Fillable):
@@ -408,29 +483,111 @@ class FillableFile(Fillable):
 
 ################################################################ FillableNumpyFile (FillableFile with a self-describing header)
 
+def _writenumpyheader(file, dtype, length, lendigits):
+    # the length is written with a fixed number of digits so that it can be overwritten in place; returns (lenpos, datapos)
+    magic = b"\x93NUMPY\x01\x00"
+    header1 = "{{'descr': {0}, 'fortran_order': False, 'shape': (".format(repr(str(dtype))).encode("ascii")
+    header2 = "{0}, }}".format(repr((10**lendigits - 1,))).encode("ascii")[1:]
+
+    unpaddedlen = len(magic) + 2 + len(header1) + len(header2)
+    paddedlen = int(math.ceil(float(unpaddedlen) / dtype.itemsize)) * dtype.itemsize
+    header2 = header2 + b" " * (paddedlen - unpaddedlen)
+    lenpos = len(magic) + 2 + len(header1)
+    datapos = len(magic) + 2 + len(header1) + len(header2)
+    assert datapos % dtype.itemsize == 0
+
+    file.write(magic)
+    file.write(struct.pack("<H", len(header1) + len(header2)))
+    file.write(header1)
+    file.write(("{0:%dd}" % lendigits).format(length).encode("ascii"))
+    file.write(header2[lendigits:])
+    return lenpos, datapos
+
 class FillableNumpyFile(FillableFile):
     def _openfile(self, filename, lendigits):
-        magic = b"\x93NUMPY\x01\x00"
-        header1 = "{{'descr': {0}, 'fortran_order': False, 'shape': (".format(repr(str(self.dtype))).encode("ascii")
-        header2 = "{0}, }}".format(repr((10**lendigits - 1,))).encode("ascii")[1:]
-
-        unpaddedlen = len(magic) + 2 + len(header1) + len(header2)
-        paddedlen = int(math.ceil(float(unpaddedlen) / self.dtype.itemsize)) * self.dtype.itemsize
-        header2 = header2 + b" " * (paddedlen - unpaddedlen)
-        self._lenpos = len(magic) + 2 + len(header1)
-        self._datapos = len(magic) + 2 + len(header1) + len(header2)
-        assert self._datapos % self.dtype.itemsize == 0
-
         open(filename, "wb", 0).close()
         self._file = open(filename, "r+b", 0)
         self._formatter = "{0:%dd}" % lendigits
-        self._file.write(magic)
-        self._file.write(struct.pack("<H", len(header1) + len(header2)))
-        self._file.write(header1)
-        self._file.write(self._formatter.format(len(self)).encode("ascii"))
-        self._file.write(header2[lendigits:])
+        self._lenpos, self._datapos = _writenumpyheader(self._file, self.dtype, len(self), lendigits)
 
     def _flush(self):
         super(FillableNumpyFile, self)._flush()
         self._file.seek(self._lenpos)
         self._file.write(self._formatter.format(len(self)).encode("ascii"))
+
+################################################################ FillableMemmap (FillableBuffer backed by a memory-mapped file)
+
+class FillableMemmap(FillableBuffer):
+    def __init__(self, filename, dtype, capacity=8192, growth=2.0, lendigits=16):
+        if not isinstance(dtype, numpy.dtype):
+            dtype = numpy.dtype(dtype)
+        if growth <= 1:
+            raise ValueError("growth factor must be greater than 1")
+        self._len = 0
+        self._forefront = 0
+        self._growth = growth
+        self._filename = filename
+        self._closed = False
+        self._openfile(filename, dtype, lendigits)
+        self._map(dtype, max(1, capacity))
+
+    def _openfile(self, filename, dtype, lendigits):
+        open(filename, "wb").close()
+        self._datapos = 0
+        # a plain file has no header
+
+    def _map(self, dtype, capacity):
+        # extending the file with truncate leaves a hole (sparse file) on filesystems that support it
+        with open(self._filename, "r+b") as file:
+            file.truncate(self._datapos + capacity*dtype.itemsize)
+        self._data = numpy.memmap(self._filename, dtype, "r+", self._datapos, (capacity,), "C")
+
+    @property
+    def filename(self):
+        return self._filename
+
+    def _reserve(self, size):
+        if size > len(self._data):
+            if self._closed:
+                raise IOError("cannot fill a closed file: {0}".format(repr(self._filename)))
+            dtype = self.dtype
+            self._data.flush()
+            self._map(dtype, max(size, int(math.ceil(len(self._data) * self._growth))))
+
+    def _finish(self, file):
+        pass
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            dtype = self.dtype
+            self._data.flush()
+            self._data = None
+            with open(self._filename, "r+b") as file:
+                file.truncate(self._datapos + self._len*dtype.itemsize)
+                self._finish(file)
+            self._forefront = self._len
+            if self._len == 0:
+                self._data = numpy.empty(0, dtype=dtype)
+            else:
+                self._data = numpy.memmap(self._filename, dtype, "r", self._datapos, (self._len,), "C")
+
+    def __del__(self):
+        if hasattr(self, "_data"):
+            self.close()
+
+    def __enter__(self, *args, **kwds):
+        return self
+
+    def __exit__(self, *args, **kwds):
+        self.close()
+
+class FillableNumpyMemmap(FillableMemmap):
+    def _openfile(self, filename, dtype, lendigits):
+        with open(filename, "wb") as file:
+            self._lenpos, self._datapos = _writenumpyheader(file, dtype, 0, lendigits)
+        self._formatter = "{0:%dd}" % lendigits
+
+    def _finish(self, file):
+        file.seek(self._lenpos)
+        file.write(self._formatter.format(self._len).encode("ascii"))
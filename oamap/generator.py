@@ -30,7 +30,10 @@
 
 import sys
 import datetime
+import hashlib
+import json
 import os
+import weakref
 
 import numpy
 
@@ -131,6 +134,56 @@ class Generator(object):
         self.id = self.nextid()
         self._required = False
 
+    def _clone(self, memo=None):
+        # a new generator sharing this one's structure, schema, and fingerprint, but with its own ids and requirements
+        if memo is None:
+            memo = {}
+        if id(self) not in memo:
+            out = self.__class__.__new__(self.__class__)
+            out.__dict__.update(self.__dict__)
+            out.__dict__.pop("_lastcompiled", None)
+            out.id = out.nextid()
+            out._required = False
+            memo[id(self)] = out
+        return memo[id(self)]
+
+    # compiled code is shared by all generators with the same fingerprint, so the arrays it needs are, too;
+    # {fingerprint: {id: weakref}} of the generators held by compiled types, forgotten when those types are
+    _compiledrequired = {}
+    _compiledversion = 0
+
+    @staticmethod
+    def _requirecompiled(generator):
+        fingerprint = generator.fingerprint
+        refs = Generator._compiledrequired.get(fingerprint)
+        if refs is None:
+            refs = Generator._compiledrequired[fingerprint] = {}
+            Generator._compiledversion += 1
+        if id(generator) not in refs:
+            refs[id(generator)] = weakref.ref(generator, lambda ref: Generator._unrequirecompiled(fingerprint, ref))
+
+    @staticmethod
+    def _unrequirecompiled(fingerprint, ref):
+        refs = Generator._compiledrequired.get(fingerprint)
+        if refs is not None:
+            for key, value in list(refs.items()):
+                if value is ref:
+                    del refs[key]
+            if len(refs) == 0:
+                del Generator._compiledrequired[fingerprint]
+
+    @property
+    def fingerprint(self):
+        if getattr(self, "_fingerprint", None) is None:
+            packing = None if self.packing is None else self.packing.tojson()
+            names = sorted(json.dumps(x) for x in self.iternames(namespace=True, idx=True))
+            self._fingerprint = hashlib.sha1(json.dumps([self.__class__.__name__, self.schema.fingerprint, packing, names]).encode("utf-8")).hexdigest()
+        return self._fingerprint
+
+    def _isrequired(self):
+        # the fingerprint is only computed when something has been compiled, which keeps it off the pure-Python path
+        return self._required or (len(Generator._compiledrequired) > 0 and self.fingerprint in Generator._compiledrequired)
+
     def fromdata(self, value, pointer_fromequal=False):
         import oamap.fill
         return self(oamap.fill.fromdata(value, generator=self, pointer_fromequal=pointer_fromequal))
@@ -174,6 +227,14 @@ class Generator(object):
             cache[i] = None
 
     def _entercompiled(self, arrays, cache, bottomup=True):
+        # reuse the pointer tables while the cache contents and the compiled requirements are unchanged; the contents
+        # are held by weak references so that a finished partition's arrays are not kept alive by this slot
+        last = getattr(self, "_lastcompiled", None)
+        if last is not None:
+            lastcontents, lastversion, out = last
+            if lastversion == Generator._compiledversion and len(lastcontents) == len(cache) and all((x is None and y is None) or (x is not None and x() is y) for x, y in zip(lastcontents, cache)):
+                return out
+
         roles = self._togetall(arrays, cache, bottomup, set())
         self._getarrays(arrays, cache, roles, require_arrays=True)
 
@@ -184,7 +245,17 @@ class Generator(object):
                 ptrs[i] = x.ctypes.data
                 lens[i] = x.shape[0]
 
-        return ptrs, lens, ptrs.ctypes.data, lens.ctypes.data
+        out = ptrs, lens, ptrs.ctypes.data, lens.ctypes.data
+        try:
+            self._lastcompiled = (tuple(None if x is None else weakref.ref(x) for x in cache), Generator._compiledversion, out)
+        except TypeError:
+            self._lastcompiled = None
+        return out
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state.pop("_lastcompiled", None)
+        return state
 
     def names(self, namespace=False, idx=False):
         return list(self.iternames(namespace=namespace, idx=idx))
@@ -224,7 +295,7 @@ class Masked(object):
         if key not in memo:
             memo.add(key)
             out = self.__class__.__bases__[1]._togetall(self, arrays, cache, bottomup, memo)
-            if self._required and cache[self.maskidx] is None:
+            if self._isrequired() and cache[self.maskidx] is None:
                 if bottomup:
                     out.update(self._toget(arrays, cache))
                 else:
@@ -282,7 +353,7 @@ class Masked(object):
         key = (id(self),)
         if key not in memo:
             memo.add(key)
-            if self._required:
+            if self._isrequired():
                 yield self.mask
             for x in self.__class__.__bases__[1].required(self, memo):
                 yield x
@@ -302,7 +373,7 @@ class PrimitiveGenerator(Generator):
     def _togetall(self, arrays, cache, bottomup, memo):
         if id(self) not in memo:
             memo.add(id(self))
-            if self._required and cache[self.dataidx] is None:
+            if self._isrequired() and cache[self.dataidx] is None:
                 return self._toget(arrays, cache)
         return OrderedDict()
 
@@ -344,7 +415,7 @@ class PrimitiveGenerator(Generator):
             memo = set()
         if id(self) not in memo:
             memo.add(id(self))
-            if self._required:
+            if self._isrequired():
                 yield self.data
 
     def _namedschema(self, memo):
@@ -388,6 +459,14 @@ class ListGenerator(Generator):
             super(ListGenerator, self)._new(memo)
             self.content._new(memo)
 
+    def _clone(self, memo=None):
+        if memo is None:
+            memo = {}
+        if id(self) not in memo:
+            out = super(ListGenerator, self)._clone(memo)
+            out.content = self.content._clone(memo)
+        return memo[id(self)]
+
     def _toget(self, arrays, cache):
         starts = StartsRole(self.starts, self.namespace, None)
         stops = StopsRole(self.stops, self.namespace, None)
@@ -399,7 +478,7 @@ class ListGenerator(Generator):
         if id(self) not in memo:
             memo.add(id(self))
             out = self.content._togetall(arrays, cache, bottomup, memo)
-            if self._required and (cache[self.startsidx] is None or cache[self.stopsidx] is None):
+            if self._isrequired() and (cache[self.startsidx] is None or cache[self.stopsidx] is None):
                 if bottomup:
                     out.update(self._toget(arrays, cache))
                 else:
@@ -479,7 +558,7 @@ class ListGenerator(Generator):
             memo = set()
         if id(self) not in memo:
             memo.add(id(self))
-            if self._required:
+            if self._isrequired():
                 yield self.starts
                 yield self.stops
             for x in self.content.required(memo):
@@ -529,6 +608,14 @@ class UnionGenerator(Generator):
             for x in self.possibilities:
                 x._new(memo)
 
+    def _clone(self, memo=None):
+        if memo is None:
+            memo = {}
+        if id(self) not in memo:
+            out = super(UnionGenerator, self)._clone(memo)
+            out.possibilities = [x._clone(memo) for x in self.possibilities]
+        return memo[id(self)]
+
     def _toget(self, arrays, cache):
         tags = TagsRole(self.tags, self.namespace, None)
         offsets = OffsetsRole(self.offsets, self.namespace, None)
@@ -542,7 +629,7 @@ class UnionGenerator(Generator):
             out = OrderedDict()
             for x in self.possibilities:
                 out.update(x._togetall(arrays, cache, bottomup, memo))
-            if self._required and (cache[self.tagsidx] is None or cache[self.offsetsidx] is None):
+            if self._isrequired() and (cache[self.tagsidx] is None or cache[self.offsetsidx] is None):
                 if bottomup:
                     out.update(self._toget(arrays, cache))
                 else:
@@ -616,7 +703,7 @@ class UnionGenerator(Generator):
             memo = set()
         if id(self) not in memo:
             memo.add(id(self))
-            if self._required:
+            if self._isrequired():
                 yield self.tags
                 yield self.offsets
             for possibility in self.possibilities:
@@ -664,6 +751,14 @@ class RecordGenerator(Generator):
             for x in self.fields.values():
                 x._new(memo)
 
+    def _clone(self, memo=None):
+        if memo is None:
+            memo = {}
+        if id(self) not in memo:
+            out = super(RecordGenerator, self)._clone(memo)
+            out.fields = OrderedDict((n, x._clone(memo)) for n, x in self.fields.items())
+        return memo[id(self)]
+
     def _toget(self, arrays, cache):
         return OrderedDict()
 
@@ -754,6 +849,14 @@ class TupleGenerator(Generator):
             for x in self.types:
                 x._new(memo)
 
+    def _clone(self, memo=None):
+        if memo is None:
+            memo = {}
+        if id(self) not in memo:
+            out = super(TupleGenerator, self)._clone(memo)
+            out.types = [x._clone(memo) for x in self.types]
+        return memo[id(self)]
+
     def _toget(self, arrays, cache):
         return OrderedDict()
 
@@ -846,6 +949,14 @@ class PointerGenerator(Generator):
             super(PointerGenerator, self)._new(memo)
             self.target._new(memo)
 
+    def _clone(self, memo=None):
+        if memo is None:
+            memo = {}
+        if id(self) not in memo:
+            out = super(PointerGenerator, self)._clone(memo)
+            out.target = self.target._clone(memo)
+        return memo[id(self)]
+
     def _toget(self, arrays, cache):
         return OrderedDict([(PositionsRole(self.positions, self.namespace), (self.positionsidx, self.posdtype))])
 
@@ -853,7 +964,7 @@ class PointerGenerator(Generator):
         if id(self) not in memo:
             memo.add(id(self))
             out = self.target._togetall(arrays, cache, bottomup, memo)
-            if self._required and cache[self.positionsidx] is None:
+            if self._isrequired() and cache[self.positionsidx] is None:
                 if bottomup:
                     out.update(self._toget(arrays, cache))
                 else:
@@ -913,7 +1024,7 @@ class PointerGenerator(Generator):
             memo = set()
         if id(self) not in memo:
             memo.add(id(self))
-            if self._required:
+            if self._isrequired():
                 yield self.positions
             for x in self.target.required(memo):
                 yield x
@@ -968,6 +1079,14 @@ class ExtendedGenerator(Generator):
             super(ExtendedGenerator, self)._new(memo)
             self.generic._new(memo)
 
+    def _clone(self, memo=None):
+        if memo is None:
+            memo = {}
+        if id(self) not in memo:
+            out = super(ExtendedGenerator, self)._clone(memo)
+            out.generic = self.generic._clone(memo)
+        return memo[id(self)]
+
     def _toget(self, arrays, cache):
         return self.generic._toget(arrays, cache)
 
@@ -1064,4 +1183,16 @@ class ExtendedGenerator(Generator):
                 else:
                     assert pattern["type"] in ("primitive", "list", "union", "record", "tuple", "pointer")
 
-        return recurse(cls.pattern, schema.tojson(explicit=True))
+        # reject on the top-level type and name before serializing the whole schema, which dominates building large generators
+        pattern = cls.pattern
+        if isinstance(pattern, basestring):
+            if not isinstance(schema, oamap.schema.Primitive):
+                return False
+        else:
+            toplevel = {"primitive": oamap.schema.Primitive, "list": oamap.schema.List, "union": oamap.schema.Union, "record": oamap.schema.Record, "tuple": oamap.schema.Tuple, "pointer": oamap.schema.Pointer}.get(pattern["type"])
+            if toplevel is not None and not isinstance(schema, toplevel):
+                return False
+            if "name" in pattern and pattern["name"] != schema.name:
+                return False
+
+        return recurse(pattern, schema.tojson(explicit=True))
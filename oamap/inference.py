@@ -28,6 +28,7 @@
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+import bisect
 import re
 import numbers
 import sys
@@ -43,261 +44,371 @@ if sys.version_info[0] > 2:
 
 ################################################################ inferring schemas from data
 
-def fromdata(obj, limit=None):
-    if limit is None or (isinstance(limit, (numbers.Integral, numpy.integer)) and limit >= 0):
-        pass
-    else:
-        raise TypeError("limit must be None or a non-negative integer, not {0}".format(limit))
-
-    class Intermediate(object):
-        def __init__(self, nullable):
-            self.nullable = nullable
+class Intermediate(object):
+    def __init__(self, nullable):
+        self.nullable = nullable
 
-    class Unknown(Intermediate):
-        def resolve(self):
+class Unknown(Intermediate):
+    def resolve(self, unknown=None):
+        if unknown is None:
             raise TypeError("could not resolve a type (e.g. all examples of a List-typed attribute are empty, can't determine its content type)")
+        out = unknown.deepcopy()
+        out.nullable = self.nullable
+        return out
 
-    class Boolean(Intermediate):
-        def resolve(self):
-            return oamap.schema.Primitive(numpy.dtype(numpy.bool_), nullable=self.nullable)
-
-    class Number(Intermediate):
-        max_uint8 = numpy.iinfo(numpy.uint8).max
-        max_uint16 = numpy.iinfo(numpy.uint16).max
-        max_uint32 = numpy.iinfo(numpy.uint32).max
-        max_uint64 = numpy.iinfo(numpy.uint64).max
-        min_int8 = numpy.iinfo(numpy.int8).min
-        max_int8 = numpy.iinfo(numpy.int8).max
-        min_int16 = numpy.iinfo(numpy.int16).min
-        max_int16 = numpy.iinfo(numpy.int16).max
-        min_int32 = numpy.iinfo(numpy.int32).min
-        max_int32 = numpy.iinfo(numpy.int32).max
-        min_int64 = numpy.iinfo(numpy.int64).min
-        max_int64 = numpy.iinfo(numpy.int64).max
-        def __init__(self, nullable, min, max, whole, real):
-            Intermediate.__init__(self, nullable)
-            self.min = min
-            self.max = max
-            self.whole = whole
-            self.real = real
-        def resolve(self):
-            if self.whole:
-                if self.min >= 0:
-                    if self.max <= self.max_uint8:
-                        t = numpy.uint8
-                    elif self.max <= self.max_uint16:
-                        t = numpy.uint16
-                    elif self.max <= self.max_uint32:
-                        t = numpy.uint32
-                    elif self.max <= self.max_uint64:
-                        t = numpy.uint64
-                    else:
-                        t = numpy.float64
+class Boolean(Intermediate):
+    def resolve(self, unknown=None):
+        return oamap.schema.Primitive(numpy.dtype(numpy.bool_), nullable=self.nullable)
+
+class Number(Intermediate):
+    max_uint8 = numpy.iinfo(numpy.uint8).max
+    max_uint16 = numpy.iinfo(numpy.uint16).max
+    max_uint32 = numpy.iinfo(numpy.uint32).max
+    max_uint64 = numpy.iinfo(numpy.uint64).max
+    min_int8 = numpy.iinfo(numpy.int8).min
+    max_int8 = numpy.iinfo(numpy.int8).max
+    min_int16 = numpy.iinfo(numpy.int16).min
+    max_int16 = numpy.iinfo(numpy.int16).max
+    min_int32 = numpy.iinfo(numpy.int32).min
+    max_int32 = numpy.iinfo(numpy.int32).max
+    min_int64 = numpy.iinfo(numpy.int64).min
+    max_int64 = numpy.iinfo(numpy.int64).max
+    def __init__(self, nullable, min, max, whole, real):
+        Intermediate.__init__(self, nullable)
+        self.min = min
+        self.max = max
+        self.whole = whole
+        self.real = real
+    def resolve(self, unknown=None):
+        if self.whole:
+            if self.min >= 0:
+                if self.max <= self.max_uint8:
+                    t = numpy.uint8
+                elif self.max <= self.max_uint16:
+                    t = numpy.uint16
+                elif self.max <= self.max_uint32:
+                    t = numpy.uint32
+                elif self.max <= self.max_uint64:
+                    t = numpy.uint64
                 else:
-                    if self.min_int8 <= self.min and self.max <= self.max_int8:
-                        t = numpy.int8
-                    elif self.min_int16 <= self.min and self.max <= self.max_int16:
-                        t = numpy.int16
-                    elif self.min_int32 <= self.min and self.max <= self.max_int32:
-                        t = numpy.int32
-                    elif self.min_int64 <= self.min and self.max <= self.max_int64:
-                        t = numpy.int64
-                    else:
-                        t = numpy.float64
-            elif self.real:
-                t = numpy.float64
+                    t = numpy.float64
             else:
-                t = numpy.complex128
-            return oamap.schema.Primitive(numpy.dtype(t), nullable=self.nullable)
-
-    class String(Intermediate):
-        def __init__(self, nullable, utf8):
-            Intermediate.__init__(self, nullable)
-            self.utf8 = utf8
-        def resolve(self):
-            return oamap.schema.List(oamap.schema.Primitive(numpy.uint8), nullable=self.nullable, name=("UTF8String" if self.utf8 else "ByteString"))
+                if self.min_int8 <= self.min and self.max <= self.max_int8:
+                    t = numpy.int8
+                elif self.min_int16 <= self.min and self.max <= self.max_int16:
+                    t = numpy.int16
+                elif self.min_int32 <= self.min and self.max <= self.max_int32:
+                    t = numpy.int32
+                elif self.min_int64 <= self.min and self.max <= self.max_int64:
+                    t = numpy.int64
+                else:
+                    t = numpy.float64
+        elif self.real:
+            t = numpy.float64
+        else:
+            t = numpy.complex128
+        return oamap.schema.Primitive(numpy.dtype(t), nullable=self.nullable)
+
+class String(Intermediate):
+    def __init__(self, nullable, utf8):
+        Intermediate.__init__(self, nullable)
+        self.utf8 = utf8
+    def resolve(self, unknown=None):
+        return oamap.schema.List(oamap.schema.Primitive(numpy.uint8), nullable=self.nullable, name=("UTF8String" if self.utf8 else "ByteString"))
+
+class IntermediateList(Intermediate):
+    def __init__(self, nullable, content):
+        Intermediate.__init__(self, nullable)
+        self.content = content
+    def resolve(self, unknown=None):
+        return oamap.schema.List(self.content.resolve(unknown), nullable=self.nullable)
+
+class IntermediateRecord(Intermediate):
+    def __init__(self, nullable, fields, name):
+        Intermediate.__init__(self, nullable)
+        self.fields = fields
+        self.name = name
+    def resolve(self, unknown=None):
+        return oamap.schema.Record(dict((n, x.resolve(unknown)) for n, x in self.fields.items()), nullable=self.nullable, name=self.name)
+
+class IntermediateTuple(Intermediate):
+    def __init__(self, nullable, types):
+        Intermediate.__init__(self, nullable)
+        self.types = types
+    def resolve(self, unknown=None):
+        return oamap.schema.Tuple([x.resolve(unknown) for x in self.types], nullable=self.nullable)
+
+# Unions are special for type-inference
+class IntermediateUnion(Intermediate):
+    def __init__(self, nullable, possibilities):
+        Intermediate.__init__(self, nullable)
+        self.possibilities = possibilities
+    def resolve(self, unknown=None):
+        return oamap.schema.Union([x.resolve(unknown) for x in self.possibilities], nullable=self.nullable)
+
+# no Pointers in type-inference (we'd have to keep a big map of *everything*!)
+
+def _flatten(possibilities):
+    return [y for x in possibilities if isinstance(x, IntermediateUnion) for y in x.possibilities] + [x for x in possibilities if not isinstance(x, IntermediateUnion)]
+
+def _unify2(x, y, mergerecords=False):
+    nullable = x.nullable or y.nullable
+
+    if isinstance(x, Unknown) and isinstance(y, Unknown):
+        return Unknown(nullable)
+
+    elif isinstance(x, Unknown):
+        y.nullable = nullable
+        return y
+
+    elif isinstance(y, Unknown):
+        x.nullable = nullable
+        return x
+
+    elif isinstance(x, Boolean) and isinstance(y, Boolean):
+        return Boolean(nullable)
+
+    elif isinstance(x, Number) and isinstance(y, Number):
+        return Number(nullable, min(x.min, y.min), max(x.max, y.max), x.whole and y.whole, x.real and y.real)
+
+    elif isinstance(x, String) and isinstance(y, String):
+        return String(nullable, x.utf8 or y.utf8)
+
+    elif isinstance(x, IntermediateList) and isinstance(y, IntermediateList):
+        return IntermediateList(nullable, _unify2(x.content, y.content, mergerecords))
+
+    elif isinstance(x, IntermediateRecord) and isinstance(y, IntermediateRecord) and (mergerecords or set(x.fields) == set(y.fields)) and (x.name is None or y.name is None or x.name == y.name):
+        # with mergerecords, fields that only one of the records has become nullable
+        fields = {}
+        for n in set(x.fields).union(y.fields):
+            if n in x.fields and n in y.fields:
+                fields[n] = _unify2(x.fields[n], y.fields[n], mergerecords)
+            else:
+                fields[n] = x.fields[n] if n in x.fields else y.fields[n]
+                fields[n].nullable = True
+        return IntermediateRecord(nullable, fields, name=(y.name if x.name is None else x.name))
 
-    class IntermediateList(Intermediate):
-        def __init__(self, nullable, content):
-            Intermediate.__init__(self, nullable)
-            self.content = content
-        def resolve(self):
-            return oamap.schema.List(self.content.resolve(), nullable=self.nullable)
+    elif isinstance(x, IntermediateTuple) and isinstance(y, IntermediateTuple) and len(x.types) == len(y.types):
+        return IntermediateTuple(nullable, [_unify2(xi, yi, mergerecords) for xi, yi in zip(x.types, y.types)])
 
-    class IntermediateRecord(Intermediate):
-        def __init__(self, nullable, fields, name):
-            Intermediate.__init__(self, nullable)
-            self.fields = fields
-            self.name = name
-        def resolve(self):
-            return oamap.schema.Record(dict((n, x.resolve()) for n, x in self.fields.items()), nullable=self.nullable, name=self.name)
+    elif isinstance(x, IntermediateUnion) and isinstance(y, IntermediateUnion):
+        return _unify(x.possibilities + y.possibilities, mergerecords)
 
-    class IntermediateTuple(Intermediate):
-        def __init__(self, nullable, types):
-            Intermediate.__init__(self, nullable)
-            self.types = types
-        def resolve(self):
-            return oamap.schema.Tuple([x.resolve() for x in self.types], nullable=self.nullable)
+    elif isinstance(x, IntermediateUnion):
+        return _unify(x.possibilities + [y], mergerecords)
 
-    # Unions are special for type-inference
-    class IntermediateUnion(Intermediate):
-        def __init__(self, nullable, possibilities):
-            Intermediate.__init__(self, nullable)
-            self.possibilities = possibilities
-        def resolve(self):
-            return oamap.schema.Union([x.resolve() for x in self.possibilities], nullable=self.nullable)
+    elif isinstance(y, IntermediateUnion):
+        return _unify([x] + y.possibilities, mergerecords)
 
-    # no Pointers in type-inference (we'd have to keep a big map of *everything*!)
+    else:
+        # can't be unified
+        return IntermediateUnion(nullable, _flatten([x, y]))
 
-    def flatten(possibilities):
-        return [y for x in possibilities if isinstance(x, IntermediateUnion) for y in x.possibilities] + [x for x in possibilities if not isinstance(x, IntermediateUnion)]
+def _unify(possibilities, mergerecords=False):
+    if len(possibilities) == 0:
+        return Unknown(False)
 
-    def unify2(x, y):
-        nullable = x.nullable or y.nullable
+    elif len(possibilities) == 1:
+        return possibilities[0]
 
-        if isinstance(x, Unknown) and isinstance(y, Unknown):
-            return Unknown(nullable)
+    elif len(possibilities) == 2:
+        return _unify2(possibilities[0], possibilities[1], mergerecords)
 
-        elif isinstance(x, Unknown):
-            y.nullable = nullable
-            return y
+    else:
+        distinct = []
+        for x in _flatten(possibilities):
+            found = False
+
+            for i, y in enumerate(distinct):
+                merged = _unify2(x, y, mergerecords)
+                if not isinstance(merged, IntermediateUnion):
+                    distinct[i] = merged
+                    found = True
+                    break
 
-        elif isinstance(y, Unknown):
-            x.nullable = nullable
-            return x
+            if not found:
+                distinct.append(x)
 
-        elif isinstance(x, Boolean) and isinstance(y, Boolean):
-            return Boolean(nullable)
+        if len(distinct) == 1:
+            return distinct[0]
+        else:
+            return IntermediateUnion(False, _flatten(distinct))
 
-        elif isinstance(x, Number) and isinstance(y, Number):
-            return Number(nullable, min(x.min, y.min), max(x.max, y.max), x.whole and y.whole, x.real and y.real)
+def _buildintermediate(obj, limit, memo):
+    if id(obj) in memo:
+        raise ValueError("cyclic reference in Python object at {0} (Pointer types cannot be inferred)".format(obj))
 
-        elif isinstance(x, String) and isinstance(y, String):
-            return String(nullable, x.utf8 or y.utf8)
+    # by copying, rather than modifying in-place (memo.add), we find cyclic references, rather than DAGs
+    memo = memo.union(set([id(obj)]))
 
-        elif isinstance(x, IntermediateList) and isinstance(y, IntermediateList):
-            return IntermediateList(nullable, unify2(x.content, y.content))
+    if obj is None:
+        return Unknown(True)
 
-        elif isinstance(x, IntermediateRecord) and isinstance(y, IntermediateRecord) and set(x.fields) == set(y.fields) and (x.name is None or y.name is None or x.name == y.name):
-            return IntermediateRecord(nullable, dict((n, unify2(x.fields[n], y.fields[n])) for n in x.fields), name=(y.name if x.name is None else x.name))
+    elif obj is False or obj is True:
+        return Boolean(False)
 
-        elif isinstance(x, IntermediateTuple) and isinstance(y, IntermediateTuple) and len(x.types) == len(y.types):
-            return IntermediateTuple(nullable, [unify2(xi, yi) for xi, yi in zip(x.types, y.types)])
+    elif isinstance(obj, (numbers.Integral, numpy.integer)):
+        return Number(False, int(obj), int(obj), True, True)
 
-        elif isinstance(x, IntermediateUnion) and isinstance(y, IntermediateUnion):
-            return unify(x.possibilities + y.possibilities)
+    elif isinstance(obj, (numbers.Real, numpy.floating)):
+        return Number(False, float(obj), float(obj), False, True)
 
-        elif isinstance(x, IntermediateUnion):
-            return unify(x.possibilities + [y])
+    elif isinstance(obj, (numbers.Complex, numpy.complex)):
+        return Number(False, float("-inf"), float("inf"), False, False)
 
-        elif isinstance(y, IntermediateUnion):
-            return unify([x] + y.possibilities)
+    elif isinstance(obj, bytes):
+        return String(False, False)
 
-        else:
-            # can't be unified
-            return IntermediateUnion(nullable, flatten([x, y]))
+    elif isinstance(obj, basestring):
+        return String(False, True)
 
-    def unify(possibilities):
-        if len(possibilities) == 0:
-            return Unknown(False)
+    elif isinstance(obj, dict):
+        return IntermediateRecord(False, dict((n, _buildintermediate(x, limit, memo)) for n, x in obj.items()), None)
 
-        elif len(possibilities) == 1:
-            return possibilities[0]
+    elif isinstance(obj, tuple) and hasattr(obj, "_fields"):
+        # this is a namedtuple; interpret it as a Record, rather than a Tuple
+        return IntermediateRecord(False, dict((n, _buildintermediate(getattr(obj, n), limit, memo)) for n in obj._fields), obj.__class__.__name__)
 
-        elif len(possibilities) == 2:
-            return unify2(possibilities[0], possibilities[1])
+    elif isinstance(obj, tuple):
+        return IntermediateTuple(False, [_buildintermediate(x, limit, memo) for x in obj])
 
+    else:
+        try:
+            limited = []
+            for x in obj:
+                if limit is None or len(limited) < limit:
+                    limited.append(x)
+                else:
+                    break
+        except TypeError:
+            # not iterable, so interpret it as a Record
+            return IntermediateRecord(False, dict((n, _buildintermediate(getattr(obj, n), limit, memo)) for n in dir(obj) if not n.startswith("_") and not callable(getattr(obj, n))), obj.__class__.__name__)
         else:
-            distinct = []
-            for x in flatten(possibilities):
-                found = False
-
-                for i, y in enumerate(distinct):
-                    merged = unify2(x, y)
-                    if not isinstance(merged, IntermediateUnion):
-                        distinct[i] = merged
-                        found = True
-                        break
-
-                if not found:
-                    distinct.append(x)
-
-            if len(distinct) == 1:
-                return distinct[0]
-            else:
-                return IntermediateUnion(False, flatten(distinct))
-
-    def buildintermediate(obj, limit, memo):
-        if id(obj) in memo:
-            raise ValueError("cyclic reference in Python object at {0} (Pointer types cannot be inferred)".format(obj))
-
-        # by copying, rather than modifying in-place (memo.add), we find cyclic references, rather than DAGs
-        memo = memo.union(set([id(obj)]))
-
-        if obj is None:
-            return Unknown(True)
-
-        elif obj is False or obj is True:
-            return Boolean(False)
+            # iterable, so interpret it as a List
+            return IntermediateList(False, _unify([_buildintermediate(x, None, memo) for x in limited]))
+
+def _islist(obj):
+    return not (obj is None or obj is False or obj is True or isinstance(obj, (numbers.Number, numpy.number, bytes, basestring, dict, tuple))) and hasattr(obj, "__iter__")
+
+def _strided(obj, limit, stride):
+    for i, x in enumerate(obj):
+        if limit is not None and i >= limit:
+            break
+        if stride is None or i % stride == 0:
+            yield i, x
+
+def _sample(obj, limit, sample, stride, seed):
+    import random
+    rng = random.Random(seed)
+
+    reservoir = []
+    for seen, (i, x) in enumerate(_strided(obj, limit, stride)):
+        if len(reservoir) < sample:
+            reservoir.append((i, x))
+        else:
+            # reservoir sampling: the seen-th selected item replaces a random one with probability sample/(seen + 1)
+            j = rng.randint(0, seen)
+            if j < sample:
+                reservoir[j] = (i, x)
+
+    # keep the original order so that Union possibilities are in order of appearance
+    return [x for i, x in sorted(reservoir, key=lambda ix: ix[0])]
+
+def _shards(values, shardsize):
+    shard = []
+    for x in values:
+        shard.append(x)
+        if len(shard) == shardsize:
+            yield shard
+            shard = []
+    if len(shard) > 0:
+        yield shard
+
+def _fromdata_shard(values):
+    return _unify([_buildintermediate(x, None, set()) for x in values])
+
+def fromdata(obj, limit=None, sample=None, stride=None, seed=None, processes=1, shardsize=10000):
+    # sample: infer from a reservoir sample of this many items; stride: from every stride-th item; processes: number of
+    # worker processes, or None for one per CPU (only for list-like data, like sample and stride)
+    #
+    # parallel inference is best-effort: items are read in this process and pickled to the workers in shards, so it only
+    # pays off when inferring each item costs more than pickling it and there are CPUs to spare
+    if limit is None or (isinstance(limit, (numbers.Integral, numpy.integer)) and limit >= 0):
+        pass
+    else:
+        raise TypeError("limit must be None or a non-negative integer, not {0}".format(limit))
+    if sample is None or (isinstance(sample, (numbers.Integral, numpy.integer)) and sample > 0):
+        pass
+    else:
+        raise TypeError("sample must be None or a positive integer, not {0}".format(sample))
+    if stride is None or (isinstance(stride, (numbers.Integral, numpy.integer)) and stride > 0):
+        pass
+    else:
+        raise TypeError("stride must be None or a positive integer, not {0}".format(stride))
+    if processes is None or (isinstance(processes, (numbers.Integral, numpy.integer)) and processes > 0):
+        pass
+    else:
+        raise TypeError("processes must be None or a positive integer, not {0}".format(processes))
+    if isinstance(shardsize, (numbers.Integral, numpy.integer)) and shardsize > 0:
+        pass
+    else:
+        raise TypeError("shardsize must be a positive integer, not {0}".format(shardsize))
 
-        elif isinstance(obj, (numbers.Integral, numpy.integer)):
-            return Number(False, int(obj), int(obj), True, True)
+    if sample is None and stride is None and processes == 1:
+        return _buildintermediate(obj, limit, set()).resolve()
 
-        elif isinstance(obj, (numbers.Real, numpy.floating)):
-            return Number(False, float(obj), float(obj), False, True)
+    if not _islist(obj):
+        raise TypeError("sample, stride, and processes only apply to list-like data, not {0}".format(repr(obj)))
 
-        elif isinstance(obj, (numbers.Complex, numpy.complex)):
-            return Number(False, float("-inf"), float("inf"), False, False)
+    if sample is not None:
+        values = _sample(obj, limit, sample, stride, seed)
+    else:
+        # streamed, so that only the shards in flight are held in this process
+        values = (x for i, x in _strided(obj, limit, stride))
 
-        elif isinstance(obj, bytes):
-            return String(False, False)
+    import multiprocessing
+    if processes is None:
+        processes = multiprocessing.cpu_count()
 
-        elif isinstance(obj, basestring):
-            return String(False, True)
+    if processes == 1:
+        content = _fromdata_shard(values)
+    else:
+        # infer each shard's Intermediate type in a worker, then unify them here (in order, for the order of Union possibilities)
+        pool = multiprocessing.Pool(processes)
+        try:
+            content = _unify(list(pool.imap(_fromdata_shard, _shards(values, shardsize))))
+        finally:
+            pool.close()
+            pool.join()
 
-        elif isinstance(obj, dict):
-            return IntermediateRecord(False, dict((n, buildintermediate(x, limit, memo)) for n, x in obj.items()), None)
+    return IntermediateList(False, content).resolve()
 
-        elif isinstance(obj, tuple) and hasattr(obj, "_fields"):
-            # this is a namedtuple; interpret it as a Record, rather than a Tuple
-            return IntermediateRecord(False, dict((n, buildintermediate(getattr(obj, n), limit, memo)) for n in obj._fields), obj.__class__.__name__)
+################################################################ inferring schemas from a namespace
 
-        elif isinstance(obj, tuple):
-            return IntermediateTuple(False, [buildintermediate(x, limit, memo) for x in obj])
+def fromnames(arraynames, prefix="object", delimiter="-"):
+    # sort once so that all names with a given prefix are a contiguous range, found by bisection
+    sortednames = sorted(set(arraynames))
+    nameset = set(sortednames)
 
-        else:
-            try:
-                limited = []
-                for x in obj:
-                    if limit is None or len(limited) < limit:
-                        limited.append(x)
-                    else:
-                        break
-            except TypeError:
-                # not iterable, so interpret it as a Record
-                return IntermediateRecord(False, dict((n, buildintermediate(getattr(obj, n), limit, memo)) for n in dir(obj) if not n.startswith("_") and not callable(getattr(obj, n))), obj.__class__.__name__)
-            else:
-                # iterable, so interpret it as a List
-                return IntermediateList(False, unify([buildintermediate(x, None, memo) for x in obj]))
+    def upper(prefix):
+        # smallest string greater than every string that starts with prefix
+        return prefix[:-1] + chr(ord(prefix[-1]) + 1)
 
-    return buildintermediate(obj, limit, set()).resolve()
+    def among(prefix):
+        return sortednames[bisect.bisect_left(sortednames, prefix) : bisect.bisect_left(sortednames, upper(prefix))]
 
-################################################################ inferring schemas from a namespace
+    def has(prefix):
+        i = bisect.bisect_left(sortednames, prefix)
+        return i < len(sortednames) and sortednames[i].startswith(prefix)
 
-def fromnames(arraynames, prefix="object", delimiter="-"):
-    def filter(arraynames, prefix):
-        return [x for x in arraynames if x.startswith(prefix)]
-    
-    def recurse(arraynames, prefix, byname, internalpointers):
+    def recurse(prefix, byname, internalpointers):
         prefixdelimiter = prefix + delimiter
         name = None
-        for n in arraynames:
-            if n.startswith(prefixdelimiter):
-                if n[len(prefixdelimiter)] == "N":
-                    match = oamap.schema.Schema._identifier.match(n[len(prefixdelimiter) + 1:])
-                    if match is not None:
-                        name = match.group(0)
-                        break
+        for n in among(prefixdelimiter + "N"):
+            match = oamap.schema.Schema._identifier.match(n[len(prefixdelimiter) + 1:])
+            if match is not None:
+                name = match.group(0)
+                break
 
         if name is not None:
             prefix = prefixdelimiter + "N" + name
@@ -315,69 +426,71 @@ def fromnames(arraynames, prefix="object", delimiter="-"):
         external  = prefixdelimiter + "X"
         primitive = prefixdelimiter + "D"
 
-        nullable = mask in arraynames
+        nullable = mask in nameset
         if not nullable:
             mask = None
 
-        if starts in arraynames and stops in arraynames:
+        if starts in nameset and stops in nameset:
             byname[prefix] = None
-            byname[prefix] = oamap.schema.List(recurse(filter(arraynames, content), content, byname, internalpointers), nullable=nullable, starts=None, stops=None, mask=None, name=name, doc=None)
+            byname[prefix] = oamap.schema.List(recurse(content, byname, internalpointers), nullable=nullable, starts=None, stops=None, mask=None, name=name, doc=None)
 
-        elif tags in arraynames:
+        elif tags in nameset:
             possibilities = []
             while True:
                 possibility = uniondata + repr(len(possibilities))
-                if any(x.startswith(possibility) for x in arraynames):
+                if has(possibility):
                     possibilities.append(possibility)
                 else:
                     break
             byname[prefix] = None
-            byname[prefix] = oamap.schema.Union([recurse(filter(arraynames, x), x, byname, internalpointers) for x in possibilities], nullable=nullable, tags=None, offsets=None, mask=None, name=name, doc=None)
-
-        elif any(x.startswith(field) for x in arraynames):
-            pattern = re.compile("^" + field + "(" + oamap.schema.Schema._identifier.pattern + ")")
-            fields = {}
-            for x in arraynames:
-                matches = pattern.match(x)
-                if matches is not None:
-                    if matches.group(1) not in fields:
-                        fields[matches.group(1)] = []
-                    fields[matches.group(1)].append(x)
+            byname[prefix] = oamap.schema.Union([recurse(x, byname, internalpointers) for x in possibilities], nullable=nullable, tags=None, offsets=None, mask=None, name=name, doc=None)
+
+        elif has(field):
+            fields = set()
+            i = bisect.bisect_left(sortednames, field)
+            while i < len(sortednames) and sortednames[i].startswith(field):
+                matches = oamap.schema.Schema._identifier.match(sortednames[i][len(field):])
+                if matches is None:
+                    i += 1
+                else:
+                    # skip over the rest of this field's arrays
+                    fields.add(matches.group(0))
+                    i = max(i + 1, bisect.bisect_left(sortednames, upper(field + matches.group(0) + delimiter)))
 
             types = []
             while True:
                 tpe = field + repr(len(types))
-                if any(x.startswith(tpe) for x in arraynames):
+                if has(tpe):
                     types.append(tpe)
                 else:
                     break
 
             if len(fields) >= 0 and len(types) == 0:
-                byname[prefix] = oamap.schema.Record(oamap.schema.OrderedDict([(n, recurse(fields[n], field + n, byname, internalpointers)) for n in sorted(fields)]), nullable=nullable, mask=None, name=name, doc=None)
+                byname[prefix] = oamap.schema.Record(oamap.schema.OrderedDict([(n, recurse(field + n, byname, internalpointers)) for n in sorted(fields)]), nullable=nullable, mask=None, name=name, doc=None)
             elif len(fields) == 0 and len(types) > 0:
-                byname[prefix] = oamap.schema.Tuple([recurse(filter(arraynames, n), n, byname, internalpointers) for n in types], nullable=nullable, mask=None, name=name, doc=None)
+                byname[prefix] = oamap.schema.Tuple([recurse(n, byname, internalpointers) for n in types], nullable=nullable, mask=None, name=name, doc=None)
             else:
                 raise KeyError("ambiguous set of array names: may be Record or Tuple at {0}".format(repr(prefix)))
 
-        elif any(x.startswith(positions) for x in arraynames):
-            if positions in arraynames:
+        elif has(positions):
+            if positions in nameset:
                 # external
                 byname2 = {}
                 internalpointers2 = []
-                target = finalize(recurse(filter(arraynames, external), external, byname2, internalpointers2), byname2, internalpointers2)
+                target = finalize(recurse(external, byname2, internalpointers2), byname2, internalpointers2)
                 byname[prefix] = oamap.schema.Pointer(target, nullable=nullable, positions=None, mask=None, name=name, doc=None)
 
             else:
                 # internal
-                matches = [x[len(positions) + 1:] for x in arraynames if x.startswith(positions)]
+                matches = [x[len(positions) + 1:] for x in among(positions)]
                 if len(matches) != 1:
                     raise KeyError("ambiguous set of array names: more than one internal Pointer at {0}".format(repr(prefix)))
                 target = None   # placeholder! see finalize
                 byname[prefix] = oamap.schema.Pointer(target, nullable=nullable, positions=None, mask=None, name=name, doc=None)
                 internalpointers.append((byname[prefix], matches[0]))
 
-        elif any(x.startswith(primitive) for x in arraynames):
-            matches = [x[len(primitive) - 1:] for x in arraynames if x.startswith(primitive)]
+        elif has(primitive):
+            matches = [x[len(primitive) - 1:] for x in among(primitive)]
             if len(matches) != 1:
                 raise KeyError("ambiguous set of array names: more than one Primitive at {0}".format(repr(prefix)))
             dtype = oamap.schema.Primitive._str2dtype(matches[0], delimiter)
@@ -398,4 +511,4 @@ def fromnames(arraynames, prefix="object", delimiter="-"):
 
     byname = {}
     internalpointers = []
-    return finalize(recurse(filter(arraynames, prefix), prefix, byname, internalpointers), byname, internalpointers)
+    return finalize(recurse(prefix, byname, internalpointers), byname, internalpointers)
@@ -42,6 +42,10 @@ import oamap.generator
 import oamap.proxy
 import oamap.util
 import oamap.compiler
+import oamap.builder
+
+if sys.version_info[0] > 2:
+    basestring = str
 
 recastings      = oamap.util.OrderedDict()
 transformations = oamap.util.OrderedDict()
@@ -132,10 +136,10 @@ class _DualSource(object):
             schemanode.offsets = str(offsetsrole)
 
         elif isinstance(schemanode, oamap.schema.Record):
-            pass
+            roles2arrays = {}
 
         elif isinstance(schemanode, oamap.schema.Tuple):
-            pass
+            roles2arrays = {}
 
         elif isinstance(schemanode, oamap.schema.Pointer):
             positionsrole = oamap.generator.PositionsRole(self.arrayname(), self.namespace)
@@ -774,14 +778,193 @@ def flatten(data, at=""):
 
 transformations["flatten"] = flatten
 
+################################################################ vectorized expressions
+
+def _ranges(starts, stops):
+    # all indexes in [starts[i], stops[i]) for all i, concatenated, and the i that each came from
+    counts = numpy.maximum(stops - starts, 0)
+    parents = numpy.repeat(numpy.arange(len(counts)), counts)
+    offsets = numpy.empty(len(counts) + 1, dtype=numpy.int64)
+    offsets[0] = 0
+    numpy.cumsum(counts, out=offsets[1:])
+    return numpy.arange(offsets[-1]) - offsets[:-1][parents] + starts[parents], parents
+
+def _take(array, index):
+    if len(array) == 0:
+        return numpy.zeros(len(index), dtype=array.dtype)
+    else:
+        return array[index]
+
+class _Columns(object):
+    # flat columns of Primitive fields, reached from "index" positions of "generator" (records in a list)
+    def __init__(self, generator, arrays, cache, index):
+        self.generator = generator
+        self.arrays = arrays
+        self.cache = cache
+        self.index = index
+        self.parents = {}
+        self.lengths = {(): len(index)}
+        self.nullable = False
+
+    def column(self, path, counts=False):
+        generator = self.generator
+        index = self.index
+        valid = numpy.ones(len(index), dtype=numpy.bool_)
+        chain = ()
+        path = list(path)
+
+        while True:
+            if isinstance(generator, oamap.generator.Masked):
+                self.nullable = True
+                mask = _take(generator._getmask(self.arrays, self.cache), index)
+                valid &= (mask != generator.maskedvalue)
+                index = numpy.where(valid, mask, 0)
+
+            if isinstance(generator, oamap.generator.PrimitiveGenerator) and len(path) == 0 and not counts:
+                return _take(generator._getdata(self.arrays, self.cache), index), valid, chain
+
+            elif isinstance(generator, oamap.generator.ListGenerator) and len(path) == 0 and counts:
+                starts, stops = generator._getstartsstops(self.arrays, self.cache)
+                return _take(stops, index) - _take(starts, index), valid, chain
+
+            elif isinstance(generator, oamap.generator.ListGenerator) and len(path) > 0:
+                starts, stops = generator._getstartsstops(self.arrays, self.cache)
+                starts = _take(starts, index)
+                stops = numpy.where(valid, _take(stops, index), starts)
+                index, parents = _ranges(starts, stops)
+                valid = numpy.ones(len(index), dtype=numpy.bool_)
+                chain = chain + (id(generator),)
+                self.parents[chain] = parents
+                self.lengths[chain] = len(index)
+                generator = generator.content
+
+            elif isinstance(generator, oamap.generator.RecordGenerator) and len(path) > 0 and path[0] in generator.fields:
+                generator = generator.fields[path.pop(0)]
+
+            elif isinstance(generator, oamap.generator.PointerGenerator):
+                if isinstance(generator, oamap.generator.Masked):
+                    raise NotImplementedError("nullable pointers in vectorized expressions")
+                index = _take(generator._getpositions(self.arrays, self.cache), index)
+                generator = generator.target
+
+            else:
+                return None
+
+    def evaluate(self, expr):
+        # returns values, validity, and chain of lists for an expression over field paths, broadcasting to the deepest list
+        tree = ast.parse(expr, mode="eval")
+        columns = {}
+        def resolve(path, counts=False):
+            out = self.column(path, counts)
+            if out is None:
+                return None
+            name = "_column{0}".format(len(columns))
+            columns[name] = out
+            return name
+        tree = ast.fix_missing_locations(_ColumnTransformer(resolve).visit(tree))
+
+        chain = ()
+        for values, valid, c in columns.values():
+            if len(c) > len(chain):
+                chain = c
+        for values, valid, c in columns.values():
+            if chain[:len(c)] != c:
+                raise NotImplementedError("expression {0} combines fields from different lists".format(repr(expr)))
+
+        env = dict(numpy.__dict__)
+        valid = numpy.ones(self.lengths[chain], dtype=numpy.bool_)
+        for name, (values, v, c) in columns.items():
+            env[name] = self.broadcast(values, c, chain)
+            valid &= self.broadcast(v, c, chain)
+
+        result = numpy.asarray(eval(compile(tree, "<expression>", "eval"), env))
+        if result.shape == ():
+            result = numpy.repeat(result, len(valid))
+        return result, valid, chain
+
+    def broadcast(self, values, chain, target):
+        # repeat values from the lists in "chain" to the items of the deeper lists in "target"
+        if target[:len(chain)] != chain:
+            raise NotImplementedError("cannot broadcast between fields of different lists")
+        for i in range(len(chain), len(target)):
+            values = values[self.parents[target[:i + 1]]]
+        return values
+
+    def anyof(self, mask, chain):
+        # reduce a per-item mask up to the original index positions: is any item in each list true?
+        for i in range(len(chain), 0, -1):
+            mask = numpy.bincount(self.parents[chain[:i]], weights=mask, minlength=self.lengths[chain[:i - 1]]) > 0
+        return mask
+
+class _ColumnTransformer(ast.NodeTransformer):
+    # replaces field paths like muons/pt with column names and Python logic with elementwise numpy logic
+    def __init__(self, resolve):
+        self.resolve = resolve
+
+    def _path(self, node):
+        if isinstance(node, ast.Name):
+            return [node.id]
+        elif isinstance(node, ast.BinOp) and isinstance(node.op, ast.Div) and isinstance(node.right, ast.Name):
+            left = self._path(node.left)
+            if left is not None:
+                return left + [node.right.id]
+        return None
+
+    def _replace(self, node, counts=False):
+        path = self._path(node)
+        if path is not None:
+            name = self.resolve(path, counts)
+            if name is not None:
+                return ast.copy_location(ast.Name(name, ast.Load()), node)
+        return None
+
+    def visit_Name(self, node):
+        return self._replace(node) or node
+
+    def visit_BinOp(self, node):
+        return self._replace(node) or self.generic_visit(node)
+
+    def visit_Call(self, node):
+        if isinstance(node.func, ast.Name) and node.func.id == "len" and len(node.args) == 1:
+            out = self._replace(node.args[0], counts=True)
+            if out is not None:
+                return ast.copy_location(out, node)
+        return self.generic_visit(node)
+
+    def visit_BoolOp(self, node):
+        self.generic_visit(node)
+        op = ast.BitAnd() if isinstance(node.op, ast.And) else ast.BitOr()
+        out = node.values[0]
+        for x in node.values[1:]:
+            out = ast.BinOp(out, op, x)
+        return ast.copy_location(out, node)
+
+    def visit_UnaryOp(self, node):
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Not):
+            return ast.copy_location(ast.UnaryOp(ast.Invert(), node.operand), node)
+        return node
+
+    def visit_Compare(self, node):
+        self.generic_visit(node)
+        left = node.left
+        out = None
+        for op, right in zip(node.ops, node.comparators):
+            compare = ast.Compare(left, [op], [right])
+            out = compare if out is None else ast.BinOp(out, ast.BitAnd(), compare)
+            left = right
+        return ast.copy_location(out, node)
+
 ################################################################ filter
 
-def filter(data, fcn, args=(), at="", numba=True):
+def filter(data, fcn, args=(), at="", numba=True, vectorized=False):
     if not isinstance(args, tuple):
         try:
             args = tuple(args)
         except TypeError:
             args = (args,)
+    if vectorized and args != ():
+        raise TypeError("vectorized filter expressions do not take args")
 
     if (isinstance(data, oamap.proxy.ListProxy) and data._whence == 0 and data._stride == 1) or (isinstance(data, oamap.proxy.Proxy) and data._index == 0):
         schema = data._generator.namedschema()
@@ -793,46 +976,70 @@ def filter(data, fcn, args=(), at="", numba=True):
             raise NotImplementedError("nullable; need to merge masks")
 
         listgenerator = data._generator.findbynames("List", listnode.namespace, starts=listnode.starts, stops=listnode.stops)
-        
-        if all(isinstance(x, (oamap.schema.Record, oamap.schema.Tuple)) for x in nodes[1:]):
-            if listnode is schema:
-                view = listgenerator(data._arrays, numentries=len(data))
-            else:
-                view = listgenerator(data._arrays)
-        else:
+
+        if vectorized:
+            # evaluate the expression on flat arrays, reducing nested lists with "any"
             if listnode is schema:
-                offsets = numpy.array([0, len(data)], dtype=oamap.generator.ListGenerator.posdtype)
-                viewstarts, viewstops = offsets[:1], offsets[-1:]
+                index = numpy.arange(len(data))
+                parents = numpy.zeros(len(data), dtype=numpy.int64)
+                numlists = 1
             else:
                 viewstarts, viewstops = listgenerator._getstartsstops(data._arrays, data._cache)
-            viewschema = listgenerator.namedschema()
-            viewarrays = _DualSource(data._arrays, data._generator.namespaces())
-            viewoffsets = numpy.array([viewstarts.min(), viewstops.max()], dtype=oamap.generator.ListGenerator.posdtype)
-            viewarrays.put(viewschema, viewoffsets[:1], viewoffsets[-1:])
-            view = viewschema(viewarrays)
-
-        fcn = oamap.util.stringfcn(fcn)
-        params = fcn.__code__.co_varnames[:fcn.__code__.co_argcount]
-        avoid = set(params)
-        fcnname = oamap.util.varname(avoid, "fcn")
-        fillname = oamap.util.varname(avoid, "fill")
-        lenname = oamap.util.varname(avoid, "len")
-        rangename = oamap.util.varname(avoid, "range")
-
-        ptypes = oamap.util.paramtypes(args)
-        if ptypes is not None:
-            import numba as nb
-            from oamap.compiler import typeof_generator
-            ptypes = (typeof_generator(view._generator.content),) + ptypes
-        fcn = oamap.util.trycompile(fcn, paramtypes=ptypes, numba=numba)
-        rtype = oamap.util.returntype(fcn, ptypes)
-        if rtype is not None:
-            if rtype != nb.types.boolean:
-                raise TypeError("filter function must return boolean, not {0}".format(rtype))
+                index, parents = _ranges(viewstarts, viewstops)
+                numlists = len(viewstarts)
+
+            columns = _Columns(listgenerator.content, data._arrays, data._cache, index)
+            result, valid, chain = columns.evaluate(fcn)
+            if result.dtype != numpy.dtype(numpy.bool_):
+                raise TypeError("filter expression must return boolean, not {0}".format(result.dtype))
+            keep = columns.anyof(result & valid, chain)
+
+            pointers = index[keep].astype(oamap.generator.PointerGenerator.posdtype)
+            numitems = len(pointers)
+            offsets = numpy.empty(numlists + 1, dtype=oamap.generator.ListGenerator.posdtype)
+            offsets[0] = 0
+            numpy.cumsum(numpy.bincount(parents, weights=keep, minlength=numlists), out=offsets[1:])
 
-        if all(isinstance(x, (oamap.schema.Record, oamap.schema.Tuple)) for x in nodes[1:]):
-            env = {fcnname: fcn}
-            oamap.util.doexec("""
+        else:
+            if all(isinstance(x, (oamap.schema.Record, oamap.schema.Tuple)) for x in nodes[1:]):
+                if listnode is schema:
+                    view = listgenerator(data._arrays, numentries=len(data))
+                else:
+                    view = listgenerator(data._arrays)
+            else:
+                if listnode is schema:
+                    offsets = numpy.array([0, len(data)], dtype=oamap.generator.ListGenerator.posdtype)
+                    viewstarts, viewstops = offsets[:1], offsets[-1:]
+                else:
+                    viewstarts, viewstops = listgenerator._getstartsstops(data._arrays, data._cache)
+                viewschema = listgenerator.namedschema()
+                viewarrays = _DualSource(data._arrays, data._generator.namespaces())
+                viewoffsets = numpy.array([viewstarts.min(), viewstops.max()], dtype=oamap.generator.ListGenerator.posdtype)
+                viewarrays.put(viewschema, viewoffsets[:1], viewoffsets[-1:])
+                view = viewschema(viewarrays)
+
+            fcn = oamap.util.stringfcn(fcn)
+            params = fcn.__code__.co_varnames[:fcn.__code__.co_argcount]
+            avoid = set(params)
+            fcnname = oamap.util.varname(avoid, "fcn")
+            fillname = oamap.util.varname(avoid, "fill")
+            lenname = oamap.util.varname(avoid, "len")
+            rangename = oamap.util.varname(avoid, "range")
+
+            ptypes = oamap.util.paramtypes(args)
+            if ptypes is not None:
+                import numba as nb
+                from oamap.compiler import typeof_generator
+                ptypes = (typeof_generator(view._generator.content),) + ptypes
+            fcn = oamap.util.trycompile(fcn, paramtypes=ptypes, numba=numba)
+            rtype = oamap.util.returntype(fcn, ptypes)
+            if rtype is not None:
+                if rtype != nb.types.boolean:
+                    raise TypeError("filter function must return boolean, not {0}".format(rtype))
+
+            if all(isinstance(x, (oamap.schema.Record, oamap.schema.Tuple)) for x in nodes[1:]):
+                env = {fcnname: fcn}
+                oamap.util.doexec("""
 def {fill}({view}, {pointers}{params}):
     {i} = 0
     {numitems} = 0
@@ -850,16 +1057,16 @@ def {fill}({view}, {pointers}{params}):
            numitems=oamap.util.varname(avoid, "numitems"),
            datum=oamap.util.varname(avoid, "datum"),
            fcn=fcnname), env)
-            fill = oamap.util.trycompile(env[fillname], numba=numba)
+                fill = oamap.util.trycompile(env[fillname], numba=numba)
 
-            pointers = numpy.empty(len(view), dtype=oamap.generator.PointerGenerator.posdtype)
-            numitems = fill(*((view, pointers) + args))
-            pointers = pointers[:numitems]
-            offsets = numpy.array([0, numitems], dtype=oamap.generator.ListGenerator.posdtype)
+                pointers = numpy.empty(len(view), dtype=oamap.generator.PointerGenerator.posdtype)
+                numitems = fill(*((view, pointers) + args))
+                pointers = pointers[:numitems]
+                offsets = numpy.array([0, numitems], dtype=oamap.generator.ListGenerator.posdtype)
 
-        else:
-            env = {fcnname: fcn, lenname: len, rangename: range if sys.version_info[0] > 2 else xrange}
-            oamap.util.doexec("""
+            else:
+                env = {fcnname: fcn, lenname: len, rangename: range if sys.version_info[0] > 2 else xrange}
+                oamap.util.doexec("""
 def {fill}({view}, {viewstarts}, {viewstops}, {stops}, {pointers}{params}):
     {numitems} = 0
     for {i} in {range}({len}({viewstarts})):
@@ -884,13 +1091,13 @@ def {fill}({view}, {viewstarts}, {viewstops}, {stops}, {pointers}{params}):
            j=oamap.util.varname(avoid, "j"),
            datum=oamap.util.varname(avoid, "datum"),
            fcn=fcnname), env)
-            fill = oamap.util.trycompile(env[fillname], numba=numba)
+                fill = oamap.util.trycompile(env[fillname], numba=numba)
 
-            offsets = numpy.empty(len(viewstarts) + 1, dtype=oamap.generator.ListGenerator.posdtype)
-            offsets[0] = 0
-            pointers = numpy.empty(len(view), dtype=oamap.generator.PointerGenerator.posdtype)
-            numitems = fill(*((view, viewstarts, viewstops, offsets[1:], pointers) + args))
-            pointers = pointers[:numitems]
+                offsets = numpy.empty(len(viewstarts) + 1, dtype=oamap.generator.ListGenerator.posdtype)
+                offsets[0] = 0
+                pointers = numpy.empty(len(view), dtype=oamap.generator.PointerGenerator.posdtype)
+                numitems = fill(*((view, viewstarts, viewstops, offsets[1:], pointers) + args))
+                pointers = pointers[:numitems]
 
         listnode.content = oamap.schema.Pointer(listnode.content)
 
@@ -918,12 +1125,14 @@ transformations["filter"] = filter
 
 ################################################################ define
 
-def define(data, fieldname, fcn, args=(), at="", fieldtype=None, numba=True):
+def define(data, fieldname, fcn, args=(), at="", fieldtype=None, numba=True, vectorized=False):
     if not isinstance(args, tuple):
         try:
             args = tuple(args)
         except TypeError:
             args = (args,)
+    if vectorized and args != ():
+        raise TypeError("vectorized define expressions do not take args")
 
     if (isinstance(data, oamap.proxy.ListProxy) and data._whence == 0 and data._stride == 1) or (isinstance(data, oamap.proxy.Proxy) and data._index == 0):
         schema = data._generator.namedschema()
@@ -958,12 +1167,80 @@ def define(data, fieldname, fcn, args=(), at="", fieldtype=None, numba=True):
             viewarrays.put(viewschema, offsets[:1], offsets[-1:])
             view = viewschema(viewarrays)
 
+        if vectorized:
+            # evaluate the expression on the flat arrays of sibling fields; None wherever any of them is None
+            if fieldtype is not None and not isinstance(fieldtype, oamap.schema.Primitive):
+                raise TypeError("vectorized define can only make Primitive fields, not:\n\n    {0}".format(fieldtype.__repr__(indent="    ")))
+            index = numpy.arange(view._whence, view._whence + len(view))
+            columns = _Columns(view._generator.content, view._arrays, view._cache, index)
+            result, valid, chain = columns.evaluate(fcn)
+            if chain != ():
+                raise TypeError("define expression {0} must have one value per record, but it depends on fields in nested lists".format(repr(fcn)))
+            if fieldtype is None:
+                fieldtype = oamap.schema.Primitive(result.dtype, nullable=columns.nullable)
+            elif not fieldtype.nullable and not valid.all():
+                raise ValueError("define expression {0} has None values, but fieldtype is not nullable".format(repr(fcn)))
+
+            recordnode[fieldname] = fieldtype.deepcopy()
+            arrays = _DualSource(data._arrays, data._generator.namespaces())
+            if fieldtype.nullable:
+                mask = numpy.empty(view._whence + len(view), dtype=oamap.generator.Masked.maskdtype)
+                mask[:view._whence] = oamap.generator.Masked.maskedvalue
+                mask[view._whence:] = numpy.where(valid, numpy.cumsum(valid) - 1, oamap.generator.Masked.maskedvalue)
+                arrays.put(recordnode[fieldname], result[valid].astype(fieldtype.dtype), mask)
+            else:
+                primitive = numpy.zeros(view._whence + len(view), dtype=fieldtype.dtype)
+                primitive[view._whence:] = result
+                arrays.put(recordnode[fieldname], primitive)
+
+            if isinstance(schema, oamap.schema.List):
+                return schema(arrays, numentries=len(data))
+            else:
+                return schema(arrays)
+
         fcn = oamap.util.stringfcn(fcn)
         params = fcn.__code__.co_varnames[:fcn.__code__.co_argcount]
         avoid = set(params)
         fcnname = oamap.util.varname(avoid, "fcn")
         fillname = oamap.util.varname(avoid, "fill")
 
+        if isinstance(fieldtype, (oamap.schema.List, oamap.schema.Record)):
+            # the function appends each new value to a builder (passed as its second argument) and returns nothing
+            builder = oamap.builder.Builder(oamap.schema.List(fieldtype), capacity=max(len(view), 1), numba=numba)
+
+            ptypes = oamap.util.paramtypes(args)
+            if ptypes is not None and builder.numbatype is not None:
+                from oamap.compiler import typeof_generator
+                ptypes = (typeof_generator(view._generator.content), builder.numbatype) + ptypes
+            fcn = oamap.util.trycompile(fcn, paramtypes=ptypes, numba=numba)
+
+            env = {fcnname: fcn}
+            oamap.util.doexec("""
+def {fill}({view}, {builder}{params}):
+    for {datum} in {view}:
+        {fcn}({datum}, {builder}{params})
+""".format(fill=fillname,
+           view=oamap.util.varname(avoid, "view"),
+           builder=oamap.util.varname(avoid, "builder"),
+           params="".join("," + x for x in params[2:]),
+           datum=oamap.util.varname(avoid, "datum"),
+           fcn=fcnname), env)
+            fill = oamap.util.trycompile(env[fillname], numba=numba)
+            fill(*((view, builder.root) + args))
+
+            if len(builder) != len(view):
+                raise ValueError("'define' function must append exactly one value to the builder per record; {0} records, {1} values".format(len(view), len(builder)))
+
+            arrays = _DualSource(data._arrays, data._generator.namespaces())
+            pairs = builder.arrays()
+            recordnode[fieldname] = pairs[0][0]
+            for node, nodearrays in pairs:
+                arrays.put(node, *nodearrays)
+            if isinstance(schema, oamap.schema.List):
+                return schema(arrays, numentries=len(data))
+            else:
+                return schema(arrays)
+
         ptypes = oamap.util.paramtypes(args)
         if ptypes is not None:
             import numba as nb
@@ -1059,6 +1336,116 @@ def {fill}({view}, {primitive}, {mask}{params}):
 
 transformations["define"] = define
 
+################################################################ aggregate
+
+_aggregates = ("sum", "count", "min", "max", "mean", "argmax", "any", "all")
+
+def _aggregate_reduceat(ufunc, values, counts, identity):
+    # reduceat over consecutive segments of "values", one per count, skipping empty segments (which reduceat mishandles)
+    out = numpy.empty(len(counts), dtype=values.dtype)
+    out[:] = identity
+    nonempty = counts > 0
+    if nonempty.any():
+        offsets = numpy.cumsum(counts) - counts
+        out[nonempty] = ufunc.reduceat(values, offsets[nonempty])
+    return out
+
+def aggregate(data, fieldname, how, at, what=None):
+    if how not in _aggregates:
+        raise ValueError("aggregate must be one of {0}, not {1}".format(", ".join(repr(x) for x in _aggregates), repr(how)))
+    if what is None and how != "count":
+        raise TypeError("aggregate {0} requires an expression for what to aggregate".format(repr(how)))
+
+    if (isinstance(data, oamap.proxy.ListProxy) and data._whence == 0 and data._stride == 1) or (isinstance(data, oamap.proxy.Proxy) and data._index == 0):
+        schema = data._generator.namedschema()
+        nodes = schema.path(at, parents=True)
+        listnode = nodes[0]
+        if not isinstance(listnode, oamap.schema.List):
+            raise TypeError("path {0} does not refer to a list:\n\n    {1}".format(repr(at), listnode.__repr__(indent="    ")))
+        if len(nodes) < 2 or not isinstance(nodes[1], oamap.schema.Record):
+            raise TypeError("path {0} does not refer to a list in a record".format(repr(at)))
+        recordnode = nodes[1]
+
+        # one list (possibly None, which is treated as empty) per parent record
+        listgenerator = data._generator.findbynames("List", listnode.namespace, starts=listnode.starts, stops=listnode.stops, mask=listnode.mask)
+        starts, stops = listgenerator._getstartsstops(data._arrays, data._cache)
+        if isinstance(listgenerator, oamap.generator.Masked):
+            mask = listgenerator._getmask(data._arrays, data._cache)
+            valid = (mask != listgenerator.maskedvalue)
+            starts = numpy.where(valid, _take(starts, numpy.where(valid, mask, 0)), 0)
+            stops = numpy.where(valid, _take(stops, numpy.where(valid, mask, 0)), 0)
+        index, parents = _ranges(starts, stops)
+
+        if what is None:
+            values = None
+        else:
+            columns = _Columns(listgenerator.content, data._arrays, data._cache, index)
+            values, valid, chain = columns.evaluate(what)
+            if chain != ():
+                raise TypeError("aggregate expression {0} must have one value per list item, but it depends on fields in nested lists".format(repr(what)))
+            values = values[valid]
+            parents = parents[valid]
+        counts = numpy.bincount(parents, minlength=len(starts))
+
+        nullable = False
+        if how == "count":
+            out = counts.astype(numpy.int64)
+
+        elif how == "sum":
+            if issubclass(values.dtype.type, (numpy.bool_, numpy.integer)):
+                values = values.astype(numpy.int64)
+            out = _aggregate_reduceat(numpy.add, values, counts, 0)
+
+        elif how == "mean":
+            out = _aggregate_reduceat(numpy.add, values.astype(numpy.float64), counts, 0) / numpy.maximum(counts, 1)
+            nullable = True
+
+        elif how == "min":
+            out = _aggregate_reduceat(numpy.minimum, values, counts, 0)
+            nullable = True
+
+        elif how == "max":
+            out = _aggregate_reduceat(numpy.maximum, values, counts, 0)
+            nullable = True
+
+        elif how == "argmax":
+            # local index of the first maximum in each list; numpy.maximum propagates NaN, so like numpy.argmax, a
+            # list containing NaN points to its first NaN
+            maxima = _aggregate_reduceat(numpy.maximum, values, counts, 0)[parents]
+            offsets = numpy.cumsum(counts) - counts
+            local = numpy.arange(len(values)) - offsets[parents]
+            matches = (values == maxima)
+            if issubclass(values.dtype.type, numpy.floating):
+                matches |= numpy.isnan(values) & numpy.isnan(maxima)
+            local[~matches] = len(values)
+            out = _aggregate_reduceat(numpy.minimum, local.astype(numpy.int64), counts, 0)
+            nullable = True
+
+        elif how == "any":
+            out = _aggregate_reduceat(numpy.logical_or, values.astype(numpy.bool_), counts, False)
+
+        elif how == "all":
+            out = _aggregate_reduceat(numpy.logical_and, values.astype(numpy.bool_), counts, True)
+
+        recordnode[fieldname] = oamap.schema.Primitive(out.dtype, nullable=nullable)
+        arrays = _DualSource(data._arrays, data._generator.namespaces())
+        if nullable:
+            nonempty = counts > 0
+            mask = numpy.where(nonempty, numpy.cumsum(nonempty) - 1, oamap.generator.Masked.maskedvalue).astype(oamap.generator.Masked.maskdtype)
+            arrays.put(recordnode[fieldname], out[nonempty], mask)
+        else:
+            arrays.put(recordnode[fieldname], out)
+
+        if isinstance(schema, oamap.schema.List):
+            return schema(arrays, numentries=len(data))
+        else:
+            return schema(arrays)
+
+    else:
+        raise TypeError("aggregate can only be applied to a top-level OAMap proxy (List, Record, Tuple)")
+
+transformations["aggregate"] = aggregate
+
 ################################################################ map
 
 def map(data, fcn, args=(), at="", names=None, numba=True):
@@ -1397,3 +1784,161 @@ reduce.combiner = ReduceCombiner
 del ReduceCombiner
 
 actions["reduce"] = reduce
+
+################################################################ hist
+
+def _hist_fill(values, weights, counts, numbins, low, high):
+    # counts[0] is underflow, counts[-1] is overflow, and NaN values are dropped
+    keep = ~numpy.isnan(values)
+    values = values[keep]
+    if weights is not None:
+        weights = weights[keep]
+    index = numpy.floor((values - low) * (numbins / float(high - low))).astype(numpy.int64) + 1
+    numpy.clip(index, 1, numbins, out=index)
+    index[values < low] = 0
+    index[values >= high] = numbins + 1
+    counts += numpy.bincount(index, weights=weights, minlength=numbins + 2)
+
+def hist(data, fcn, numbins, low, high, weight=None, args=(), at="", numba=True):
+    if not isinstance(args, tuple):
+        try:
+            args = tuple(args)
+        except TypeError:
+            args = (args,)
+    if not numbins > 0 or not high > low:
+        raise ValueError("hist requires numbins > 0 and high > low")
+    vectorized = isinstance(fcn, basestring)
+    if weight is not None and isinstance(weight, basestring) != vectorized:
+        raise TypeError("hist weight must be an expression if fcn is an expression and a function if fcn is a function")
+    if vectorized and args != ():
+        raise TypeError("hist expressions do not take args")
+
+    if (isinstance(data, oamap.proxy.ListProxy) and data._whence == 0 and data._stride == 1) or (isinstance(data, oamap.proxy.Proxy) and data._index == 0):
+        schema = data._generator.namedschema()
+        listnode = schema.path(at)
+        if not isinstance(listnode, oamap.schema.List):
+            raise TypeError("path {0} does not refer to a list:\n\n    {1}".format(repr(at), listnode.__repr__(indent="    ")))
+        if listnode.nullable:
+            raise NotImplementedError("nullable; need to merge masks")
+
+        listgenerator = data._generator.findbynames("List", listnode.namespace, starts=listnode.starts, stops=listnode.stops)
+        counts = numpy.zeros(numbins + 2, dtype=numpy.float64)
+
+        if vectorized:
+            # a column expression, such as "muons/pt", fills one entry per item of the deepest list it refers to
+            if listnode is schema:
+                index = numpy.arange(len(data))
+            else:
+                index = _ranges(*listgenerator._getstartsstops(data._arrays, data._cache))[0]
+
+            columns = _Columns(listgenerator.content, data._arrays, data._cache, index)
+            values, valid, chain = columns.evaluate(fcn)
+            if weight is None:
+                weights = None
+            else:
+                weights, weightsvalid, weightschain = columns.evaluate(weight)
+                if len(weightschain) > len(chain):
+                    values, valid, chain = columns.broadcast(values, chain, weightschain), columns.broadcast(valid, chain, weightschain), weightschain
+                weights = columns.broadcast(weights, weightschain, chain).astype(numpy.float64)
+                valid = valid & columns.broadcast(weightsvalid, weightschain, chain)
+                weights = weights[valid]
+
+            _hist_fill(values[valid].astype(numpy.float64), weights, counts, numbins, low, high)
+            return counts
+
+        if listnode is schema:
+            view = data
+        else:
+            viewstarts, viewstops = listgenerator._getstartsstops(data._arrays, data._cache)
+            viewschema = listgenerator.namedschema()
+            viewarrays = _DualSource(data._arrays, data._generator.namespaces())
+            viewoffsets = numpy.array([viewstarts.min(), viewstops.max()], dtype=oamap.generator.ListGenerator.posdtype)
+            viewarrays.put(viewschema, viewoffsets[:1], viewoffsets[-1:])
+            view = viewschema(viewarrays)
+
+        fcn = oamap.util.stringfcn(fcn)
+        params = fcn.__code__.co_varnames[:fcn.__code__.co_argcount]
+        avoid = set(params)
+        fcnname = oamap.util.varname(avoid, "fcn")
+        weightname = oamap.util.varname(avoid, "weight")
+        fillname = oamap.util.varname(avoid, "fill")
+        datumname = oamap.util.varname(avoid, "datum")
+
+        ptypes = oamap.util.paramtypes(args)
+        if ptypes is not None:
+            from oamap.compiler import typeof_generator
+            ptypes = (typeof_generator(view._generator.content),) + ptypes
+        fcn = oamap.util.trycompile(fcn, paramtypes=ptypes, numba=numba)
+        env = {fcnname: fcn}
+        if weight is not None:
+            env[weightname] = oamap.util.trycompile(weight, paramtypes=ptypes, numba=numba)
+
+        oamap.util.doexec("""
+def {fill}({view}, {counts}, {numbins}, {low}, {high}{params}):
+    {scale} = {numbins} / ({high} - {low})
+    for {datum} in {view}:
+        {x} = {fcn}({datum}{params})
+        if {x} is not None and {x} == {x}:
+            if {x} < {low}:
+                {bin} = 0
+            elif {x} >= {high}:
+                {bin} = {numbins} + 1
+            else:
+                {bin} = min(int(({x} - {low}) * {scale}), {numbins} - 1) + 1
+            {counts}[{bin}] += {weight}
+""".format(fill=fillname,
+           view=oamap.util.varname(avoid, "view"),
+           counts=oamap.util.varname(avoid, "counts"),
+           numbins=oamap.util.varname(avoid, "numbins"),
+           low=oamap.util.varname(avoid, "low"),
+           high=oamap.util.varname(avoid, "high"),
+           params="".join("," + x for x in params[1:]),
+           scale=oamap.util.varname(avoid, "scale"),
+           datum=datumname,
+           x=oamap.util.varname(avoid, "x"),
+           bin=oamap.util.varname(avoid, "bin"),
+           fcn=fcnname,
+           weight="1.0" if weight is None else "{0}({1}{2})".format(weightname, datumname, "".join("," + x for x in params[1:]))), env)
+        fill = oamap.util.trycompile(env[fillname], numba=numba)
+
+        fill(*((view, counts, numbins, float(low), float(high)) + args))
+        return counts
+
+    else:
+        raise TypeError("hist can only be applied to a top-level OAMap proxy (List, Record, Tuple)")
+
+class HistCombiner(object):
+    # adds partitions' bin arrays in place, in whatever order they finish
+    def __init__(self, futures):
+        self._futures = futures
+        self._result = None
+    def result(self, timeout=None):
+        if self._result is None:
+            starttime = time.time()
+            pending = list(self._futures)
+            result = None
+            while len(pending) > 0:
+                ready = [x for x in pending if x.done()]
+                if len(ready) == 0:
+                    ready = pending[:1]
+                for future in ready:
+                    if timeout is not None:
+                        timeout = max(1e-6, timeout - (time.time() - starttime))
+                    if result is None:
+                        result = numpy.array(future.result(timeout), dtype=numpy.float64)
+                    else:
+                        result += future.result(timeout)
+                    pending.remove(future)
+            self._result = result
+        return self._result
+    def done(self):
+        return all(x.done() for x in self._futures)
+    def exception(self, timeout=None):
+        raise NotImplementedError
+    def traceback(self, timeout=None):
+        raise NotImplementedError
+
+hist.combiner = HistCombiner
+del HistCombiner
+
+actions["hist"] = hist
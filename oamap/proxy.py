@@ -75,6 +75,97 @@ def tojsonstring(value, *args, **kwds):
 def tojsonfile(file, value, *args, **kwds):
     json.dump(file, tojson(value), *args, **kwds)
 
+# selections of array indexes: a slice when contiguous (so that arrays are views), an index array otherwise
+
+def _listindex(whence, stride, length):
+    if stride == 1:
+        return slice(whence, whence + length)
+    else:
+        return numpy.arange(whence, whence + stride*length, stride)
+
+def _contentindex(starts, stops):
+    counts = stops - starts
+    offsets = numpy.empty(len(counts) + 1, dtype=numpy.int64)
+    offsets[0] = 0
+    numpy.cumsum(counts, out=offsets[1:])
+
+    if len(counts) == 0:
+        return offsets, slice(0, 0)
+    elif numpy.array_equal(starts[1:], stops[:-1]):
+        return offsets, slice(starts[0], stops[-1])
+    else:
+        return offsets, numpy.arange(offsets[-1]) - numpy.repeat(offsets[:-1] - starts, counts)
+
+def _take(array, index, valid):
+    if valid is None:
+        return array[index]
+    else:
+        # only read at valid positions: the index is meaningless elsewhere
+        out = numpy.zeros(len(valid), dtype=array.dtype)
+        out[valid] = array[index[valid]]
+        return out
+
+def _column(generator, arrays, cache, index, path):
+    path = [x for x in path.split("/") if x != ""]
+    valid = None
+    offsets = []
+    while True:
+        if isinstance(generator, oamap.generator.ExtendedGenerator):
+            generator = generator.generic
+
+        if isinstance(generator, oamap.generator.Masked):
+            mask = _take(generator._getmask(arrays, cache), index, valid)
+            if valid is None:
+                valid = (mask != generator.maskedvalue)
+            else:
+                valid &= (mask != generator.maskedvalue)
+            index = mask
+            if numpy.all(valid):
+                valid = None
+
+        if isinstance(generator, oamap.generator.PrimitiveGenerator):
+            if len(path) != 0:
+                raise KeyError("path continues past a Primitive: {0}".format(repr("/".join(path))))
+            data = _take(generator._getdata(arrays, cache), index, valid)
+            if valid is not None:
+                data = numpy.ma.MaskedArray(data, mask=~valid)
+            return data, offsets
+
+        elif isinstance(generator, oamap.generator.ListGenerator):
+            # null lists (and lists in null parents) are treated as empty
+            starts, stops = generator._getstartsstops(arrays, cache)
+            leveloffsets, index = _contentindex(_take(starts, index, valid), _take(stops, index, valid))
+            offsets.append(leveloffsets)
+            valid = None
+            generator = generator.content
+
+        elif isinstance(generator, oamap.generator.PointerGenerator):
+            index = _take(generator._getpositions(arrays, cache), index, valid)
+            generator = generator.target
+
+        elif isinstance(generator, oamap.generator.RecordGenerator):
+            if len(path) == 0:
+                raise KeyError("path ends at a Record; specify a field among {0}".format(", ".join(repr(x) for x in generator.fields)))
+            if path[0] not in generator.fields:
+                raise KeyError("no field {0} in Record with fields {1}".format(repr(path[0]), ", ".join(repr(x) for x in generator.fields)))
+            generator = generator.fields[path[0]]
+            path = path[1:]
+
+        elif isinstance(generator, oamap.generator.TupleGenerator):
+            if len(path) == 0:
+                raise KeyError("path ends at a Tuple; specify an item index")
+            try:
+                generator = generator.types[int(path[0])]
+            except (ValueError, IndexError):
+                raise KeyError("no item {0} in Tuple of {1} items".format(repr(path[0]), len(generator.types)))
+            path = path[1:]
+
+        elif isinstance(generator, oamap.generator.UnionGenerator):
+            raise TypeError("cannot extract a column through a Union")
+
+        else:
+            raise AssertionError("unrecognized generator type: {0} ({1})".format(generator.__class__, repr(generator)))
+
 ################################################################ Lists
 
 class ListProxy(Proxy):
@@ -135,6 +226,39 @@ class ListProxy(Proxy):
     def indexed(self):
         return self
 
+    def batches(self, size):
+        # each batch is a view of the same arrays and cache; use column/toarrow/topandas to get at them in bulk
+        if size <= 0:
+            raise ValueError("batch size must be positive")
+        return (ListProxy(self._generator, self._arrays, self._cache, self._whence + self._stride*start, self._stride, min(size, self._length - start)) for start in xrange(0, self._length, size))
+
+    def column(self, path=""):
+        return _column(self._generator.content, self._arrays, self._cache, _listindex(self._whence, self._stride, self._length), path)
+
+    def toarrow(self):
+        import oamap.backend.arrow
+        return oamap.backend.arrow.toarrow(self)
+
+    def topandas(self):
+        import pandas
+        generator = self._generator.content
+        if not isinstance(generator, oamap.generator.RecordGenerator) or isinstance(generator, oamap.generator.Masked):
+            raise TypeError("topandas can only be applied to a list of non-nullable records")
+
+        index = _listindex(self._whence, self._stride, self._length)
+        columns = oamap.util.OrderedDict()
+        for n, x in generator.fields.items():
+            if not isinstance(x, oamap.generator.PrimitiveGenerator) or x.dtype.shape != ():
+                raise TypeError("topandas can only be applied to records of scalar primitives; field {0} is not".format(repr(n)))
+            if isinstance(x, oamap.generator.Masked):
+                mask = x._getmask(self._arrays, self._cache)[index]
+                valid = (mask != x.maskedvalue)
+                columns[n] = pandas.Series(x._getdata(self._arrays, self._cache)[mask[valid]], index=numpy.nonzero(valid)[0]).reindex(numpy.arange(len(mask)))
+            else:
+                columns[n] = x._getdata(self._arrays, self._cache)[index]
+
+        return pandas.DataFrame(columns, columns=list(columns))
+
     def __len__(self):
         return self._length
 
@@ -32,10 +32,12 @@ import bisect
 import codecs
 import copy
 import fnmatch
+import hashlib
 import json
 import numbers
 import re
 import sys
+import weakref
 from types import ModuleType
 
 import numpy
@@ -73,6 +75,7 @@ class Schema(object):
     def nullable(self, value):
         if value is not True and value is not False:
             raise TypeError("nullable must be True or False, not {0}".format(repr(value)))
+        self._invalidate()
         self._nullable = value
 
     @property
@@ -83,6 +86,7 @@ class Schema(object):
     def mask(self, value):
         if not (value is None or isinstance(value, basestring)):
             raise TypeError("mask must be None or an array name (string), not {0}".format(repr(value)))
+        self._invalidate()
         self._mask = value
 
     @property
@@ -93,6 +97,7 @@ class Schema(object):
     def namespace(self, value):
         if not isinstance(value, basestring):
             raise TypeError("namespace must be a string, not {0}".format(repr(value)))
+        self._invalidate()
         self._namespace = value
 
     @property
@@ -103,6 +108,7 @@ class Schema(object):
     def packing(self, value):
         if not (value is None or isinstance(value, oamap.backend.packing.PackedSource)):
             raise TypeError("packing must be None or a PackedSource, not {0}".format(repr(value)))
+        self._invalidate()
         self._packing = value
 
     def _packingcopy(self, source=None):
@@ -131,11 +137,13 @@ class Schema(object):
     @name.setter
     def name(self, value):
         if value is None:
+            self._invalidate()
             self._name = value
             return
         if isinstance(value, basestring):
             match = self._identifier.match(value)
             if match is not None and len(match.group(0)) == len(value):
+                self._invalidate()
                 self._name = value
                 return
         raise TypeError("name must be None or a string matching /{0}/, not {1}".format(self._identifier.pattern, repr(value)))
@@ -148,19 +156,22 @@ class Schema(object):
     def doc(self, value):
         if not (value is None or isinstance(value, basestring)):
             raise TypeError("doc must be None or a string, not {0}".format(repr(value)))
+        self._invalidate()
         self._doc = value
 
     @property
     def metadata(self):
-        return self._metadata
+        # copied in and out, so that it only changes by assignment, which invalidates cached fingerprints
+        return copy.deepcopy(self._metadata)
 
     @metadata.setter
     def metadata(self, value):
-        self._metadata = value
+        self._invalidate()
+        self._metadata = copy.deepcopy(value)
 
-    def _labels(self):
+    def _labels(self, sortfields=False):
         labels = []
-        self._collectlabels(set(), labels)
+        self._collectlabels(set(), labels, sortfields)
         return labels
         
     def _label(self, labels):
@@ -169,6 +180,71 @@ class Schema(object):
                 return "#{0}".format(index)
         return None
 
+    def _invalidate(self):
+        # a cached fingerprint covers all nodes below it: changing a node invalidates the fingerprints that include it
+        dependents = self.__dict__.pop("_dependents", None)
+        if dependents is not None:
+            for node in dependents.values():
+                node.__dict__.pop("_fingerprint", None)
+                node.__dict__.pop("_orderedfingerprint", None)
+
+    def __getstate__(self):
+        # copies and unpickled schemas start without cached fingerprints (which are only invalidated through the original's nodes)
+        return dict((n, x) for n, x in self.__dict__.items() if n not in ("_fingerprint", "_orderedfingerprint", "_fingerprintconclusive", "_dependents"))
+
+    @staticmethod
+    def _canonicaljson(data):
+        if isinstance(data, dict):
+            out = dict((n, Schema._canonicaljson(x)) for n, x in data.items())
+            if out.get("type", None) == "record":
+                out["fields"] = sorted(out["fields"], key=lambda nx: nx[0])
+            return out
+        elif isinstance(data, list):
+            return [Schema._canonicaljson(x) for x in data]
+        else:
+            return data
+
+    def _fingerprintvalid(self):
+        return "_fingerprint" in self.__dict__
+
+    @property
+    def fingerprint(self):
+        if not self._fingerprintvalid():
+            labels = self._labels()
+            # explicit=None is like explicit=False, but lets unresolved Pointers through
+            tojson = self._tojson(None, labels, set())
+            if len(labels) == 0:
+                canonical = self._canonicaljson(tojson)
+            else:
+                # label numbers depend on traversal order, so number them in a traversal with Record fields sorted by name
+                canonical = self._tojson(None, self._labels(sortfields=True), set(), sortfields=True)
+            fingerprint = hashlib.sha1(json.dumps(canonical, sort_keys=True).encode("utf-8")).hexdigest()
+            # same, but distinguishing Records with differently ordered fields (for caches of objects that present the fields)
+            orderedfingerprint = hashlib.sha1(json.dumps(tojson, sort_keys=True).encode("utf-8")).hexdigest()
+            for node in self.nodes():
+                if "_dependents" not in node.__dict__:
+                    node._dependents = weakref.WeakValueDictionary()
+                node._dependents[id(self)] = self
+            self._fingerprint = fingerprint
+            self._orderedfingerprint = orderedfingerprint
+            # equality follows shared nodes one way only, so differing fingerprints are only conclusive without labels
+            self._fingerprintconclusive = len(labels) == 0
+        return self._fingerprint
+
+    def __hash__(self):
+        return hash(self.fingerprint)
+
+    def __eq__(self, other, memo=None):
+        if self is other:
+            return True
+        if memo is None and isinstance(other, Schema) and self._fingerprintvalid() and other._fingerprintvalid():
+            # only a shortcut when both are already known; computing them for a one-time comparison would be slower
+            if self._fingerprint == other._fingerprint:
+                return True
+            elif self._fingerprintconclusive and other._fingerprintconclusive:
+                return False
+        return self._eq(other, memo)
+
     def __ne__(self, other):
         return not self.__eq__(other)
 
@@ -343,15 +419,39 @@ class Schema(object):
     def __call__(self, arrays, prefix="object", delimiter="-", extension=oamap.extension.common, packing=None):
         return self.generator(prefix=prefix, delimiter=delimiter, extension=self._normalize_extension(extension), packing=packing)(arrays)
 
+    # generators of identical schemas are built once; each caller gets its own shallow clone with new ids
+    _generatorcache = OrderedDict()
+    _generatorcachesize = 100
+
     def generator(self, prefix="object", delimiter="-", extension=oamap.extension.common, packing=None):
         if self._baddelimiter.match(delimiter) is not None:
             raise ValueError("delimiters must not contain /{0}/".format(self._baddelimiter.pattern))
+        extension = self._normalize_extension(extension)
+
+        try:
+            self.fingerprint
+            key = (self._orderedfingerprint, prefix, delimiter, tuple(extension), None if packing is None else json.dumps(packing.tojson(), sort_keys=True))
+        except (TypeError, ValueError, AttributeError):
+            key = None
+        if key is not None and key in Schema._generatorcache:
+            # move to the end: most recently used
+            out = Schema._generatorcache[key]
+            del Schema._generatorcache[key]
+            Schema._generatorcache[key] = out
+            return out._clone()
+
         cacheidx = [0]
         memo = OrderedDict()
-        extension = self._normalize_extension(extension)
         if packing is not None:
             packing = packing.copy()
-        return self._finalizegenerator(self._generator(prefix, delimiter, cacheidx, memo, set(), extension, packing), cacheidx, memo, extension, packing)
+        out = self._finalizegenerator(self._generator(prefix, delimiter, cacheidx, memo, set(), extension, packing), cacheidx, memo, extension, packing)
+
+        if key is not None:
+            # the cached generator is never handed out, so it never accumulates required arrays or compiled state
+            Schema._generatorcache[key] = out._clone()
+            while len(Schema._generatorcache) > Schema._generatorcachesize:
+                del Schema._generatorcache[list(Schema._generatorcache.keys())[0]]
+        return out
 
     def _get_name(self, prefix, delimiter):
         if self._name is not None:
@@ -432,6 +532,7 @@ class Primitive(Schema):
             raise NotImplementedError("record-array dtypes are not supported yet")
         if value.subdtype is not None:
             raise NotImplementedError("multidimensional dtypes are not supported yet")
+        self._invalidate()
         self._dtype = value
 
     _byteorder_transform = {"!": True, ">": True, "<": False, "|": False, "=": numpy.dtype(">f8").isnative}
@@ -481,6 +582,7 @@ class Primitive(Schema):
     def data(self, value):
         if not (value is None or isinstance(value, basestring)):
             raise TypeError("data must be None or an array name (string), not {0}".format(repr(value)))
+        self._invalidate()
         self._data = value
 
     def _hasarraynames(self, memo):
@@ -523,13 +625,13 @@ class Primitive(Schema):
         else:
             return label
 
-    def _collectlabels(self, collection, labels):
+    def _collectlabels(self, collection, labels, sortfields=False):
         if id(self) not in collection:
             collection.add(id(self))
         else:
             labels.append(self)
 
-    def _tojson(self, explicit, labels, shown):
+    def _tojson(self, explicit, labels, shown, sortfields=False):
         label = self._label(labels)
 
         if label is None or id(self) not in shown:
@@ -611,10 +713,7 @@ class Primitive(Schema):
     def _contains(self, schema, memo):
         return self == schema
 
-    def __hash__(self):
-        return hash((Primitive, self._dtype, self._nullable, self._data, self._mask, self._namespace, self._packing, self._name, self._doc, oamap.util.python2hashable(self._metadata)))
-
-    def __eq__(self, other, memo=None):
+    def _eq(self, other, memo=None):
         return isinstance(other, Primitive) and self._dtype == other._dtype and self._nullable == other._nullable and self._data == other._data and self._mask == other._mask and self._namespace == other._namespace and self._packing == other._packing and self._name == other._name and self._doc == other._doc and self._metadata == other._metadata
 
     def __contains__(self, value, memo=None):
@@ -716,6 +815,7 @@ class List(Schema):
             value = Primitive(value)
         if not isinstance(value, Schema):
             raise TypeError("content must be a Schema, not {0}".format(repr(value)))
+        self._invalidate()
         self._content = value
 
     @property
@@ -726,6 +826,7 @@ class List(Schema):
     def starts(self, value):
         if not (value is None or isinstance(value, basestring)):
             raise TypeError("starts must be None or an array name (string), not {0}".format(repr(value)))
+        self._invalidate()
         self._starts = value
 
     @property
@@ -736,6 +837,7 @@ class List(Schema):
     def stops(self, value):
         if not (value is None or isinstance(value, basestring)):
             raise TypeError("stops must be None or an array name (string), not {0}".format(repr(value)))
+        self._invalidate()
         self._stops = value
 
     def _hasarraynames(self, memo):
@@ -793,12 +895,12 @@ class List(Schema):
         else:
             return label
 
-    def _tojson(self, explicit, labels, shown):
+    def _tojson(self, explicit, labels, shown, sortfields=False):
         label = self._label(labels)
 
         if label is None or id(self) not in shown:
             shown.add(id(self))
-            out = {"type": "list", "content": self._content._tojson(explicit, labels, shown)}
+            out = {"type": "list", "content": self._content._tojson(explicit, labels, shown, sortfields)}
             if explicit or self._nullable is not False:
                 out["nullable"] = self._nullable
             if explicit or self._starts is not None:
@@ -850,10 +952,10 @@ class List(Schema):
         else:
             self._content._finalizefromjson(labels)
 
-    def _collectlabels(self, collection, labels):
+    def _collectlabels(self, collection, labels, sortfields=False):
         if id(self) not in collection:
             collection.add(id(self))
-            self._content._collectlabels(collection, labels)
+            self._content._collectlabels(collection, labels, sortfields)
         else:
             labels.append(self)
 
@@ -920,10 +1022,7 @@ class List(Schema):
         else:
             return self._content._contains(schema, memo)
 
-    def __hash__(self):
-        return hash((List, self._content, self._nullable, self._starts, self._stops, self._mask, self._namespace, self._packing, self._name, self._doc, oamap.util.python2hashable(self._metadata)))
-
-    def __eq__(self, other, memo=None):
+    def _eq(self, other, memo=None):
         if memo is None:
             memo = {}
         if id(self) in memo:
@@ -931,7 +1030,7 @@ class List(Schema):
         if not (isinstance(other, List) and self._nullable == other._nullable and self._starts == other._starts and self._stops == other._stops and self._mask == other._mask and self._namespace == other._namespace and self._packing == other._packing and self._name == other._name and self._doc == other._doc and self._metadata == other._metadata):
             return False
         memo[id(self)] = id(other)
-        return self.content.__eq__(other.content, memo)
+        return self.content._eq(other.content, memo)
 
     def __contains__(self, value, memo=None):
         if memo is None:
@@ -1038,6 +1137,7 @@ class Union(Schema):
     def tags(self, value):
         if not (value is None or isinstance(value, basestring)):
             raise TypeError("tags must be None or an array name (string), not {0}".format(repr(value)))
+        self._invalidate()
         self._tags = value
 
     @property
@@ -1048,6 +1148,7 @@ class Union(Schema):
     def offsets(self, value):
         if not (value is None or isinstance(value, basestring)):
             raise TypeError("offsets must be None or an array name (string), not {0}".format(repr(value)))
+        self._invalidate()
         self._offsets = value
 
     def _extend(self, possibilities, start):
@@ -1062,6 +1163,7 @@ class Union(Schema):
             raise TypeError("possibilities must be an iterable of Schemas, not {0}".format(repr(possibilities)))
         except AssertionError as err:
             raise TypeError(err.message)
+        self._invalidate()
         self._possibilities = start + trial
 
     def append(self, possibility):
@@ -1069,6 +1171,7 @@ class Union(Schema):
             possibility = Primitive(possibility)
         if not isinstance(possibility, Schema):
             raise TypeError("possibilities must be Schemas, not {0}".format(repr(possibility)))
+        self._invalidate()
         self._possibilities.append(possibility)
 
     def insert(self, index, possibility):
@@ -1076,6 +1179,7 @@ class Union(Schema):
             possibility = Primitive(possibility)
         if not isinstance(possibility, Schema):
             raise TypeError("possibilities must be Schemas, not {0}".format(repr(possibility)))
+        self._invalidate()
         self._possibilities.insert(index, possibility)
 
     def extend(self, possibilities):
@@ -1091,6 +1195,7 @@ class Union(Schema):
             value = Primitive(value)
         if not isinstance(value, Schema):
             raise TypeError("possibilities must be Schemas, not {0}".format(repr(value)))
+        self._invalidate()
         self._possibilities[index] = value
 
     def _hasarraynames(self, memo):
@@ -1148,12 +1253,12 @@ class Union(Schema):
         else:
             return label
 
-    def _tojson(self, explicit, labels, shown):
+    def _tojson(self, explicit, labels, shown, sortfields=False):
         label = self._label(labels)
 
         if label is None or id(self) not in shown:
             shown.add(id(self))
-            out = {"type": "union", "possibilities": [x._tojson(explicit, labels, shown) for x in self._possibilities]}
+            out = {"type": "union", "possibilities": [x._tojson(explicit, labels, shown, sortfields) for x in self._possibilities]}
             if explicit or self._nullable is not False:
                 out["nullable"] = self._nullable
             if explicit or self._tags is not None:
@@ -1208,11 +1313,11 @@ class Union(Schema):
             else:
                 self._possibilities[i]._finalizefromjson(labels)
 
-    def _collectlabels(self, collection, labels):
+    def _collectlabels(self, collection, labels, sortfields=False):
         if id(self) not in collection:
             collection.add(id(self))
             for possibility in self._possibilities:
-                possibility._collectlabels(collection, labels)
+                possibility._collectlabels(collection, labels, sortfields)
         else:
             labels.append(self)
 
@@ -1288,10 +1393,7 @@ class Union(Schema):
         else:
             return any(x._contains(schema, memo) for x in self._possibilities)
 
-    def __hash__(self):
-        return hash((Union, self._possibilities, self._nullable, self._tags, self._offsets, self._mask, self._namespace, self._packing, self._name, self._doc, oamap.util.python2hashable(self._metadata)))
-
-    def __eq__(self, other, memo=None):
+    def _eq(self, other, memo=None):
         if memo is None:
             memo = {}
         if id(self) in memo:
@@ -1299,7 +1401,7 @@ class Union(Schema):
         if not (isinstance(other, Union) and len(self._possibilities) == len(other._possibilities) and self._nullable == other._nullable and self._tags == other._tags and self._offsets == other._offsets and self._mask == other._mask and self._namespace == other._namespace and self._packing == other._packing and self._name == other._name and self._doc == other._doc and self._metadata == other._metadata):
             return False
         memo[id(self)] = id(other)
-        return all(x.__eq__(y, memo) for x, y in zip(self.possibilities, other.possibilities))
+        return all(x._eq(y, memo) for x, y in zip(self.possibilities, other.possibilities))
 
     def __contains__(self, value, memo=None):
         if memo is None:
@@ -1403,6 +1505,7 @@ class Record(Schema):
             raise TypeError("fields must be a dict from strings to Schemas; {0} is not a dict".format(repr(fields)))
         except AssertionError as err:
             raise TypeError(err.message)
+        self._invalidate()
         self._fields = OrderedDict(start + trial)
 
     def __getitem__(self, index):
@@ -1415,9 +1518,11 @@ class Record(Schema):
             value = Primitive(value)
         if not isinstance(value, Schema):
             raise TypeError("field values must be Schemas, not {0}".format(repr(value)))
+        self._invalidate()
         self._fields[index] = value
 
     def __delitem__(self, index):
+        self._invalidate()
         del self._fields[index]
 
     def _hasarraynames(self, memo):
@@ -1471,12 +1576,13 @@ class Record(Schema):
         else:
             return label
 
-    def _tojson(self, explicit, labels, shown):
+    def _tojson(self, explicit, labels, shown, sortfields=False):
         label = self._label(labels)
 
         if label is None or id(self) not in shown:
             shown.add(id(self))
-            out = {"type": "record", "fields": [[n, x._tojson(explicit, labels, shown)] for n, x in self._fields.items()]}
+            fields = sorted(self._fields.items()) if sortfields else self._fields.items()
+            out = {"type": "record", "fields": [[n, x._tojson(explicit, labels, shown, sortfields)] for n, x in fields]}
             if explicit or self._nullable is not False:
                 out["nullable"] = self._nullable
             if explicit or self._mask is not None:
@@ -1528,11 +1634,11 @@ class Record(Schema):
             else:
                 self._fields[n]._finalizefromjson(labels)
 
-    def _collectlabels(self, collection, labels):
+    def _collectlabels(self, collection, labels, sortfields=False):
         if id(self) not in collection:
             collection.add(id(self))
-            for field in self._fields.values():
-                field._collectlabels(collection, labels)
+            for n in (sorted(self._fields) if sortfields else self._fields):
+                self._fields[n]._collectlabels(collection, labels, sortfields)
         else:
             labels.append(self)
 
@@ -1613,10 +1719,7 @@ class Record(Schema):
         else:
             return any(x._contains(schema, memo) for x in self._fields.values())
 
-    def __hash__(self):
-        return hash((Record, tuple(self._fields.items()), self._nullable, self._mask, self._namespace, self._packing, self._name, self._doc, oamap.util.python2hashable(self._metadata)))
-
-    def __eq__(self, other, memo=None):
+    def _eq(self, other, memo=None):
         if memo is None:
             memo = {}
         if id(self) in memo:
@@ -1624,7 +1727,7 @@ class Record(Schema):
         if not (isinstance(other, Record) and set(self._fields) == set(other._fields) and self._nullable == other._nullable and self._mask == other._mask and self._namespace == other._namespace and self._packing == other._packing and self._name == other._name and self._doc == other._doc and self._metadata == other._metadata):
             return False
         memo[id(self)] = id(other)
-        return all(self._fields[n].__eq__(other._fields[n], memo) for n in self._fields)
+        return all(self._fields[n]._eq(other._fields[n], memo) for n in self._fields)
 
     def __contains__(self, value, memo=None):
         if memo is None:
@@ -1707,6 +1810,7 @@ class Tuple(Schema):
             raise TypeError("types must be an iterable of Schemas, not {0}".format(repr(types)))
         except AssertionError as err:
             raise TypeError(err.message)
+        self._invalidate()
         self._types = start + trial
 
     def append(self, item):
@@ -1714,6 +1818,7 @@ class Tuple(Schema):
             item = Primitive(item)
         if not isinstance(item, Schema):
             raise TypeError("types must be Schemas, not {0}".format(repr(item)))
+        self._invalidate()
         self._types.append(item)
 
     def insert(self, index, item):
@@ -1721,6 +1826,7 @@ class Tuple(Schema):
             item = Primitive(item)
         if not isinstance(item, Schema):
             raise TypeError("types must be Schemas, not {0}".format(repr(item)))
+        self._invalidate()
         self._types.insert(index, item)
 
     def extend(self, types):
@@ -1736,6 +1842,7 @@ class Tuple(Schema):
             value = Primitive(value)
         if not isinstance(item, Schema):
             raise TypeError("types must be Schemas, not {0}".format(repr(value)))
+        self._invalidate()
         self._types[index] = value
 
     def _hasarraynames(self, memo):
@@ -1788,12 +1895,12 @@ class Tuple(Schema):
 
         return label
 
-    def _tojson(self, explicit, labels, shown):
+    def _tojson(self, explicit, labels, shown, sortfields=False):
         label = self._label(labels)
 
         if label is None or id(self) not in shown:
             shown.add(id(self))
-            out = {"type": "tuple", "types": [x._tojson(explicit, labels, shown) for x in self._types]}
+            out = {"type": "tuple", "types": [x._tojson(explicit, labels, shown, sortfields) for x in self._types]}
             if explicit or self._nullable is not False:
                 out["nullable"] = self._nullable
             if explicit or self._mask is not None:
@@ -1842,11 +1949,11 @@ class Tuple(Schema):
             else:
                 self._types[i]._finalizefromjson(labels)
 
-    def _collectlabels(self, collection, labels):
+    def _collectlabels(self, collection, labels, sortfields=False):
         if id(self) not in collection:
             collection.add(id(self))
             for item in self._types:
-                item._collectlabels(collection, labels)
+                item._collectlabels(collection, labels, sortfields)
         else:
             labels.append(self)
 
@@ -1929,10 +2036,7 @@ class Tuple(Schema):
         else:
             return any(x._contains(schema, memo) for x in self._types)
 
-    def __hash__(self):
-        return hash((Tuple, self._types, self._nullable, self._mask, self._namespace, self._packing, self._name, self._doc, oamap.util.python2hashable(self._metadata)))
-
-    def __eq__(self, other, memo=None):
+    def _eq(self, other, memo=None):
         if memo is None:
             memo = {}
         if id(self) in memo:
@@ -1940,7 +2044,7 @@ class Tuple(Schema):
         if not (isinstance(other, Tuple) and len(self._types) == len(other._types) and self._nullable == other._nullable and self._mask == other._mask and self._namespace == other._namespace and self._packing == other._packing and self._name == other._name and self._doc == other._doc and self._metadata == other._metadata):
             return False
         memo[id(self)] = id(other)
-        return all(x.__eq__(y, memo) for x, y in zip(self._types, other._types))
+        return all(x._eq(y, memo) for x, y in zip(self._types, other._types))
 
     def __contains__(self, value, memo=None):
         if memo is None:
@@ -2012,6 +2116,7 @@ class Pointer(Schema):
             raise TypeError("target must be None or a Schema, not {0}".format(repr(value)))
         if value is self:
             raise TypeError("Pointer may not point directly at itself (it would never resolve to a value)")
+        self._invalidate()
         self._target = value
 
     @property
@@ -2022,6 +2127,7 @@ class Pointer(Schema):
     def positions(self, value):
         if not (value is None or isinstance(value, basestring)):
             raise TypeError("positions must be None or an array name (string), not {0}".format(repr(value)))
+        self._invalidate()
         self._positions = value
 
     def _hasarraynames(self, memo):
@@ -2083,14 +2189,18 @@ class Pointer(Schema):
         else:
             return label
 
-    def _tojson(self, explicit, labels, shown):
+    def _tojson(self, explicit, labels, shown, sortfields=False):
         label = self._label(labels)
 
         if label is None or id(self) not in shown:
             shown.add(id(self))
-            if self._target is None:
+            if self._target is not None:
+                target = self._target._tojson(explicit, labels, shown, sortfields)
+            elif explicit is None:
+                target = None
+            else:
                 raise TypeError("pointer target is still None; must be resolved before it can be stored")
-            out = {"type": "pointer", "target": self._target._tojson(explicit, labels, shown)}
+            out = {"type": "pointer", "target": target}
             if explicit or self._nullable is not False:
                 out["nullable"] = self._nullable
             if explicit or self._positions is not None:
@@ -2139,11 +2249,11 @@ class Pointer(Schema):
         else:
             self._target._finalizefromjson(labels)
 
-    def _collectlabels(self, collection, labels):
+    def _collectlabels(self, collection, labels, sortfields=False):
         if id(self) not in collection:
             collection.add(id(self))
             if self._target is not None:
-                self._target._collectlabels(collection, labels)
+                self._target._collectlabels(collection, labels, sortfields)
         else:
             labels.append(self)
 
@@ -2188,11 +2298,11 @@ class Pointer(Schema):
     def _nodes(self, loc, bottomup, memo):
         if id(self) not in memo:
             memo.add(id(self))
-            if bottomup:
+            if bottomup and self._target is not None:
                 for x in self._target._nodes((self,) + loc, bottomup, memo):
                     yield x
             yield (self,) + loc
-            if not bottomup:
+            if not bottomup and self._target is not None:
                 for x in self._target._nodes((self,) + loc, bottomup, memo):
                     yield x
 
@@ -2227,10 +2337,7 @@ class Pointer(Schema):
         else:
             return self._target._contains(schema, memo)
 
-    def __hash__(self):
-        return hash((Pointer, self._target, self._nullable, self._positions, self._mask, self._namespace, self._packing, self._name, self._doc, oamap.util.python2hashable(self._metadata)))
-
-    def __eq__(self, other, memo=None):
+    def _eq(self, other, memo=None):
         if memo is None:
             memo = {}
         if id(self) in memo:
@@ -2238,7 +2345,7 @@ class Pointer(Schema):
         if not (isinstance(other, Pointer) and self._nullable == other._nullable and self._positions == other._positions and self._mask == other._mask and self._namespace == other._namespace and self._packing == other._packing and self._name == other._name and self._doc == other._doc and self._metadata == other._metadata):
             return False
         memo[id(self)] = id(other)
-        return self.target.__eq__(other.target, memo)
+        return self.target._eq(other.target, memo)
 
     def __contains__(self, value, memo=None):
         if memo is None:
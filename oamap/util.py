@@ -30,6 +30,7 @@
 
 import ast
 import math
+import numbers
 import sys
 import types
 
@@ -271,6 +271,41 @@ class TestCompiler(unittest.TestCase):
             self.assertRaises(IndexError, lambda: doit(value, 5))
             self.assertRaises(IndexError, lambda: doit(value, -6))
 
+    def test_list_getitem_unchecked(self):
+        if numba is None:
+            sys.stderr.write("Numba is not installed: skipping ... ")
+        else:
+            oamap.compiler.boundscheck = False
+            try:
+                @numba.njit
+                def doit(x, i):
+                    return x[i]
+
+                @numba.njit
+                def total(x):
+                    out = 0.0
+                    for event in x:
+                        for y in event:
+                            out += y
+                    return out
+
+                value = List(Primitive(float)).fromdata([0.0, 1.1, 2.2, 3.3, 4.4])
+                self.assertEqual(doit(value, 1), 1.1)
+                self.assertEqual(doit(value, -1), 4.4)
+
+                value = List(List(Primitive(float))).fromdata([[1.0, 2.0], [], [3.0]])
+                self.assertEqual(total(value), 6.0)
+                unchecked = numba.typeof(value)
+            finally:
+                oamap.compiler.boundscheck = True
+
+            # checked and unchecked compilations have different argument types, so they are never mixed in numba's caches
+            self.assertNotEqual(numba.typeof(value), unchecked)
+            self.assertFalse(unchecked.boundscheck)
+            self.assertTrue(numba.typeof(value).boundscheck)
+            self.assertEqual(total(value), 6.0)
+            self.assertEqual(len(total.signatures), 2)
+
     def test_list_getitem_slice(self):
         if numba is None:
             sys.stderr.write("Numba is not installed: skipping ... ")
@@ -383,6 +418,64 @@ class TestCompiler(unittest.TestCase):
             value = generator.fromdata([[], [-1.1, -2.2], [2.2, 2.2]])
             self.assertEqual(doit2(value), 4.4)
 
+    def test_list_prange(self):
+        if numba is None or not hasattr(numba, "prange"):
+            sys.stderr.write("Numba is not installed or has no prange: skipping ... ")
+        else:
+            @numba.njit(parallel=True)
+            def total(x):
+                out = 0.0
+                for i in numba.prange(len(x)):
+                    out += x[i]
+                return out
+
+            @numba.njit(parallel=True)
+            def perevent(x):
+                out = numpy.empty(len(x), numpy.float64)
+                for i in numba.prange(len(x)):
+                    best = 0.0
+                    for muon in x[i].muons:
+                        if muon.pt > best:
+                            best = muon.pt
+                    out[i] = best
+                return out
+
+            value = List(Primitive(float)).fromdata([float(i) for i in range(1000)])
+            self.assertEqual(total(value), sum(float(i) for i in range(1000)))
+            self.assertEqual(total(value[10:20]), sum(float(i) for i in range(10, 20)))
+
+            data = [{"muons": [{"pt": float(i + j)} for j in range(i % 4)]} for i in range(1000)]
+            value = List(Record({"muons": List(Record({"pt": Primitive(float)}))})).fromdata(data)
+            self.assertEqual(perevent(value).tolist(), [max([x["pt"] for x in event["muons"]] + [0.0]) for event in data])
+
+    def test_pickle_types(self):
+        if numba is None:
+            sys.stderr.write("Numba is not installed: skipping ... ")
+        else:
+            import pickle
+            import oamap.generator
+
+            @numba.njit
+            def f(x):
+                out = 0.0
+                for muon in x.muons:
+                    out += muon.pt
+                return out
+
+            value = Record({"muons": List(Record({"pt": Primitive(float), "eta": Primitive(float)}))}).fromdata({"muons": [{"pt": 1.1, "eta": 0.0}, {"pt": 2.2, "eta": 0.0}]})
+            self.assertEqual(f(value), 1.1 + 2.2)
+
+            tpe = numba.typeof(value)
+            pickled = pickle.dumps(tpe)
+            pt = value._generator.fields["muons"].content.fields["pt"].fingerprint
+            eta = value._generator.fields["muons"].content.fields["eta"].fingerprint
+
+            # as though loading numba's on-disk cache in a fresh process
+            oamap.generator.Generator._compiledrequired.clear()
+            self.assertEqual(pickle.loads(pickled), tpe)
+            self.assertTrue(pt in oamap.generator.Generator._compiledrequired)
+            self.assertFalse(eta in oamap.generator.Generator._compiledrequired)
+
     def test_tuple_len(self):
         if numba is None:
             sys.stderr.write("Numba is not installed: skipping ... ")
@@ -1243,3 +1336,32 @@ class TestCompiler(unittest.TestCase):
             schema = Record({"one": "int", "two": List(Record({"x": "int", "y": "float"}))})
             value = schema.fromdata({"one": 3, "two": [{"x": 1, "y": 1.1}, {"x": 2, "y": 2.2}, {"x": 3, "y": 3.3}, {"x": 4, "y": 4.4}, {"x": 5, "y": 5.5}]})
             self.assertRaises(numba.TypingError, lambda: contains(value))
+
+    def test_builder(self):
+        if numba is None:
+            sys.stderr.write("Numba is not installed: skipping ... ")
+        else:
+            import oamap.builder
+            import oamap.proxy
+
+            @numba.njit
+            def fill(root, n):
+                for i in range(n):
+                    root.pt.append(i * 1.5)
+                    if i % 2 == 0:
+                        root.hits.masked()
+                        root.lead.masked()
+                    else:
+                        root.hits.begin()
+                        for j in range(i):
+                            root.hits.content.append(j)
+                        root.hits.end()
+                        root.lead.valid()
+                        root.lead.x.append(i * 2.0)
+                return root.pt.count()
+
+            # nested nullable Lists and Records in a List of Records, filled in nopython mode
+            builder = oamap.builder.Builder(List(Record({"pt": "float64", "hits": List("int32", nullable=True), "lead": Record({"x": "float64"}, nullable=True)})), capacity=1)
+            self.assertEqual(fill(builder.root, 4), 4)
+            self.assertEqual(len(builder), 4)
+            self.assertEqual(oamap.proxy.tojson(builder.proxy()), [{"pt": 0.0, "hits": None, "lead": None}, {"pt": 1.5, "hits": [0], "lead": {"x": 2.0}}, {"pt": 3.0, "hits": None, "lead": None}, {"pt": 4.5, "hits": [0, 1, 2], "lead": {"x": 6.0}}])
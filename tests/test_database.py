@@ -109,6 +109,12 @@ class TestDatabase(unittest.TestCase):
         self.assertEqual(oamap.operations.project(one.partition(0), "x"), [1, 2, 3])
         self.assertEqual(oamap.operations.project(one.partition(1), "x"), [4, 5, 6])
 
+        # slicing does not narrow the cached partition that batches and exports start from
+        self.assertEqual([obj.x for obj in one[1:3]], [2, 3])
+        self.assertEqual([[obj.x for obj in batch] for batch in one.batches(2)], [[1, 2], [3], [4, 5], [6]])
+        self.assertEqual(len(one.toarrow(0)), 3)
+        self.assertEqual(one.topandas(0)["x"].tolist(), [1, 2, 3])
+
         # recasting
         db.data.two = one.project("x")
         two = db.data.two
@@ -145,6 +151,11 @@ class TestDatabase(unittest.TestCase):
         summary = one.reduce(0, lambda obj, tally: obj.x + tally)
         self.assertEqual(summary.result(), sum([1, 2, 3, 4, 5, 6]))
 
+        counts = one.hist("x", 3, 1, 7)
+        self.assertEqual(counts.result().tolist(), [0, 2, 2, 2, 0])
+        counts = one.hist(lambda obj: obj.y, 3, 1, 7, weight=lambda obj: obj.x)
+        self.assertEqual(counts.result().tolist(), [0, 3, 7, 11, 0])
+
         # print
         # print "one"
         # for n, x in db._backends[db._namespace]._arrays[0].items():
@@ -167,3 +178,18 @@ class TestDatabase(unittest.TestCase):
 
         self.assertEqual(len(db._backends[db._namespace]._refcounts.get(0, {})), 0)
         self.assertEqual(len(db._backends[db._namespace]._refcounts.get(1, {})), 0)
+
+    def test_fromiterdata(self):
+        db = InMemoryDatabase()
+        db.fromiterdata("one", List(Record({"x": "int32", "y": List("float64")})), ({"x": i, "y": [1.1] * i} for i in range(10)), limit=lambda entries, arrayitems, arraybytes: entries <= 4)
+        one = db.data.one
+        self.assertEqual(one.offsets, [0, 4, 8, 10])
+        self.assertEqual([obj.x for obj in one], list(range(10)))
+        self.assertEqual([len(obj.y) for obj in one], list(range(10)))
+        self.assertEqual(oamap.operations.project(one.partition(2), "x"), [8, 9])
+
+        db.fromiterdata("two", List(Record({"x": "int32", "y": List("float64")})), ({"x": i, "y": [1.1] * i} for i in range(10)))
+        self.assertEqual(db.data.two.offsets, [0, 10])
+        db.fromiterdata("three", List("int32"), iter([]))
+        self.assertEqual(db.data.three.offsets, [0, 0])
+        self.assertEqual(list(db.data.three), [])
@@ -28,8 +28,12 @@
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+import io
+import json
 import unittest
 
+import numpy
+
 import oamap.inference
 import oamap.fill
 import oamap.proxy
@@ -111,3 +115,131 @@ class TestFill(unittest.TestCase):
         self.assertEqual(value.next.next.next.next.label, columnar.next.next.next.next.label)
         self.assertEqual(value.next.next.next.next.next.label, columnar.next.next.next.next.next.label)
         self.assertEqual(value.next.next.next.next.next.next.label, columnar.next.next.next.next.next.next.label)
+
+    def test_fromjsonfile(self):
+        schema = List(Record({"x": Primitive("i8"), "y": List(Primitive("f8"))}))
+        value = [{"x": i, "y": [j * 1.5 for j in range(i % 4)]} for i in range(50)]
+
+        for text, lines in [("\n".join(json.dumps(x) for x in value), True), (json.dumps(value, indent=1), False)]:
+            for blocksize in [1, 7, 1000]:
+                partitions = list(oamap.fill.fromjsonfile(io.BytesIO(text.encode("utf-8")), schema, lines=lines, limit=lambda entries, arrayitems, arraybytes: entries <= 20, blocksize=blocksize))
+                self.assertEqual([numentries for numentries, arrays in partitions], [20, 20, 10])
+                self.assertEqual(sum((oamap.proxy.tojson(schema(arrays)) for numentries, arrays in partitions), []), value)
+
+        self.assertEqual(list(oamap.fill._iterjson(io.StringIO(u" [ ] "), False)), [])
+        self.assertRaises(ValueError, lambda: list(oamap.fill._iterjson(io.StringIO(u"[1, 2"), False, 2)))
+        self.assertRaises(ValueError, lambda: list(oamap.fill._iterjson(io.StringIO(u"1 2"), False)))
+        self.assertEqual(list(oamap.fill._iterjson(io.BytesIO(b"[1,2]\n[3]\n"), True)), [[1, 2], [3]])
+        for text in [u"[1 2 3]", u"[,1,,2,]", u"[1,2,]", u"[,]", u"[1,2] garbage {", u"[1,2][3]"]:
+            for blocksize in [1, 1000]:
+                self.assertRaises(ValueError, lambda: list(oamap.fill._iterjson(io.StringIO(text), False, blocksize)))
+        self.assertEqual(list(oamap.fill._iterjson(io.StringIO(u'[1.5, -2e3, "a b", true, null] \n'), False, 1)), [1.5, -2e3, "a b", True, None])
+
+        # a syntax error in the middle of the file fails without reading the rest of it
+        bad = io.BytesIO(b"[1, }" + b", 1" * 100000 + b"]")
+        self.assertRaises(ValueError, lambda: list(oamap.fill._iterjson(bad, False, 16)))
+        self.assertLess(bad.tell(), 1000)
+        self.assertEqual(list(oamap.fill._iterjson(io.BytesIO(b"[1,2]\n[3]\n"), True, 2)), [[1, 2], [3]])
+
+        schema = List(List(Primitive("i8")))
+        partitions = list(oamap.fill.fromjsonfile(io.BytesIO(b"[1,2]\n[3]\n[]\n"), schema, lines=True, limit=lambda entries, arrayitems, arraybytes: entries <= 20))
+        self.assertEqual(sum((oamap.proxy.tojson(schema(arrays)) for numentries, arrays in partitions), []), [[1, 2], [3], []])
+
+    def test_fromcolumns(self):
+        schema = List(Record({"met": Primitive("f8"), "muons": List(Record({"pt": Primitive("f8"), "iso": Primitive("f8", nullable=True)})), "hits": List(List(Primitive("i4")))}))
+        columns = {"met": numpy.array([1.0, 2.0, 3.0]),
+                   "muons/pt": (numpy.array([1.1, 2.2, 3.3]), [numpy.array([2, 0, 1])]),
+                   "muons/iso": (numpy.ma.MaskedArray([0.1, 0.2, 0.3], mask=[False, True, False]), [numpy.array([2, 0, 1])]),
+                   "hits": (numpy.arange(6), [numpy.array([1, 2, 0]), numpy.array([3, 0, 3])])}
+        self.assertEqual(oamap.proxy.tojson(schema(oamap.fill.fromcolumns(columns, schema))),
+                         [{"met": 1.0, "muons": [{"pt": 1.1, "iso": 0.1}, {"pt": 2.2, "iso": None}], "hits": [[0, 1, 2]]},
+                          {"met": 2.0, "muons": [], "hits": [[], [3, 4, 5]]},
+                          {"met": 3.0, "muons": [{"pt": 3.3, "iso": 0.3}], "hits": []}])
+
+        schema = List(Record({"a": Primitive("i4"), "b": Primitive("f8")}))
+        columns = numpy.array([(1, 2.5), (3, 4.5)], dtype=[("a", "i4"), ("b", "f8")])
+        self.assertEqual(oamap.proxy.tojson(schema(oamap.fill.fromcolumns(columns, schema))), [{"a": 1, "b": 2.5}, {"a": 3, "b": 4.5}])
+
+        self.assertRaises(ValueError, lambda: oamap.fill.fromcolumns({"a": numpy.array([1, 2]), "b": numpy.array([1.1])}, schema))
+
+        schema = List(Record({"muons": List(Record({"pt": Primitive("f8"), "iso": Primitive("f8")}))}))
+        self.assertRaises(ValueError, lambda: oamap.fill.fromcolumns({"muons/pt": (numpy.array([1.1, 2.2]), [numpy.array([2, 0])]), "muons/iso": (numpy.array([0.1, 0.2]), [numpy.array([1, 1])])}, schema))
+
+        schema = List(Record({"a": Pointer(Primitive("i8")), "b": Primitive("i8")}))
+        self.assertRaises(TypeError, lambda: oamap.fill.fromcolumns({"a": numpy.array([0]), "b": numpy.array([1])}, schema))
+
+    def test_fromdatasharded(self):
+        schema = List(Record({"x": Primitive("i8"), "y": List(Primitive("f8"), nullable=True), "z": Union([Primitive("i8"), List(Primitive("i8"))]), "p": Pointer(Record({"a": Primitive("i8")}))}))
+        targets = [{"a": i} for i in range(5)]
+        value = [{"x": i, "y": None if i % 3 == 0 else [1.5] * i, "z": i if i % 2 == 1 else [i, i], "p": targets[i % 5]} for i in range(23)]
+        expect = oamap.proxy.tojson(schema(oamap.fill.fromdata(value, schema)))
+
+        shards = oamap.fill.fromdatasharded(value, schema, numshards=4, processes=1)
+        self.assertEqual([numentries for numentries, arrays in shards], [6, 6, 6, 5])
+        self.assertEqual(sum((oamap.proxy.tojson(schema(arrays)) for numentries, arrays in shards), []), expect)
+
+        self.assertEqual(oamap.proxy.tojson(schema(oamap.fill.mergeshards(schema, shards))), expect)
+        self.assertEqual(oamap.proxy.tojson(schema(oamap.fill.fromdatasharded(value, schema, numshards=3, processes=2, merge=True))), expect)
+
+    def test_pointer_fromequal(self):
+        schema = List(Record({"x": Primitive("i8"), "p": Pointer(Record({"a": Primitive("i8"), "b": List(Primitive("i8"))}))}))
+        value = [{"x": i, "p": {"a": i % 3, "b": [i % 3] * (i % 3)}} for i in range(10)]
+        expect = oamap.proxy.tojson(schema(oamap.fill.fromdata(value, schema)))
+
+        generator = schema.generator()
+        pointer = generator.content.fields["p"]
+
+        arrays = oamap.fill.fromdata(value, generator, pointer_fromequal=True)
+        self.assertEqual(oamap.proxy.tojson(generator(arrays)), expect)
+        self.assertEqual(arrays[pointer.target.fields["a"].data].tolist(), [0, 1, 2])
+        self.assertEqual(arrays[pointer.positions].tolist(), [0, 1, 2, 0, 1, 2, 0, 1, 2, 0])
+
+        arrays = oamap.fill.fromdata(value, generator, pointer_fromequal=lambda obj: obj["a"] % 2)
+        self.assertEqual(arrays[pointer.target.fields["a"].data].tolist(), [0, 1])
+        self.assertEqual(arrays[pointer.positions].tolist(), [0, 1, 0, 0, 1, 0, 0, 1, 0, 0])
+
+        for x in [{"a": 1, "b": 1}, {"a": None, "b": None}, [1.5, 1.5], ({"a": 1}, [{"a": 1}])]:
+            self.assertEqual(oamap.fill._fromdata_key(x, True), oamap.fill._fromdata_key(json.loads(json.dumps(x)) if not isinstance(x, tuple) else x, True))
+            self.assertNotEqual(oamap.fill._fromdata_key(x, True), None)
+        cyclic = []
+        cyclic.append(cyclic)
+        self.assertEqual(oamap.fill._fromdata_key(cyclic, True), None)
+        self.assertNotEqual(oamap.fill._fromdata_key([1], True), oamap.fill._fromdata_key((1,), True))
+
+        class Target(dict):
+            def __eq__(self, other):
+                raise AssertionError("pointer_fromequal compared targets one by one")
+        schema = List(Record({"x": Primitive("i8"), "p": Pointer(Record({"a": Primitive("i8"), "b": Primitive("i8")}))}))
+        generator = schema.generator()
+        pointer = generator.content.fields["p"]
+        arrays = oamap.fill.fromdata([{"x": i, "p": Target(a=i % 2, b=i % 2)} for i in range(6)], generator, pointer_fromequal=True)
+        self.assertEqual(arrays[pointer.target.fields["a"].data].tolist(), [0, 1])
+        self.assertEqual(arrays[pointer.positions].tolist(), [0, 1, 0, 1, 0, 1])
+
+    def test_fromiterdataadaptive(self):
+        value = [{"x": 1, "y": [1, 2]}, {"x": 2, "y": []}, {"x": 3.5, "y": [3]}, {"x": 4, "y": None}, {"x": 5, "y": [4]}, [1, 2, 3], {"x": 6, "y": [300]}]
+        partitions = list(oamap.fill.fromiterdataadaptive(value, prefix=2, limit=lambda entries, arrayitems, arraybytes: True))
+        self.assertEqual([numentries for generator, numentries, arrays in partitions], [2, 1, 2, 1, 1])
+        self.assertEqual(partitions[0][0].schema, List(Record({"x": Primitive("u1"), "y": List(Primitive("u1"))})))
+        self.assertEqual(partitions[1][0].schema, List(Record({"x": Primitive("f8"), "y": List(Primitive("u1"))})))
+        self.assertEqual(partitions[2][0].schema, List(Record({"x": Primitive("f8"), "y": List(Primitive("u1"), nullable=True)})))
+        self.assertEqual(sum((oamap.proxy.tojson(generator(arrays)) for generator, numentries, arrays in partitions), []), value)
+
+        partitions = list(oamap.fill.fromiterdataadaptive(iter(value), prefix=100, limit=lambda entries, arrayitems, arraybytes: entries <= 3))
+        self.assertEqual([numentries for generator, numentries, arrays in partitions], [3, 3, 1])
+        self.assertEqual(sum((oamap.proxy.tojson(generator(arrays)) for generator, numentries, arrays in partitions), []), value)
+
+        value = [{"x": 1}, {"x": 2}, {"x": 3, "z": 1.5}, {"x": 4}]
+        partitions = list(oamap.fill.fromiterdataadaptive(value, prefix=2, limit=lambda entries, arrayitems, arraybytes: True))
+        self.assertEqual([generator.schema for generator, numentries, arrays in partitions], [List(Record({"x": Primitive("u1")})), List(Record({"x": Primitive("u1"), "z": Primitive("f8", nullable=True)}))])
+        self.assertEqual(sum((oamap.proxy.tojson(generator(arrays)) for generator, numentries, arrays in partitions), []), [{"x": 1}, {"x": 2}, {"x": 3, "z": 1.5}, {"x": 4, "z": None}])
+
+        for value in [[{"y": []}, {"y": []}, {"y": [1.5]}], [None, None, 3.5, None]]:
+            partitions = list(oamap.fill.fromiterdataadaptive(value, prefix=2, limit=lambda entries, arrayitems, arraybytes: True))
+            self.assertEqual([numentries for generator, numentries, arrays in partitions], [2, len(value) - 2])
+            self.assertEqual(sum((oamap.proxy.tojson(generator(arrays)) for generator, numentries, arrays in partitions), []), value)
+        self.assertEqual(list(oamap.fill.fromiterdataadaptive([])), [])
+
+        # only adaptive filling treats missing keys as None; direct filling and containment stay strict
+        self.assertRaises(TypeError, lambda: oamap.fill.fromdata([{"x": 1}], List(Record({"x": "i8", "y": Primitive("f8", nullable=True)})).generator()))
+        self.assertFalse({"x": 1} in Record({"x": "i8", "y": Primitive("f8", nullable=True)}))
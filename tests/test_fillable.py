@@ -246,6 +246,34 @@ class TestFillable(unittest.TestCase):
         a.update()
         self.assertEqual(a[:].tolist(), data)
 
+    def test_FillableBuffer(self):
+        data = [0.0, 1.1, 2.2, 3.3, 4.4, 5.5, 6.6, 7.7, 8.8, 9.9]
+        a = FillableBuffer("f8", capacity=1)
+        a.append(data[0])
+        a.append(data[1])
+        a.update()
+        self.assertEqual(a[:].tolist(), data[:2])
+        a.append(999)
+        self.assertEqual(a[:].tolist(), data[:2])
+        a.revert()
+        self.assertEqual(a[:].tolist(), data[:2])
+        a.append(data[2])
+        a.update()
+        self.assertEqual(a[:].tolist(), data[:3])
+        a.extend([999, 999, 999, 999])
+        self.assertEqual(a[:].tolist(), data[:3])
+        a.revert()
+        self.assertEqual(a[:].tolist(), data[:3])
+        a.extend(data[3:5])
+        a.update()
+        self.assertEqual(a[:].tolist(), data[:5])
+        a.extend(data[5:])
+        a.update()
+        self.assertEqual(a[:].tolist(), data)
+        self.assertEqual(a[::-3].tolist(), data[::-3])
+        self.assertEqual(a.capacity, 16)
+        self.assertTrue(a[:].base is a._data)
+
     def test_FillableFile1(self):
         filename = tempfile.mktemp()
         try:
@@ -705,3 +733,41 @@ class TestFillable(unittest.TestCase):
             self.assertEqual(a[:].tolist(), data)
         finally:
             os.remove(filename)
+
+    def test_FillableMemmap(self):
+        filename = tempfile.mktemp()
+        try:
+            data = [0.0, 1.1, 2.2, 3.3, 4.4, 5.5, 6.6, 7.7, 8.8, 9.9]
+            a = FillableMemmap(filename, "f8", capacity=3)
+            a.append(data[0])
+            a.append(data[1])
+            a.update()
+            self.assertEqual(a[:].tolist(), data[:2])
+            a.extend([999, 999, 999, 999])
+            a.revert()
+            self.assertEqual(a[:].tolist(), data[:2])
+            a.extend(data[2:])
+            a.update()
+            self.assertEqual(a[:].tolist(), data)
+            self.assertTrue(os.path.getsize(filename) > 10*8)
+            a.close()
+            self.assertEqual(os.path.getsize(filename), 10*8)
+            self.assertEqual(a[:].tolist(), data)
+            self.assertEqual(numpy.fromfile(filename, "f8").tolist(), data)
+        finally:
+            os.remove(filename)
+
+    def test_FillableNumpyMemmap(self):
+        filename = tempfile.mktemp()
+        try:
+            data = [0.0, 1.1, 2.2, 3.3, 4.4, 5.5, 6.6, 7.7, 8.8, 9.9]
+            with FillableNumpyMemmap(filename, "f8", capacity=3) as a:
+                a.append(data[0])
+                a.update()
+                a.extend(data[1:])
+                a.update()
+                self.assertEqual(a[:].tolist(), data)
+            self.assertEqual(a[:].tolist(), data)
+            self.assertTrue(self.array_equal(a[:], filename))
+        finally:
+            os.remove(filename)
@@ -28,6 +28,7 @@
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+import time
 import unittest
 from collections import namedtuple
 
@@ -53,6 +54,104 @@ class TestInference(unittest.TestCase):
         self.assertEqual(schema, Schema.fromjsonstring(schema.tojsonstring()))
         self.assertEqual(schema, oamap.inference.fromnames(oamap.fillable.arrays(schema).keys()))
 
+    def test_fingerprint(self):
+        one = List(Record(OrderedDict([("x", Primitive("i4")), ("y", List(Primitive("f8")))])))
+        two = List(Record(OrderedDict([("y", List(Primitive("f8"))), ("x", Primitive("i4"))])))
+        self.assertEqual(one.fingerprint, two.fingerprint)
+        self.assertEqual(hash(one), hash(two))
+        self.assertEqual(one, two)
+
+        two.content["y"].content.nullable = True
+        self.assertNotEqual(one.fingerprint, two.fingerprint)
+        self.assertNotEqual(one, two)
+        self.assertEqual(two, List(Record({"x": Primitive("i4"), "y": List(Primitive("f8", nullable=True))})))
+
+        two.content["y"] = List(Primitive("f8"))
+        self.assertEqual(one, two)
+
+        # changing a copy or an unrelated schema leaves cached fingerprints alone
+        import copy
+        one.fingerprint
+        three = copy.copy(one.content)
+        three.nullable = True
+        two.content["x"].nullable = True
+        self.assertTrue(one._fingerprintvalid())
+        self.assertNotEqual(three.fingerprint, one.content.fingerprint)
+
+        pointer = Pointer(None)
+        self.assertEqual(hash(pointer), hash(Pointer(None)))
+        unresolved = pointer.fingerprint
+        pointer.target = Primitive("i4")
+        self.assertNotEqual(pointer.fingerprint, unresolved)
+
+        # labels are numbered in a canonical order, so field order does not change the hash of equal schemas
+        def pointers(order):
+            p, q = Record({"v": "f8"}), Record({"w": "i4"})
+            targets = {"a": p, "b": q, "c": p, "e": q}
+            return List(Record(OrderedDict((n, Pointer(targets[n])) for n in order)))
+        a, b = pointers("abce"), pointers("ecba")
+        self.assertEqual(a, b)
+        self.assertEqual(a.fingerprint, b.fingerprint)
+        self.assertEqual(hash(a), hash(b))
+        self.assertEqual(len(set([a, b])), 1)
+        self.assertNotEqual(a._orderedfingerprint, b._orderedfingerprint)
+
+        # metadata is copied in and out: editing the returned value does not change the schema behind its fingerprint
+        m = Primitive("f8", metadata={"a": 1})
+        m.fingerprint
+        m.metadata["a"] = 2
+        self.assertEqual(m.metadata, {"a": 1})
+        m.metadata = {"a": 2}
+        self.assertEqual(m, Primitive("f8", metadata={"a": 2}))
+        self.assertEqual(hash(m), hash(Primitive("f8", metadata={"a": 2})))
+
+    def test_generator_cache(self):
+        schema = List(Record({"x": Primitive("i4"), "y": List(Primitive("f8"))}))
+        generator = schema.generator()
+        numcached = len(Schema._generatorcache)
+        self.assertEqual(schema.generator().fingerprint, generator.fingerprint)
+        self.assertEqual(schema.deepcopy().generator().fingerprint, generator.fingerprint)
+        self.assertEqual(len(Schema._generatorcache), numcached)
+
+        # every caller gets its own generator, with new ids and nothing required yet
+        generator._requireall()
+        again = schema.generator()
+        self.assertTrue(again is not generator)
+        self.assertNotEqual(again.id, generator.id)
+        self.assertFalse(again._required)
+        self.assertFalse(again.content.fields["y"].content._required)
+        self.assertTrue(again.content.schema is generator.content.schema)
+
+        # schemas that differ only in field order are cached separately
+        one = Record(OrderedDict([("x", Primitive("i4")), ("y", Primitive("i4"))]))
+        two = Record(OrderedDict([("y", Primitive("i4")), ("x", Primitive("i4"))]))
+        Schema._generatorcache.clear()
+        one.generator()
+        two.generator()
+        self.assertEqual(len(Schema._generatorcache), 2)
+
+        # a cache hit is a shallow clone, much cheaper than building the generator (partition switches on wide schemas)
+        wide = List(Record(dict(("f{0}".format(i), Primitive("f8")) for i in range(3000))))
+        starttime = time.time()
+        wide.generator()
+        cold = time.time() - starttime
+        warm = []
+        for i in range(3):
+            starttime = time.time()
+            wide.generator()
+            warm.append(time.time() - starttime)
+        self.assertLess(min(warm), cold / 3)
+
+        self.assertNotEqual(schema.generator(prefix="other").fingerprint, generator.fingerprint)
+        schema.content["y"].content.nullable = True
+        self.assertNotEqual(schema.generator().fingerprint, generator.fingerprint)
+        self.assertEqual(schema.generator().schema, schema)
+
+        self.assertEqual(schema.generator().fingerprint, schema.deepcopy().generator(extension=[]).fingerprint)
+        self.assertNotEqual(schema.generator().fingerprint, generator.fingerprint)
+        self.assertNotEqual(schema.generator().fingerprint, schema.generator(prefix="other").fingerprint)
+        self.assertEqual(schema.generator().content.fingerprint, schema.generator().content.fingerprint)
+
     def test_infer_Unknown(self):
         self.assertRaises(TypeError, lambda: oamap.inference.fromdata(None))
 
@@ -385,6 +484,21 @@ class TestInference(unittest.TestCase):
         self.checkdata([{"one": 0}, None], List(Record({"one": Primitive("u1")}, nullable=True)))
         self.checkdata([{"one": 0}, None, {"two": 0}], List(Union([Record({"one": Primitive("u1")}, nullable=True), Record({"two": Primitive("u1")})])))
 
+    def test_infer_sampled(self):
+        data = [{"one": i, "two": [float(i)] * (i % 3)} for i in range(100)] + [{"one": -1, "two": None}]
+        schema = List(Record({"one": Primitive("i1"), "two": List(Primitive("f8"), nullable=True)}))
+        self.assertEqual(oamap.inference.fromdata(data), schema)
+        self.assertEqual(oamap.inference.fromdata(data, processes=3), schema)
+        self.assertEqual(oamap.inference.fromdata(iter(data), processes=2, shardsize=7), schema)
+        self.assertEqual(oamap.inference.fromdata(data, processes=None), schema)
+        self.assertEqual(oamap.inference.fromdata(data, stride=10), schema)
+        self.assertEqual(oamap.inference.fromdata(data, limit=50), List(Record({"one": Primitive("u1"), "two": List(Primitive("f8"))})))
+        self.assertEqual(oamap.inference.fromdata(data, sample=20, seed=12345).content["one"], Primitive("u1"))
+        self.assertTrue(data[:20] in oamap.inference.fromdata(data[:20], sample=20))
+        self.assertRaises(TypeError, lambda: oamap.inference.fromdata({"one": 1}, sample=10))
+        self.assertRaises(TypeError, lambda: oamap.inference.fromdata(data, stride=0))
+        self.assertRaises(TypeError, lambda: oamap.inference.fromdata(data, processes=0))
+
     def test_infer_Tuple(self):
         self.checkdata(([0], False), Tuple([List(Primitive("u1")), Primitive("bool_")]))
         self.checkdata(([0], True), Tuple([List(Primitive("u1")), Primitive("bool_")]))
@@ -331,6 +331,24 @@ class TestOperations(unittest.TestCase):
         self.assertEqual(len(filter(data, lambda obj: obj.x % 2 == 0, at="hey", numba=False).hey), 2)
         self.assertEqual(len(filter(data, lambda obj: obj.x % 2 == 0, at="hey", numba={"nopython": True}).hey), 2)
 
+    def test_filter_vectorized(self):
+        events = [{"met": 10.0, "muons": [{"pt": 5.0}, {"pt": 25.0}]}, {"met": 30.0, "muons": []}, {"met": 50.0, "muons": [{"pt": 15.0}]}, {"met": 5.0, "muons": [{"pt": 30.0}, {"pt": 40.0}]}]
+        data = List(Record({"met": "float64", "muons": List(Record({"pt": "float64"}))})).fromdata(events)
+
+        self.assertEqual([x.met for x in filter(data, "met > 20", vectorized=True)], [30.0, 50.0])
+        self.assertEqual([x.met for x in filter(data, "muons/pt > 20", vectorized=True)], [10.0, 5.0])
+        self.assertEqual([x.met for x in filter(data, "len(muons) >= 2 and not met > 8", vectorized=True)], [5.0])
+        self.assertEqual([x.met for x in filter(data, "5 < muons/pt < 20 or muons/pt > met", vectorized=True)], [10.0, 50.0, 5.0])
+        self.assertEqual([x.met for x in filter(filter(data, "met > 7", vectorized=True), "muons/pt > 20", vectorized=True)], [10.0])
+
+        new = filter(data, "pt > 20", at="muons", vectorized=True)
+        self.assertEqual([[y.pt for y in x.muons] for x in new], [[25.0], [], [], [30.0, 40.0]])
+        self.assertEqual([x.met for x in new], [10.0, 30.0, 50.0, 5.0])
+
+        data = List(Record({"x": Primitive("float64", nullable=True)})).fromdata([{"x": 1.0}, {"x": None}, {"x": 3.0}])
+        self.assertEqual([x.x for x in filter(data, "x > 0", vectorized=True)], [1.0, 3.0])
+        self.assertRaises(TypeError, lambda: filter(data, "x + 1", vectorized=True))
+
     def test_define(self):
         data = Record({"x": "int"}).fromdata({"x": 5})
         fcn = lambda obj, y: obj.x + y
@@ -368,7 +386,60 @@ class TestOperations(unittest.TestCase):
         self.assertEqual([obj.z for obj in new[1].hey], [11, None, 13])
         new = define(data, "z", lambda obj: None if obj.x % 2 == 0 else obj.x + 10, at="hey", numba={"nopython": True})
         self.assertEqual([obj.z for obj in new[1].hey], [11, None, 13])
-        
+
+    def test_define_vectorized(self):
+        data = List(Record({"pt": "float64", "phi": "float64"})).fromdata([{"pt": 1.0, "phi": 0.0}, {"pt": 2.0, "phi": math.pi}])
+        new = define(data, "px", "pt*cos(phi)", vectorized=True)
+        self.assertEqual([x.px for x in new], [1.0, -2.0])
+        self.assertEqual(new._generator.namedschema().content["px"].nullable, False)
+
+        data = Record({"hey": List(Record({"x": "int64", "y": Primitive("int64", nullable=True)}))}).fromdata({"hey": [{"x": 1, "y": 10}, {"x": 2, "y": None}, {"x": 3, "y": 30}]})
+        new = define(data, "z", "x + y", at="hey", vectorized=True)
+        self.assertEqual([obj.z for obj in new.hey], [11, None, 33])
+        self.assertRaises(ValueError, lambda: define(data, "z", "x + y", at="hey", fieldtype=Primitive("int64"), vectorized=True))
+
+        data = List(Record({"met": "float64", "muons": List(Record({"pt": "float64"}))})).fromdata([{"met": 1.0, "muons": [{"pt": 2.0}]}, {"met": 3.0, "muons": []}])
+        self.assertEqual([x.n for x in define(data, "n", "len(muons) + 1", vectorized=True)], [2, 1])
+        self.assertRaises(TypeError, lambda: define(data, "n", "muons/pt + met", vectorized=True))
+
+    def test_define_builder(self):
+        import oamap.builder
+        import oamap.proxy
+        builder = oamap.builder.Builder(List(List(Record({"pt": "float64", "tag": Primitive("int32", nullable=True)}))), capacity=1, numba=False)
+        for event in [[(1.1, None), (2.2, 3)], [], [(3.3, 4)]]:
+            builder.root.begin()
+            for pt, tag in event:
+                builder.root.content.pt.append(pt)
+                if tag is None:
+                    builder.root.content.tag.masked()
+                else:
+                    builder.root.content.tag.append(tag)
+            builder.root.end()
+        self.assertEqual(oamap.proxy.tojson(builder.proxy()), [[{"pt": 1.1, "tag": None}, {"pt": 2.2, "tag": 3}], [], [{"pt": 3.3, "tag": 4}]])
+
+        def goodjets(event, out, cut):
+            out.begin()
+            for jet in event.jets:
+                if jet.pt > cut:
+                    out.content.pt.append(jet.pt)
+            out.end()
+
+        def leading(event, out):
+            if len(event.jets) == 0:
+                out.masked()
+            else:
+                out.valid()
+                out.pt.append(event.jets[0].pt)
+
+        data = List(Record({"jets": List(Record({"pt": "float64"}))})).fromdata([{"jets": [{"pt": 10.0}, {"pt": 30.0}]}, {"jets": []}, {"jets": [{"pt": 50.0}]}])
+        for nb in (False, {"nopython": True}):
+            new = define(data, "good", goodjets, 20.0, fieldtype=List(Record({"pt": "float64"})), numba=nb)
+            self.assertEqual([[jet.pt for jet in event.good] for event in new], [[30.0], [], [50.0]])
+            self.assertEqual([[jet.pt for jet in event.jets] for event in new], [[10.0, 30.0], [], [50.0]])
+
+            new = define(data, "lead", leading, fieldtype=Record({"pt": "float64"}, nullable=True), numba=nb)
+            self.assertEqual([None if event.lead is None else event.lead.pt for event in new], [10.0, None, 50.0])
+
     def test_map(self):
         data = List(Record({"x": "int"})).fromdata([{"x": 1}, {"x": 2}, {"x": 3}])
         fcn = lambda obj, y: obj.x + y
@@ -478,6 +549,51 @@ class TestOperations(unittest.TestCase):
         self.assertEqual(new.dtype[2], numpy.dtype(numpy.float64))
         self.assertEqual(new.dtype.names, ("one", "two", "three"))
 
+    def test_hist(self):
+        events = [{"w": 2.0, "muons": [{"pt": -1.0}, {"pt": 0.5}]}, {"w": 1.0, "muons": []}, {"w": 3.0, "muons": [{"pt": 1.5}, {"pt": 2.0}, {"pt": float("nan")}]}]
+        data = List(Record({"w": "float64", "muons": List(Record({"pt": "float64"}))})).fromdata(events)
+
+        self.assertEqual(hist(data, "muons/pt", 2, 0, 2).tolist(), [1, 1, 1, 1])
+        self.assertEqual(hist(data, "muons/pt", 2, 0, 2, weight="w").tolist(), [2, 2, 3, 3])
+        self.assertEqual(hist(data, "pt", 2, 0, 2, at="muons").tolist(), [1, 1, 1, 1])
+        self.assertEqual(hist(data, "len(muons)", 3, 0, 3).tolist(), [0, 1, 0, 1, 1])
+
+        for nb in (False, {"nopython": True}):
+            self.assertEqual(hist(data, lambda event: event.w, 2, 0, 4, numba=nb).tolist(), [0, 1, 2, 0])
+            self.assertEqual(hist(data, lambda muon: muon.pt, 2, 0, 2, weight=lambda muon: 10.0, at="muons", numba=nb).tolist(), [10, 10, 10, 10])
+
+        self.assertRaises(TypeError, lambda: hist(data, "muons/pt", 2, 0, 2, weight=lambda event: event.w))
+
+        class Future(object):
+            def __init__(self, result):
+                self._result = result
+            def done(self):
+                return True
+            def result(self, timeout=None):
+                return self._result
+        partitions = [Future(hist(data, "w", 2, 0, 4)) for i in range(3)]
+        self.assertEqual(hist.combiner(partitions).result().tolist(), [0, 3, 6, 0])
+
+    def test_aggregate(self):
+        events = [{"muons": [{"pt": 3.0, "q": 1}, {"pt": 5.0, "q": -1}, {"pt": 4.0, "q": None}]}, {"muons": []}, {"muons": None}, {"muons": [{"pt": 2.0, "q": None}]}]
+        data = List(Record({"muons": List(Record({"pt": "float64", "q": Primitive("int32", nullable=True)}), nullable=True)})).fromdata(events)
+
+        self.assertEqual([x.n for x in aggregate(data, "n", "count", "muons")], [3, 0, 0, 1])
+        self.assertEqual([x.n for x in aggregate(data, "n", "count", "muons", "q")], [2, 0, 0, 0])
+        self.assertEqual([x.s for x in aggregate(data, "s", "sum", "muons", "pt")], [12.0, 0.0, 0.0, 2.0])
+        self.assertEqual([x.s for x in aggregate(data, "s", "sum", "muons", "q")], [0, 0, 0, 0])
+        self.assertEqual([x.m for x in aggregate(data, "m", "min", "muons", "pt")], [3.0, None, None, 2.0])
+        self.assertEqual([x.m for x in aggregate(data, "m", "max", "muons", "pt")], [5.0, None, None, 2.0])
+        self.assertEqual([x.m for x in aggregate(data, "m", "mean", "muons", "pt*2")], [8.0, None, None, 4.0])
+        self.assertEqual([x.i for x in aggregate(data, "i", "argmax", "muons", "pt")], [1, None, None, 0])
+        withnan = List(Record({"muons": List(Record({"pt": "float64"}))})).fromdata([{"muons": [{"pt": 1.0}, {"pt": float("nan")}, {"pt": 2.0}]}, {"muons": [{"pt": 1.0}, {"pt": 3.0}]}])
+        self.assertEqual([x.i for x in aggregate(withnan, "i", "argmax", "muons", "pt")], [1, 1])
+        self.assertEqual([x.b for x in aggregate(data, "b", "any", "muons", "pt > 4")], [True, False, False, False])
+        self.assertEqual([x.b for x in aggregate(data, "b", "all", "muons", "pt > 2.5")], [True, True, True, False])
+
+        self.assertRaises(ValueError, lambda: aggregate(data, "x", "median", "muons", "pt"))
+        self.assertRaises(TypeError, lambda: aggregate(data, "x", "sum", "muons"))
+
     def test_reduce(self):
         data = List("int").fromdata([1, 2, 3, 4, 5])
         fcn = lambda x, tally, y: x + tally + y
@@ -28,7 +28,21 @@
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+import gc
+import pickle
+import sys
 import unittest
+import weakref
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+try:
+    import pandas
+except ImportError:
+    pandas = None
 
 import oamap.proxy
 from oamap.schema import *
@@ -254,3 +268,109 @@ class TestProxy(unittest.TestCase):
         self.assertEqual(x.next.label, 1)
         self.assertEqual(x.next.next.label, 2)
         self.assertEqual(x.next.next.next, None)
+
+    def test_toarrow(self):
+        if pyarrow is None:
+            sys.stderr.write("pyarrow is not installed: skipping ... ")
+        else:
+            schema = List(Record({"x": Primitive("f8"), "y": Primitive("i8", nullable=True), "z": List(Primitive("i8")), "u": Union([Primitive("i8"), Tuple([Primitive("f8")])])}))
+            data = [{"x": 1.1, "y": None, "z": [1, 2], "u": 3}, {"x": 2.2, "y": 5, "z": [], "u": (1.5,)}, {"x": 3.3, "y": 7, "z": [3], "u": 4}]
+            expect = [{"x": 1.1, "y": None, "z": [1, 2], "u": 3}, {"x": 2.2, "y": 5, "z": [], "u": {"0": 1.5}}, {"x": 3.3, "y": 7, "z": [3], "u": 4}]
+            obj = schema.fromdata(data)
+            self.assertEqual(obj.toarrow().to_pylist(), expect)
+            self.assertEqual(obj[::-2].toarrow().to_pylist(), expect[::-2])
+            self.assertEqual(obj[1:].toarrow().to_pylist(), expect[1:])
+
+    def test_topandas(self):
+        if pandas is None:
+            sys.stderr.write("pandas is not installed: skipping ... ")
+        else:
+            obj = List(Record({"x": Primitive("f8"), "y": Primitive("i8", nullable=True)})).fromdata([{"x": 1.1, "y": None}, {"x": 2.2, "y": 5}, {"x": 3.3, "y": 7}])
+            df = obj.topandas()
+            self.assertEqual(list(df.columns), ["x", "y"])
+            self.assertEqual(df["x"].tolist(), [1.1, 2.2, 3.3])
+            self.assertTrue(pandas.isnull(df["y"][0]))
+            self.assertEqual(df["y"][1:].tolist(), [5, 7])
+            self.assertEqual(obj[::2].topandas()["x"].tolist(), [1.1, 3.3])
+
+    def test_column(self):
+        schema = List(Record({"muons": List(Record({"pt": Primitive("f8"), "iso": Primitive("f8", nullable=True)}), nullable=True), "met": Primitive("f8")}))
+        obj = schema.fromdata([{"muons": [{"pt": 1.1, "iso": None}, {"pt": 2.2, "iso": 0.5}], "met": 10.0}, {"muons": None, "met": 20.0}, {"muons": [{"pt": 3.3, "iso": 0.1}], "met": 30.0}, {"muons": [], "met": 40.0}])
+
+        content, offsets = obj.column("muons/pt")
+        self.assertEqual(content.tolist(), [1.1, 2.2, 3.3])
+        self.assertEqual([x.tolist() for x in offsets], [[0, 2, 2, 3, 3]])
+
+        content, offsets = obj[::-1].column("muons/pt")
+        self.assertEqual(content.tolist(), [3.3, 1.1, 2.2])
+        self.assertEqual([x.tolist() for x in offsets], [[0, 0, 1, 1, 3]])
+
+        content, offsets = obj.column("muons/iso")
+        self.assertEqual(content.tolist(), [None, 0.5, 0.1])
+
+        content, offsets = obj[2:].column("met")
+        self.assertEqual(content.tolist(), [30.0, 40.0])
+        self.assertEqual(offsets, [])
+
+        self.assertRaises(KeyError, lambda: obj.column("muons"))
+        self.assertRaises(KeyError, lambda: obj.column("muons/eta"))
+
+    def test_batches(self):
+        obj = List(List(Primitive("i8"))).fromdata([[i] * (i % 3) for i in range(10)])
+        batches = list(obj.batches(4))
+        self.assertEqual([len(x) for x in batches], [4, 4, 2])
+        self.assertEqual(sum((list(x) for x in batches), []), obj)
+        content, offsets = batches[1].column()
+        self.assertEqual(content.tolist(), [4, 5, 5, 7])
+        self.assertEqual(offsets[0].tolist(), [0, 1, 3, 3, 4])
+        self.assertEqual([len(x) for x in obj[::-1].batches(3)], [3, 3, 3, 1])
+        self.assertEqual(sum((list(x) for x in obj[::-1].batches(3)), []), obj[::-1])
+        self.assertRaises(ValueError, lambda: obj.batches(0))
+
+    def test_entercompiled(self):
+        obj = List(Primitive("f8")).fromdata([1.1, 2.2, 3.3])
+        generator = obj._generator
+        generator.content._required = True
+
+        out = generator._entercompiled(obj._arrays, obj._cache)
+        self.assertTrue(generator._entercompiled(obj._arrays, obj._cache) is out)
+        self.assertEqual(out[0][generator.content.dataidx], obj._cache[generator.content.dataidx].ctypes.data)
+
+        cache = generator._newcache()
+        self.assertTrue(generator._entercompiled(obj._arrays, cache) is not out)
+        self.assertTrue("_lastcompiled" not in pickle.loads(pickle.dumps(generator)).__dict__)
+
+        # the pointer tables do not keep a finished partition's arrays alive
+        ref = weakref.ref(obj._cache[generator.content.dataidx])
+        del obj, cache
+        gc.collect()
+        self.assertTrue(ref() is None)
+
+    def test_compiledrequired(self):
+        import oamap.generator
+        generator = List(Primitive("f8")).generator()
+        fingerprint = generator.content.fingerprint
+        oamap.generator.Generator._requirecompiled(generator.content)
+        self.assertTrue(fingerprint in oamap.generator.Generator._compiledrequired)
+
+        # forgotten when the generators that compiled code was lowered with are gone
+        del generator
+        gc.collect()
+        self.assertFalse(fingerprint in oamap.generator.Generator._compiledrequired)
+
+        # with nothing compiled, the pure-Python path does not compute fingerprints
+        other = List(Primitive("i4", doc="not compiled")).generator()
+        if len(oamap.generator.Generator._compiledrequired) == 0:
+            self.assertFalse(other.content._isrequired())
+            self.assertTrue("_fingerprint" not in other.content.__dict__)
+
+    def test_boxgenerators(self):
+        import oamap.compiler
+        generator = List(Primitive("f8")).generator()
+        pickled = pickle.dumps(generator)
+        first = oamap.compiler._boxgenerator(("x0", pickled))
+        self.assertTrue(oamap.compiler._boxgenerator(("x0", pickled)) is first)
+        for i in range(1, oamap.compiler._boxgeneratorssize + 1):
+            oamap.compiler._boxgenerator(("x{0}".format(i), pickled))
+        self.assertEqual(len(oamap.compiler._boxgenerators), oamap.compiler._boxgeneratorssize)
+        self.assertFalse("x0" in oamap.compiler._boxgenerators)